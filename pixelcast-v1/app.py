@@ -1,12 +1,28 @@
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
-import pandas as pd
+import html
 import numpy as np
 from datetime import datetime, timedelta
-import requests
-import json
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from pixelcast import GeocodingService, WeatherDataGenerator
+from pixelcast import ProviderError, TimeWindow
+from pixelcast import activities, bulk, export
+from pixelcast import instrumentation as timing
+from pixelcast.forecast_store import get_forecast_store, store_coords
+from pixelcast.overview import OverviewJob, OverviewRequest, get_overview_service
+from pixelcast.providers import DayForecast, get_provider_runner
+from pixelcast.render_cache import RenderCache
+from pixelcast.basemap import ATTRIBUTION, MAX_ZOOM, PREFETCH, UPSTREAM_URL, get_tile_proxy
+from pixelcast.weather_tiles import apply_colormap, start_basemap_server, start_tile_server, tiles_reachable_from
+
+# folium, streamlit_folium and pandas are only needed once a forecast is on
+# screen, so they are imported where they are used to keep cold start fast
+if TYPE_CHECKING:
+    import folium
+    import pandas as pd
+
+timing.begin_rerun()
 
 # Page configuration
 st.set_page_config(
@@ -17,7 +33,8 @@ st.set_page_config(
 )
 
 # PixelCast CSS styling system
-st.markdown("""
+with timing.span('page.style'):
+    st.markdown("""
 <style>
 :root{
   --pc-bg:#f6f8fb;
@@ -160,63 +177,485 @@ label, .stSelectbox label, .stDateInput label{color:var(--pc-muted); font-weight
 </style>
 """, unsafe_allow_html=True)
 
-class WeatherDataGenerator:
-    """Generate deterministic mock weather data"""
+@st.cache_resource
+def get_render_cache(name: str, max_entries: int = 256) -> RenderCache:
+    """Process-wide memoization shared by every session and rerun"""
+    return RenderCache(max_entries=max_entries)
+
+HOURLY_CHART_SPEC = {
+    "mark": {"type": "line", "point": True},
+    "encoding": {
+        "x": {"field": "time", "type": "ordinal", "title": None},
+        "y": {"field": "value", "type": "quantitative", "title": None},
+        "color": {"field": "metric", "type": "nominal", "title": None}
+    }
+}
+
+DEFAULT_ACTIVITY_WINDOW = 2
+
+def get_hourly_chart_spec(highlight_times: Tuple[str, ...]) -> Dict:
+    """Hourly chart spec, with shaded bands behind the highlighted slots"""
+    if not highlight_times:
+        return HOURLY_CHART_SPEC
     
-    @staticmethod
-    def generate_weather_data(lat: float, lon: float, date: datetime, 
-                            start_time: str, end_time: str) -> Dict:
-        """Generate mock weather data based on location and time"""
-        # Create deterministic seed based on coordinates and date
-        seed = int(lat * 1000 + lon * 1000 + date.toordinal())
-        np.random.seed(seed)
-        
-        # Base values with some variation
-        base_temp = 20 + (lat / 10) + np.random.normal(0, 5)
-        base_humidity = 60 + np.random.normal(0, 15)
-        base_wind = 5 + np.random.exponential(3)
-        base_uv = min(11, max(0, 3 + (lat / 20) + np.random.normal(0, 2)))
-        
+    def build() -> Dict:
+        line = dict(HOURLY_CHART_SPEC)
+        line["encoding"] = dict(line["encoding"], x=dict(line["encoding"]["x"], bandPosition=0.5))
         return {
-            'temperature': round(base_temp, 1),
-            'precipitation': round(max(0, np.random.exponential(2)), 1),
-            'humidity': round(max(0, min(100, base_humidity)), 1),
-            'wind_speed': round(base_wind, 1),
-            'uv_index': round(base_uv, 1),
-            'cloud_cover': round(np.random.uniform(0, 100), 1)
+            "layer": [
+                {
+                    "data": {"values": [{"time": time} for time in highlight_times]},
+                    "mark": {"type": "rect", "color": "#22c55e", "opacity": 0.15},
+                    "encoding": {"x": {"field": "time", "type": "ordinal", "scale": {"type": "band", "paddingInner": 0}}}
+                },
+                line
+            ]
         }
+    
+    return get_render_cache('chart_spec').get_or_create(highlight_times, build)
 
-class GeocodingService:
-    """Handle location geocoding using OpenStreetMap Nominatim API"""
+def get_best_windows(activity: str, length: int, hourly_data: Dict, k: int = 3) -> List[Dict]:
+    """Best activity windows over the forecast range, computed once per forecast and activity"""
+    dates = sorted(hourly_data['series'])
+    times = hourly_data['times']
+    end_time = hourly_data['end_time']
     
-    @staticmethod
-    def geocode_location(location: str) -> Optional[Tuple[float, float, str]]:
-        """Geocode a location string to coordinates"""
-        try:
-            # Using Nominatim API (free, no API key required)
-            url = "https://nominatim.openstreetmap.org/search"
-            params = {
-                'q': location,
-                'format': 'json',
-                'limit': 1,
-                'addressdetails': 1
-            }
-            headers = {
-                'User-Agent': 'PixelCast Weather App'
-            }
+    def build() -> List[Dict]:
+        series = np.stack([hourly_data['series'][date_str] for date_str in dates])
+        scores = activities.score_slots(series, activities.get_activity_profile(activity))
+        # Whole-day windows join up across midnight
+        starts, means = activities.top_windows(scores, length, k, continuous=len(times) == 24)
+        windows = []
+        for start, mean in zip(starts, means):
+            if start < 0:
+                continue
+            day, step = divmod(int(start), len(times))
+            slot_times = [times[(step + i) % len(times)] for i in range(length)]
+            windows.append({
+                'date': dates[day],
+                'start': slot_times[0],
+                'end': activities.window_end(slot_times[-1], end_time),
+                'slots': [(dates[day + (step + i) // len(times)], time) for i, time in enumerate(slot_times)],
+                'score': float(mean)
+            })
+        return windows
+    
+    key = (hourly_data['coords'], tuple(times), end_time, tuple(dates), activity, length, k)
+    return get_render_cache('activity_windows').get_or_create(key, build)
+
+def format_window(window: Dict) -> str:
+    date_label = datetime.strptime(window['date'], "%Y-%m-%d").strftime("%a %d %b")
+    return f"{date_label}, {window['start']}–{window['end']}"
+
+def get_forecast(lat: float, lon: float, dates: List, start_time: str, end_time: str) -> Tuple[Dict, Dict]:
+    """Daily and hourly forecasts for a date range, generating only days missing from the store.
+
+    The hourly series are read-only views into the shared forecast store and
+    the daily dicts are rebuilt per call, so nothing here needs to be kept
+    in session state.
+    """
+    store = get_forecast_store()
+    lat, lon = store_coords(lat, lon)
+    keys = [(lat, lon, date.strftime("%Y-%m-%d"), start_time, end_time) for date in dates]
+    entries = [store.get(key) for key in keys]
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    
+    if missing:
+        # All missing days in one concurrent provider call, shared with other sessions
+        forecasts = get_provider_runner().fetch_range(
+            (lat, lon), [dates[i] for i in missing], TimeWindow(start_time, end_time)
+        )
+        for i, forecast in zip(missing, forecasts):
+            entries[i] = store.put(keys[i], forecast.daily, forecast.hourly)
+    timing.count('forecast.days_generated', len(missing))
+    timing.count('forecast.days_reused', len(keys) - len(missing))
+    
+    minutes = WeatherDataGenerator.time_steps(start_time, end_time)
+    weather_data = {key[2]: entry.daily_dict() for key, entry in zip(keys, entries)}
+    hourly_data = {
+        'coords': (lat, lon),
+        'times': [f"{int(m) // 60:02d}:{int(m) % 60:02d}" for m in minutes],
+        'end_time': end_time,
+        'series': {key[2]: entry.hourly for key, entry in zip(keys, entries)}
+    }
+    return weather_data, hourly_data
+
+def load_session_forecast() -> Tuple[Dict, Dict]:
+    """This session's confirmed forecast, read from the shared store.
+
+    Sessions keep only the query in ``st.session_state.forecast``; days
+    evicted from the store since are regenerated here.
+    """
+    query = st.session_state.forecast
+    if query is None:
+        return {}, {}
+    dates = [datetime.strptime(date_str, "%Y-%m-%d").date() for date_str in query['dates']]
+    try:
+        return get_forecast(*query['coords'], dates, *query['window'])
+    except ProviderError as e:
+        st.error(f"Error fetching forecast: {e}")
+        return {}, {}
+
+def get_popup_html(date_str: str, weather: Dict) -> str:
+    """Weather popup HTML for the map marker, built once per date and forecast"""
+    def build() -> str:
+        return f"""
+                    <div style="width: 200px;">
+                        <h4>Weather Forecast</h4>
+                        <p><strong>Date:</strong> {datetime.strptime(date_str, '%Y-%m-%d').strftime('%B %d, %Y')}</p>
+                        <p>🌡️ {weather['temperature']}°C</p>
+                        <p>☔ {weather['precipitation']}mm</p>
+                        <p>💧 {weather['humidity']}%</p>
+                        <p>🌬️ {weather['wind_speed']} km/h</p>
+                        <p>☀️ UV {weather['uv_index']}</p>
+                        <p>☁️ {weather['cloud_cover']}%</p>
+                    </div>
+                    """
+    
+    return get_render_cache('popup').get_or_create((date_str, tuple(sorted(weather.items()))), build)
+
+def get_hourly_chart_data(date_str: str, hourly_data: Dict) -> "pd.DataFrame":
+    """Long-form hourly chart data, built once per location, date and window"""
+    def build() -> "pd.DataFrame":
+        import pandas as pd
+        hourly_df = pd.DataFrame(
+            hourly_data['series'][date_str],
+            index=pd.Index(hourly_data['times'], name='time'),
+            columns=WeatherDataGenerator.METRICS
+        )
+        return (hourly_df[['temperature', 'humidity', 'cloud_cover']]
+                .reset_index()
+                .melt('time', var_name='metric'))
+    
+    return get_render_cache('hourly_chart').get_or_create((hourly_data['coords'], date_str, tuple(hourly_data['times'])), build)
+
+def get_session_id() -> str:
+    """Streamlit session id of the current script run"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+def render_debug_panel(rerun):
+    """Sidebar panel with this rerun's spans and the session's running totals"""
+    import pandas as pd
+    with st.sidebar:
+        st.markdown("### ⏱️ Debug Timing")
+        st.metric("Last rerun", f"{rerun.duration * 1000:.1f} ms")
+        st.markdown("**This rerun**")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, seconds * 1000) for name, seconds in rerun.spans],
+                columns=["span", "ms"]
+            ),
+            hide_index=True,
+            width="stretch"
+        )
+        st.markdown("**Session totals**")
+        summary = timing.session_summary(get_session_id())
+        st.dataframe(
+            pd.DataFrame(
+                [(name, stats['count'], stats['mean'] * 1000, stats['max'] * 1000)
+                 for name, stats in sorted(summary.items())],
+                columns=["span", "count", "mean ms", "max ms"]
+            ),
+            hide_index=True,
+            width="stretch"
+        )
+        st.markdown("**Reruns per interaction**")
+        interactions = timing.interaction_summary(get_session_id())
+        st.dataframe(
+            pd.DataFrame(
+                [(name, stats['count'], stats['reruns'], stats['max_reruns'])
+                 for name, stats in sorted(interactions.items())],
+                columns=["interaction", "count", "reruns", "max reruns"]
+            ),
+            hide_index=True,
+            width="stretch"
+        )
+        counts = timing.session_counts(get_session_id())
+        if counts:
+            st.caption(" · ".join(f"{name}: {n:,}" for name, n in sorted(counts.items())))
+        st.markdown("**Forecast store**")
+        stats = get_forecast_store().stats()
+        lookups = stats['hits'] + stats['misses']
+        st.caption(
+            f"{stats['entries']:,} entries · {stats['bytes'] / 2**20:.1f} of "
+            f"{stats['max_bytes'] / 2**20:.0f} MB · "
+            f"{stats['hits'] / lookups if lookups else 0:.0%} hit rate · "
+            f"{stats['evictions']:,} evictions"
+        )
+
+def select_date(date_str: str):
+    """Date button callback; runs before the rerun so no second rerun is needed"""
+    timing.interaction('date_select')
+    st.session_state.selected_date = date_str
+
+MAP_KEY = "weather_map"
+
+def handle_map_click():
+    """Map click callback: selects the clicked location before the rerun it triggers.
+
+    st_folium keeps reporting the last click, so a click is only applied
+    once; repeats of the previous click are ignored.
+    """
+    timing.interaction('map_click')
+    clicked = (st.session_state.get(MAP_KEY) or {}).get("last_object_clicked")
+    if not clicked:
+        return
+    clicked_lat, clicked_lon = clicked["lat"], clicked["lng"]
+    if (clicked_lat, clicked_lon) == st.session_state.map_clicked:
+        return
+    st.session_state.map_clicked = (clicked_lat, clicked_lon)
+    st.session_state.selected_coords = (clicked_lat, clicked_lon)
+    place_name = GeocodingService.reverse_geocode(clicked_lat, clicked_lon)
+    st.session_state.selected_location = (
+        f"{place_name} ({clicked_lat:.4f}, {clicked_lon:.4f})" if place_name
+        else f"Selected Location ({clicked_lat:.4f}, {clicked_lon:.4f})"
+    )
+
+def build_weather_map(weather_data: Dict, overlay_metric: Optional[str], overlay_label: str) -> "folium.Map":
+    """Build the forecast map for the selected location, date and overlay"""
+    import folium
+
+    # Basemap tiles go through the caching proxy when the tile server has a
+    # public URL; otherwise browsers fetch them from the upstream directly
+    basemap_url = start_basemap_server()
+    m = folium.Map(
+        location=st.session_state.selected_coords,
+        zoom_start=12,
+        tiles=None
+    )
+    folium.TileLayer(tiles=basemap_url or UPSTREAM_URL, attr=ATTRIBUTION, name='OpenStreetMap',
+                     max_zoom=MAX_ZOOM).add_to(m)
+    if basemap_url and PREFETCH:
+        get_tile_proxy().prefetch(*st.session_state.selected_coords)
+
+    # Add weather marker
+    if st.session_state.selected_date and st.session_state.selected_date in weather_data:
+        weather = weather_data[st.session_state.selected_date]
+
+        popup_html = get_popup_html(st.session_state.selected_date, weather)
+
+        folium.Marker(
+            st.session_state.selected_coords,
+            popup=folium.Popup(popup_html, max_width=250),
+            icon=folium.Icon(color='blue', icon='cloud')
+        ).add_to(m)
+
+    # Heatmap overlay tiles for the selected metric and date
+    if overlay_metric and st.session_state.selected_date:
+        tile_url = start_tile_server(WeatherDataGenerator.sample_field, app_url=st.context.url)
+        if tile_url:
+            folium.TileLayer(
+                tiles=tile_url.format(
+                    metric=overlay_metric,
+                    date=st.session_state.selected_date,
+                    z='{z}', x='{x}', y='{y}'
+                ),
+                attr='PixelCast',
+                name=overlay_label,
+                overlay=True,
+                opacity=0.7
+            ).add_to(m)
+        else:
+            st.warning("Weather overlay is unavailable: the tile server could not start.")
+    
+    return m
+
+EXPORT_FORMATS = {"CSV": "csv", "Parquet": "parquet", "Arrow": "arrow"}
+
+def stored_forecast_source(window: TimeWindow) -> export.ForecastSource:
+    """Export source reading the shared store and provider, so files match the forecast on screen"""
+    def fetch(location: Tuple[float, float], dates: List, _) -> List[DayForecast]:
+        weather_data, hourly_data = get_forecast(*location, dates, window.start_time, window.end_time)
+        return [DayForecast(weather_data[day], hourly_data['series'][day])
+                for day in (date.strftime("%Y-%m-%d") for date in dates)]
+    return export.fetch_source(fetch)
+
+def render_export_controls(key: str, file_stem: str, lats: List[float], lons: List[float],
+                           dates: List[str], window: TimeWindow, names: Optional[List[str]] = None,
+                           source: export.ForecastSource = export.generator_source):
+    """Format picker and download button; the file is only built when clicked"""
+    col_format, col_hourly, col_download = st.columns(3)
+    with col_format:
+        format_label = st.selectbox("Export format", options=list(EXPORT_FORMATS), key=f"{key}_format")
+    with col_hourly:
+        st.markdown("<br>", unsafe_allow_html=True)  # Align with the selectbox
+        hourly = st.checkbox("Hourly rows", key=f"{key}_hourly")
+    fmt = EXPORT_FORMATS[format_label]
+    mime, extension = export.FORMATS[fmt]
+    export_window = window if hourly else None
+    rows = export.count_rows(lats, dates, export_window)
+    too_large = rows > export.MAX_DOWNLOAD_ROWS
+    with col_download:
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.download_button(
+            "⬇️ Download",
+            data=lambda: export.export_file(fmt, lats, lons, dates, export_window, names, source=source),
+            file_name=f"{file_stem}{extension}",
+            mime=mime,
+            key=f"{key}_download",
+            on_click="ignore",
+            disabled=too_large
+        )
+    if too_large:
+        st.caption(
+            f"This export has {rows:,} rows, more than the {export.MAX_DOWNLOAD_ROWS:,} row download "
+            f"limit. Use daily rows, fewer venues, or `python export_forecasts.py` for large exports."
+        )
+
+# Largest venue list the comparison mode accepts from the UI
+MAX_VENUES = 50_000
+
+VENUE_COLUMNS = {
+    'temperature': 'Temp °C',
+    'temperature_max': 'Max °C',
+    'precipitation': 'Precip mm',
+    'humidity': 'Humidity %',
+    'wind_speed': 'Wind km/h',
+    'uv_index': 'UV',
+    'cloud_cover': 'Cloud %'
+}
+
+def render_venue_comparison():
+    """Bulk forecast for a list of venues: sortable comparison table plus map markers"""
+    with st.expander("📍 Compare venues", expanded=bool(st.session_state.venue_comparison)):
+        st.markdown("Paste `name, lat, lon` rows or place names to look up (a header row is optional), or upload a CSV.")
+        st.caption(f"Place names missing from the offline gazetteer are looked up online, "
+                   f"at most {bulk.MAX_GEOCODE_NAMES} per comparison; give coordinates for the rest.")
+        venue_text = st.text_area(
+            "Venues",
+            height=150,
+            placeholder="Stadium, 40.829, -73.926\nCentral Park, 40.782, -73.965\nBoston",
+            label_visibility="collapsed"
+        )
+        venue_file = st.file_uploader("Venue CSV", type=["csv", "txt"])
+        
+        col_start, col_days = st.columns(2)
+        with col_start:
+            first_day = st.date_input("First day", value=datetime.now().date(), key="venue_start")
+        with col_days:
+            days = st.slider("Days", min_value=1, max_value=bulk.MAX_DAYS, value=3, key="venue_days")
+        
+        if st.button("Compare venues"):
+            text = venue_file.getvalue().decode('utf-8', errors='replace') if venue_file else venue_text
+            try:
+                venues = bulk.parse_venues(text)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                venues = None
+            if venues is None:
+                pass
+            elif not venues:
+                st.error("Please enter at least one venue.")
+            elif len(venues) > MAX_VENUES:
+                st.error(f"❌ At most {MAX_VENUES:,} venues can be compared at once.")
+            else:
+                with st.spinner(f"Forecasting {len(venues):,} venues..."), timing.span('main.venues'):
+                    venues, unresolved = bulk.resolve_venues(venues, max_lookups=bulk.MAX_GEOCODE_NAMES)
+                    dates = [first_day + timedelta(days=i) for i in range(days)]
+                    forecasts = bulk.forecast_venues(venues, dates)
+                if unresolved:
+                    shown = ', '.join(unresolved[:10]) + (' ...' if len(unresolved) > 10 else '')
+                    st.warning(f"Could not locate {len(unresolved)} venue(s): {shown}")
+                st.session_state.venue_comparison = {
+                    'venues': venues,
+                    'dates': [d.strftime("%Y-%m-%d") for d in dates],
+                    'forecasts': forecasts
+                }
+        
+        comparison = st.session_state.venue_comparison
+        if comparison and comparison['venues']:
+            import pandas as pd
+            
+            day_label = st.selectbox("Compare", ["Whole range"] + comparison['dates'], key="venue_day")
+            day = None if day_label == "Whole range" else comparison['dates'].index(day_label)
+            summary = bulk.summarize_venues(comparison['forecasts'], day)
+            
+            venues = comparison['venues']
+            table = pd.DataFrame({
+                'Venue': [venue.name for venue in venues],
+                'Lat': [venue.lat for venue in venues],
+                'Lon': [venue.lon for venue in venues],
+                **{VENUE_COLUMNS[metric]: values for metric, values in summary.items()}
+            })
+            # Column headers sort the table in place, client side
+            st.dataframe(table, hide_index=True, width="stretch")
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    result = data[0]
-                    lat = float(result['lat'])
-                    lon = float(result['lon'])
-                    display_name = result.get('display_name', location)
-                    return lat, lon, display_name
-        except Exception as e:
-            st.error(f"Error geocoding location: {e}")
+            rgba = apply_colormap(summary['temperature'], 'temperature')
+            table['color'] = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b, _ in rgba]
+            st.map(table, latitude='Lat', longitude='Lon', color='color')
+            
+            render_export_controls(
+                'venue_export', 'pixelcast_venues',
+                [venue.lat for venue in venues], [venue.lon for venue in venues],
+                comparison['dates'], TimeWindow('00:00', '23:00'), [venue.name for venue in venues]
+            )
+
+# Seconds between card refreshes while an overview is streaming
+OVERVIEW_POLL_SECONDS = 0.3
+# Fast engines (rules) usually finish within this, saving a polling round
+OVERVIEW_INLINE_WAIT = 0.05
+
+def get_overview_job(activity: Optional[str], weather_data: Dict, hourly_data: Dict) -> Optional[OverviewJob]:
+    """Overview for the current forecast and activity, memoized across reruns and sessions"""
+    if not weather_data or not hourly_data:
         return None
+    
+    best_window = None
+    if activity:
+        length = min(st.session_state.get("activity_window", DEFAULT_ACTIVITY_WINDOW), len(hourly_data['times']))
+        best_windows = get_best_windows(activity, length, hourly_data)
+        if best_windows:
+            best_window = f"{format_window(best_windows[0])} ({best_windows[0]['score']:.0%} comfort)"
+    
+    location = st.session_state.forecast_location or "the selected location"
+    key = (hourly_data['coords'], location, tuple(sorted(weather_data)), tuple(hourly_data['times']),
+           activity, best_window)
+    request = OverviewRequest(location, weather_data, activity, best_window)
+    return get_overview_service().request(key, request)
+
+def render_overview_card(job: Optional[OverviewJob]):
+    """AI overview card: summary line first, then one recommendation per line"""
+    if job is None:
+        summary = "Search for a location and confirm to get an overview tailored to the forecast."
+        recommendations = []
+    else:
+        lines = [html.escape(line) for line in job.lines]
+        summary = lines[0] if lines else "Generating overview..."
+        recommendations = lines[1:]
+        if not job.done:
+            recommendations.append("▌")
+        elif job.error:
+            recommendations.append(f"Overview generation failed: {html.escape(job.error)}")
+    
+    st.markdown(f"""
+        <div class="pixel-card pixel-accent">
+            <h3>🤖 AI Weather Summary</h3>
+            <p class="pixel-muted">{summary}</p>
+            <ul style="margin: 12px 0; padding-left: 20px;">
+                {''.join([f'<li style="margin: 8px 0;">{rec}</li>' for rec in recommendations])}
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+
+@st.fragment(run_every=OVERVIEW_POLL_SECONDS)
+def stream_overview_card(job: OverviewJob):
+    """Re-render only the card while text streams in"""
+    render_overview_card(job)
+    if job.done:
+        # Finished: one full rerun swaps this polling fragment for a static card
+        timing.expect_rerun()
+        st.rerun()
+
+def render_ai_overview(activity: Optional[str], weather_data: Dict, hourly_data: Dict):
+    with timing.span('main.ai_overview'):
+        job = get_overview_job(activity, weather_data, hourly_data)
+        if job is not None and not job.done:
+            job.wait(OVERVIEW_INLINE_WAIT)
+    if job is None or job.done:
+        render_overview_card(job)
+    else:
+        stream_overview_card(job)
 
 def create_weather_metric_display(metric_name: str, value: float, unit: str, emoji: str) -> str:
     """Create HTML for weather metric display using PixelCast styling"""
@@ -238,12 +677,20 @@ def initialize_session_state():
         st.session_state.selected_location = None
     if 'selected_coords' not in st.session_state:
         st.session_state.selected_coords = None
-    if 'weather_data' not in st.session_state:
-        st.session_state.weather_data = {}
+    if 'forecast' not in st.session_state:
+        # A new session; its first run is the page load
+        timing.interaction('page_load')
+        # Query for the confirmed forecast; the data itself lives in the shared store
+        st.session_state.forecast = None
     if 'selected_date' not in st.session_state:
         st.session_state.selected_date = None
     if 'map_clicked' not in st.session_state:
+        # Last map click applied, so repeated reports of it are ignored
         st.session_state.map_clicked = None
+    if 'venue_comparison' not in st.session_state:
+        st.session_state.venue_comparison = None
+    if 'forecast_location' not in st.session_state:
+        st.session_state.forecast_location = None
 
 def main():
     initialize_session_state()
@@ -272,9 +719,14 @@ def main():
         with col_search:
             st.markdown("<br>", unsafe_allow_html=True)  # Align with text input
             if st.button("🔍", help="Search location"):
+                timing.interaction('search')
                 if location_input:
-                    with st.spinner("Searching location..."):
-                        geocode_result = GeocodingService.geocode_location(location_input)
+                    with st.spinner("Searching location..."), timing.span('main.search'):
+                        try:
+                            geocode_result = GeocodingService.geocode_location(location_input)
+                        except Exception as e:
+                            st.error(f"Error geocoding location: {e}")
+                            geocode_result = None
                         if geocode_result:
                             lat, lon, display_name = geocode_result
                             st.session_state.selected_location = display_name
@@ -285,6 +737,24 @@ def main():
                 else:
                     st.error("Please enter a location to search.")
         
+        # Offline autocomplete suggestions for the typed location
+        if location_input and location_input != st.session_state.selected_location:
+            suggestions = GeocodingService.suggest_locations(location_input)
+            if suggestions:
+                suggestion_labels = [name for _, _, name in suggestions]
+                suggestion = st.selectbox(
+                    "Suggestions",
+                    options=suggestion_labels,
+                    index=None,
+                    placeholder="Did you mean...",
+                    label_visibility="collapsed"
+                )
+                if suggestion:
+                    lat, lon, display_name = suggestions[suggestion_labels.index(suggestion)]
+                    st.session_state.selected_location = display_name
+                    st.session_state.selected_coords = (lat, lon)
+                    st.success(f"Found: {display_name}")
+        
         # Date range selection with calendar
         st.markdown("### Date Range")
         date_range = st.date_input(
@@ -353,7 +823,9 @@ def main():
                 selected_activity = manual_activity
         
         # Confirm button
+        confirmed = None
         if st.button("✅ Confirm & Update Forecast", type="primary"):
+            timing.interaction('confirm')
             # Validate all inputs before processing
             validation_errors = []
             
@@ -374,58 +846,44 @@ def main():
                 for error in validation_errors:
                     st.error(f"❌ {error}")
             else:
-                # Generate weather data for all dates in range
-                current_date = start_date
-                weather_data = {}
-                
-                while current_date <= end_date:
-                    weather_data[current_date.strftime("%Y-%m-%d")] = WeatherDataGenerator.generate_weather_data(
-                        st.session_state.selected_coords[0],
-                        st.session_state.selected_coords[1],
-                        datetime.combine(current_date, start_time),
-                        start_time.strftime("%H:%M"),
-                        end_time.strftime("%H:%M")
-                    )
-                    current_date += timedelta(days=1)
+                # Only days missing from the forecast store are generated; moving
+                # the end date by one computes one day
+                dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+                with timing.span('main.forecast'):
+                    window = (start_time.strftime("%H:%M"), end_time.strftime("%H:%M"))
+                    try:
+                        confirmed = get_forecast(*st.session_state.selected_coords, dates, *window)
+                    except ProviderError as e:
+                        st.error(f"Error fetching forecast: {e}")
                 
-                st.session_state.weather_data = weather_data
-                st.session_state.selected_date = start_date.strftime("%Y-%m-%d")
-                st.success("Weather forecast updated!")
+                if confirmed is not None:
+                    st.session_state.forecast = {
+                        'coords': st.session_state.selected_coords,
+                        'dates': sorted(confirmed[0]),
+                        'window': window
+                    }
+                    st.session_state.forecast_location = st.session_state.selected_location
+                    st.session_state.selected_date = start_date.strftime("%Y-%m-%d")
+                    st.success("Weather forecast updated!")
     
     with col2:
         st.markdown("### AI Overview")
         
-        # AI Overview section - Mock data for now
-        # Connect to AI agent.
-        ai_recommendations = {
-            "summary": "Based on your selected location and time, here are some recommendations:",
-            "recommendations": [
-                "Temperature looks comfortable for outdoor activities",
-                "Light precipitation expected - consider bringing an umbrella",
-                "Moderate winds - good for sailing but watch for cycling",
-                "UV levels are moderate - sunscreen recommended"
-            ]
-        }
+        # Views into the shared forecast store, rebuilt every rerun unless
+        # Confirm just built them
+        with timing.span('main.load_forecast'):
+            weather_data, hourly_data = confirmed or load_session_forecast()
         
-        if selected_activity != "Select Activity":
-            ai_recommendations["recommendations"].append(f"Perfect conditions for {selected_activity.lower()}!")
-        
-        st.markdown(f"""
-        <div class="pixel-card pixel-accent">
-            <h3>🤖 AI Weather Summary</h3>
-            <p class="pixel-muted">{ai_recommendations['summary']}</p>
-            <ul style="margin: 12px 0; padding-left: 20px;">
-                {''.join([f'<li style="margin: 8px 0;">{rec}</li>' for rec in ai_recommendations['recommendations']])}
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        # Generated in the background; the card streams in without blocking the page
+        render_ai_overview(selected_activity if selected_activity != "Select Activity" else None,
+                           weather_data, hourly_data)
         
         # Date selector buttons
-        if st.session_state.weather_data:
+        if weather_data:
             st.markdown("### Select Date")
             
-            date_cols = st.columns(len(st.session_state.weather_data))
-            dates = sorted(st.session_state.weather_data.keys())
+            date_cols = st.columns(len(weather_data))
+            dates = sorted(weather_data.keys())
             
             for i, date_str in enumerate(dates):
                 with date_cols[i]:
@@ -433,62 +891,44 @@ def main():
                     day_name = date_obj.strftime("%a")
                     day_num = date_obj.day
                     
-                    if st.button(f"{day_name}\n{day_num}", key=f"date_{date_str}"):
-                        st.session_state.selected_date = date_str
-                        st.rerun()
+                    st.button(f"{day_name}\n{day_num}", key=f"date_{date_str}",
+                              on_click=select_date, args=(date_str,))
             
             # Map view with integrated weather metrics
             st.markdown("### Interactive Weather Map")
             
+            overlay_options = {
+                "No overlay": None,
+                "Temperature": "temperature",
+                "Precipitation": "precipitation",
+                "Cloud Cover": "cloud_cover"
+            }
+            # Overlay tiles come from a local server unless PIXELCAST_TILE_URL is set
+            if tiles_reachable_from(st.context.url):
+                overlay_label = st.selectbox("Map overlay", options=list(overlay_options), index=0)
+            else:
+                overlay_label = "No overlay"
+                st.caption("Map overlays are only available when the app is opened on its own "
+                           "machine, or when PIXELCAST_TILE_URL is set.")
+            overlay_metric = overlay_options[overlay_label]
+            
             if st.session_state.selected_coords:
-                # Create map with larger size to accommodate weather metrics
-                m = folium.Map(
-                    location=st.session_state.selected_coords,
-                    zoom_start=12,
-                    tiles='OpenStreetMap'
-                )
-                
-                # Add weather marker
-                if st.session_state.selected_date and st.session_state.selected_date in st.session_state.weather_data:
-                    weather = st.session_state.weather_data[st.session_state.selected_date]
-                    
-                    # Create popup with weather info
-                    popup_html = f"""
-                    <div style="width: 200px;">
-                        <h4>Weather Forecast</h4>
-                        <p><strong>Date:</strong> {datetime.strptime(st.session_state.selected_date, '%Y-%m-%d').strftime('%B %d, %Y')}</p>
-                        <p>🌡️ {weather['temperature']}°C</p>
-                        <p>☔ {weather['precipitation']}mm</p>
-                        <p>💧 {weather['humidity']}%</p>
-                        <p>🌬️ {weather['wind_speed']} km/h</p>
-                        <p>☀️ UV {weather['uv_index']}</p>
-                        <p>☁️ {weather['cloud_cover']}%</p>
-                    </div>
-                    """
-                    
-                    folium.Marker(
-                        st.session_state.selected_coords,
-                        popup=folium.Popup(popup_html, max_width=250),
-                        icon=folium.Icon(color='blue', icon='cloud')
-                    ).add_to(m)
+                with timing.span('main.map_build'):
+                    m = build_weather_map(weather_data, overlay_metric, overlay_label)
                 
-                # Handle map clicks for location selection (double-click simulation)
-                map_data = st_folium(m, width=700, height=500, returned_objects=["last_object_clicked"])
+                # Map clicks select a location in a callback, so a click costs one rerun
+                from streamlit_folium import st_folium
+                with timing.span('main.st_folium'):
+                    st_folium(m, key=MAP_KEY, width=700, height=500,
+                              returned_objects=["last_object_clicked"], on_change=handle_map_click)
                 
-                # Check for map clicks and handle location selection
-                if map_data["last_object_clicked"]:
-                    clicked_lat = map_data["last_object_clicked"]["lat"]
-                    clicked_lon = map_data["last_object_clicked"]["lng"]
-                    
-                    # Automatically select location on click (double-click simulation)
-                    st.session_state.selected_coords = (clicked_lat, clicked_lon)
-                    st.session_state.selected_location = f"Selected Location ({clicked_lat:.4f}, {clicked_lon:.4f})"
+                if (st.session_state.map_clicked == st.session_state.selected_coords
+                        and st.session_state.forecast['coords'] != st.session_state.selected_coords):
                     st.success("Location updated! Click Confirm to update weather forecast.")
-                    st.rerun()
                 
                 # Weather metrics display - integrated within map view area
-                if st.session_state.selected_date and st.session_state.selected_date in st.session_state.weather_data:
-                    weather = st.session_state.weather_data[st.session_state.selected_date]
+                if st.session_state.selected_date and st.session_state.selected_date in weather_data:
+                    weather = weather_data[st.session_state.selected_date]
                     
                     st.markdown("#### Weather Metrics")
                     
@@ -504,12 +944,73 @@ def main():
                         ("Cloud Cover", weather['cloud_cover'], "%", "☁️")
                     ]
                     
-                    for i, (name, value, unit, emoji) in enumerate(metrics):
-                        with metric_cols[i % 3]:
-                            st.markdown(create_weather_metric_display(name, value, unit, emoji), unsafe_allow_html=True)
+                    with timing.span('main.metrics'):
+                        for i, (name, value, unit, emoji) in enumerate(metrics):
+                            with metric_cols[i % 3]:
+                                st.markdown(create_weather_metric_display(name, value, unit, emoji), unsafe_allow_html=True)
+                    
+                    # Hourly outlook for the selected time window
+                    if hourly_data and st.session_state.selected_date in hourly_data['series']:
+                        st.markdown("#### Hourly Outlook")
+                        best_windows = []
+                        if selected_activity != "Select Activity":
+                            with timing.span('main.best_windows'):
+                                steps = len(hourly_data['times'])
+                                length = st.slider(
+                                    "Window length (hours)",
+                                    min_value=1,
+                                    max_value=max(steps, 2),
+                                    value=min(DEFAULT_ACTIVITY_WINDOW, steps),
+                                    key="activity_window"
+                                )
+                                best_windows = get_best_windows(selected_activity, min(length, steps), hourly_data)
+                        
+                        highlight_times = tuple(
+                            time for window in best_windows for date_str, time in window['slots']
+                            if date_str == st.session_state.selected_date
+                        )
+                        with timing.span('main.hourly_chart'):
+                            chart_data = get_hourly_chart_data(st.session_state.selected_date, hourly_data)
+                            # Prebuilt vega-lite spec; st.line_chart rebuilds an Altair chart every rerun
+                            st.vega_lite_chart(chart_data, get_hourly_chart_spec(highlight_times), width="stretch")
+                        
+                        if selected_activity != "Select Activity":
+                            st.markdown(f"#### Best Times for {selected_activity}")
+                            if not best_windows:
+                                st.info("The selected time window is shorter than the requested length.")
+                            for rank, window in enumerate(best_windows, start=1):
+                                col_window, col_view = st.columns([4, 1])
+                                with col_window:
+                                    st.markdown(
+                                        f"**{rank}. {format_window(window)}** · "
+                                        f"{window['score']:.0%} comfort"
+                                    )
+                                with col_view:
+                                    st.button("View", key=f"best_window_{rank}",
+                                              on_click=select_date, args=(window['date'],))
+                        
+                        st.markdown("#### Export Forecast")
+                        lat, lon = hourly_data['coords']
+                        window = TimeWindow(hourly_data['times'][0], hourly_data['end_time'])
+                        render_export_controls(
+                            'forecast_export', 'pixelcast_forecast', [lat], [lon],
+                            sorted(weather_data), window, source=stored_forecast_source(window)
+                        )
         
         else:
             st.info("👈 Please search for a location and click Confirm to see the weather forecast.")
+    
+    # Multi-venue comparison
+    render_venue_comparison()
+    
+    # Debug timing panel (opt-in via PIXELCAST_DEBUG_TIMING)
+    rerun = timing.end_rerun(get_session_id())
+    if rerun is not None:
+        render_debug_panel(rerun)
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # Close out reruns cut short by st.rerun() or an exception
+        timing.end_rerun(get_session_id())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""PixelCast benchmark suite.
+
+Covers the forecast generator, geocoding against a local stub backend, cold
+start of the first page, and full-page script runs under Streamlit's AppTest
+harness. See ``startup.py`` for the import-time budget behind cold start and
+``loadtest.py`` for latency under concurrent sessions.
+
+    python benchmarks/bench.py --save-baseline     # record a baseline
+    python benchmarks/bench.py                     # compare against it
+    python benchmarks/bench.py --filter generator  # run a subset
+
+The run fails (exit code 1) when any benchmark is slower than its baseline by
+more than ``--threshold`` (default 25%). Baselines are machine specific, so
+record and compare on the same host.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from startup import profile_first_page  # noqa: E402
+from stub_geocoder import start_stub_geocoder  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Point the app's shared geocoder at a local stub before anything imports it
+_stub_server, STUB_URL = start_stub_geocoder()
+os.environ['PIXELCAST_GEOCODER_URL'] = STUB_URL
+os.environ['PIXELCAST_GEOCODER_RATE'] = '1000000'
+os.environ['PIXELCAST_GEOCODE_CACHE'] = os.path.join(tempfile.mkdtemp(), 'geocode_cache.sqlite3')
+logging.disable(logging.WARNING)
+
+# name -> (factory returning the timed callable, calls per round)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, number: int = 1):
+    def register(factory: Callable[[], Callable[[], None]]):
+        BENCHMARKS[name] = (factory, number)
+        return factory
+    return register
+
+
+def _generator():
+    from pixelcast import WeatherDataGenerator
+    return WeatherDataGenerator
+
+
+def _date_range(days: int) -> List[date]:
+    start = date(2026, 1, 1)
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+# Forecast generator
+
+@benchmark('generator/per_point/1d', number=200)
+def bench_per_point_1d():
+    generator = _generator()
+    day = datetime(2026, 1, 1, 9)
+    return lambda: generator.generate_weather_data(40.7, -74.0, day, '09:00', '17:00')
+
+
+def _per_point_range(days: int):
+    generator = _generator()
+    dates = [datetime.combine(d, datetime.min.time()) for d in _date_range(days)]
+
+    def run():
+        for day in dates:
+            generator.generate_weather_data(40.7, -74.0, day, '09:00', '17:00')
+    return run
+
+
+benchmark('generator/per_point/7d', number=20)(lambda: _per_point_range(7))
+benchmark('generator/per_point/365d', number=2)(lambda: _per_point_range(365))
+
+
+def _batch_range(locations: int, days: int):
+    import numpy as np
+    generator = _generator()
+    lats = np.linspace(-60, 60, locations)[:, None]
+    lons = np.linspace(-180, 180, locations)[:, None]
+    dates = np.array(_date_range(days), dtype='datetime64[D]')[None, :]
+    return lambda: generator.generate_batch(lats, lons, dates)
+
+
+benchmark('generator/batch/1x1d', number=200)(lambda: _batch_range(1, 1))
+benchmark('generator/batch/1x7d', number=200)(lambda: _batch_range(1, 7))
+benchmark('generator/batch/1x365d', number=50)(lambda: _batch_range(1, 365))
+benchmark('generator/batch/1000x7d', number=10)(lambda: _batch_range(1000, 7))
+
+
+@benchmark('generator/hourly/1x7d', number=50)
+def bench_hourly_7d():
+    generator = _generator()
+    dates = _date_range(7)
+    return lambda: generator.generate_hourly_series(40.7, -74.0, dates, '00:00', '23:00')
+
+
+@benchmark('climatology/sample/100000x1d', number=5)
+def bench_climatology_sample():
+    import numpy as np
+    from pixelcast.climatology import get_climatology
+    climatology = get_climatology()
+    points = np.random.default_rng(0).uniform((-90, -180), (90, 180), size=(100_000, 2))
+    return lambda: climatology.sample(points[:, 0], points[:, 1], np.datetime64('2026-01-01'))
+
+
+@benchmark('climatology/sample/1x7d', number=500)
+def bench_climatology_sample_location():
+    import numpy as np
+    from pixelcast.climatology import get_climatology
+    climatology = get_climatology()
+    dates = np.array(_date_range(7), dtype='datetime64[D]')
+    return lambda: climatology.sample(40.7, -74.0, dates)
+
+
+# Geocoding against the stub backend
+
+def _stub_client(cache=None):
+    from pixelcast.geocoding_client import GeocodingClient, TokenBucket
+    return GeocodingClient(STUB_URL, rate_limiter=TokenBucket(rate=1e6, capacity=1e6), cache=cache)
+
+
+class _UniqueQueries:
+    """Fresh query strings so every call misses the caches"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.count = 0
+
+    def next(self) -> str:
+        self.count += 1
+        return f"{self.prefix} {self.count}"
+
+    def batch(self, size: int) -> List[str]:
+        return [self.next() for _ in range(size)]
+
+
+@benchmark('geocode/single/miss', number=20)
+def bench_geocode_miss():
+    client = _stub_client()
+    queries = _UniqueQueries('miss')
+    return lambda: client.geocode(queries.next())
+
+
+@benchmark('geocode/single/cached', number=2000)
+def bench_geocode_cached():
+    from pixelcast.geocoding_cache import GeocodeCache
+    client = _stub_client(cache=GeocodeCache(path=None))
+    client.geocode('Paris')
+    return lambda: client.geocode('Paris')
+
+
+@benchmark('geocode/batch/50', number=2)
+def bench_geocode_batch():
+    client = _stub_client()
+    queries = _UniqueQueries('batch')
+    return lambda: client.geocode_many(queries.batch(50), max_concurrency=8)
+
+
+@benchmark('geocode/service/geocode_location', number=20)
+def bench_geocode_service():
+    from pixelcast import GeocodingService
+    queries = _UniqueQueries('service')
+    return lambda: GeocodingService.geocode_location(queries.next())
+
+
+# Cold start: a fresh interpreter rendering the first page
+
+@benchmark('startup/first_page', number=1)
+def bench_startup():
+    return profile_first_page
+
+
+# Full-page script runs
+
+def _app_test():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=60)
+
+
+def _confirmed_app(days: int):
+    at = _app_test()
+    at.session_state['selected_coords'] = (40.7, -74.0)
+    at.session_state['selected_location'] = 'New York'
+    at.run()
+    start = datetime.now().date()
+    at.date_input[0].set_value((start, start + timedelta(days=days - 1)))
+    return at
+
+
+def _confirm_button(at):
+    return next(b for b in at.button if 'Confirm' in b.label)
+
+
+@benchmark('page/initial_load', number=3)
+def bench_page_initial():
+    return lambda: _app_test().run()
+
+
+def _page_confirm(days: int):
+    at = _confirmed_app(days)
+
+    def run():
+        _confirm_button(at).click().run()
+        assert not at.exception, at.exception
+    return run
+
+
+benchmark('page/confirm/1d', number=5)(lambda: _page_confirm(1))
+benchmark('page/confirm/7d', number=5)(lambda: _page_confirm(7))
+
+
+@benchmark('page/date_click/7d', number=5)
+def bench_page_date_click():
+    at = _confirmed_app(7)
+    _confirm_button(at).click().run()
+    clicks = {'count': 0}
+
+    def run():
+        buttons = [b for b in at.button if b.key and b.key.startswith('date_')]
+        clicks['count'] += 1
+        buttons[clicks['count'] % len(buttons)].click().run()
+        assert not at.exception, at.exception
+    return run
+
+
+@benchmark('page/search', number=5)
+def bench_page_search():
+    at = _app_test().run()
+    queries = _UniqueQueries('search')
+
+    def run():
+        at.text_input[0].input(queries.next())
+        next(b for b in at.button if b.label == '🔍').click().run()
+        assert not at.exception, at.exception
+    return run
+
+
+def run_benchmark(name: str, rounds: int) -> Dict[str, float]:
+    factory, number = BENCHMARKS[name]
+    func = factory()
+    func()  # warm-up: imports and other first-call costs
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {'min': min(timings), 'median': statistics.median(timings), 'rounds': rounds, 'number': number}
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.3f} s "
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PixelCast benchmark suite")
+    parser.add_argument('--filter', action='append', default=[],
+                        help="Only run benchmarks whose name contains this text (repeatable)")
+    parser.add_argument('--rounds', type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Write results to the baseline file instead of comparing")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown versus baseline before failing (0.25 = 25%%)")
+    parser.add_argument('--output', help="Also write this run's results to a JSON file")
+    parser.add_argument('--list', action='store_true', help="List benchmark names and exit")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS
+             if not args.filter or any(f in name for f in args.filter)]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    regressions = []
+    for name in names:
+        result = run_benchmark(name, args.rounds)
+        results[name] = result
+        line = f"{name:<40} {_format_seconds(result['min'])}  (median {_format_seconds(result['median']).strip()})"
+        if name in baseline:
+            ratio = result['min'] / baseline[name]['min']
+            line += f"  {ratio - 1:+7.1%}"
+            if ratio > 1 + args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line, flush=True)
+
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # Keep entries for benchmarks that were filtered out of this run
+            with open(args.baseline) as f:
+                report['results'] = dict(json.load(f)['results'], **results)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}:")
+        for name in regressions:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
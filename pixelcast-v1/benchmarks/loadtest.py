@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Concurrent-session load test for the PixelCast app.
+
+Drives N simulated users against ``app.py`` at once, each an AppTest session
+in its own thread sharing this process's caches, as sessions share a
+Streamlit server. Every user loads the page, then repeats a realistic flow:
+search, date range change, Confirm, a few date-button clicks and a map
+click. Geocoding goes to the local stub backend.
+
+    python benchmarks/loadtest.py --sessions 8                  # one level
+    python benchmarks/loadtest.py --sessions 1,4,16 -o load.json
+    python benchmarks/loadtest.py --sessions 1,4,16 --compare load.json
+
+Reports throughput and p50/p95/p99 rerun latency per action. Flows are
+seeded, so runs with the same arguments do the same work and can be compared
+across commits; ``--compare`` fails (exit code 1) when any p95 is slower than
+in the earlier results by more than ``--threshold``. Like benchmark
+baselines, results are machine specific.
+
+``--reruns`` turns on the app's timing instrumentation and also reports how
+many script reruns each kind of interaction cost; every interaction should
+cost exactly one.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_geocoder import start_stub_geocoder  # noqa: E402
+
+ACTIONS = ('load', 'search', 'date_change', 'confirm', 'date_click', 'map_click')
+# Most searches are for places other users look up too
+POPULAR_PLACES = ('Paris', 'London', 'New York', 'Tokyo', 'Sydney', 'Berlin', 'Toronto', 'Madrid')
+POPULAR_SHARE = 0.7
+DATE_CLICKS = 3
+
+
+def _start_geocoder(latency: float) -> None:
+    """Point the app's shared geocoder at a local stub before anything imports it"""
+    global _stub_server
+    _stub_server, url = start_stub_geocoder(latency)
+    os.environ['PIXELCAST_GEOCODER_URL'] = url
+    os.environ['PIXELCAST_GEOCODER_RATE'] = '1000000'
+    os.environ['PIXELCAST_GEOCODE_CACHE'] = os.path.join(tempfile.mkdtemp(), 'geocode_cache.sqlite3')
+
+
+def _share_apptest_runtime() -> None:
+    """Run all AppTest sessions on one runtime and one compiled script, as a server does.
+
+    AppTest is built for one session at a time: each run compiles the script
+    afresh and installs a mock runtime globally, clearing it afterwards, which
+    breaks any session running concurrently (and compiling concurrently trips
+    a race in CPython 3.11's ast module).
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    components = BidiComponentManager()
+    components.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = components
+    Runtime._instance = runtime
+    # AppTest's per-run install and reset now land on a private subclass
+    app_test.Runtime = type('SessionRuntime', (Runtime,), {'_instance': None})
+    # Likewise its per-run config patch: set for good, restoring is a no-op
+    config.set_option('global.appTest', True)
+
+
+class LatencyRecorder:
+    """Thread-safe per-action latencies and failures"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, action: str, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.latencies[action].append(seconds)
+            if failed:
+                self.errors[action] += 1
+
+
+class SimulatedSession:
+    """One user clicking through the app with a seeded flow"""
+
+    def __init__(self, index: int, seed: int, recorder: LatencyRecorder, think_time: float):
+        self.index = index
+        self.rng = random.Random(seed * 100_003 + index)
+        self.recorder = recorder
+        self.think_time = think_time
+        self.at = None
+        self.searches = 0
+
+    def _timed(self, action: str, step: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        failed = False
+        try:
+            step()
+            failed = bool(self.at.exception)
+        except Exception:
+            failed = True
+        self.recorder.record(action, time.perf_counter() - start, failed)
+        if self.think_time:
+            time.sleep(self.think_time * self.rng.uniform(0.5, 1.5))
+
+    def _button(self, predicate: Callable) -> Optional[object]:
+        return next((b for b in self.at.button if predicate(b)), None)
+
+    def load(self) -> None:
+        from streamlit.testing.v1 import AppTest
+
+        def step():
+            self.at = AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=120)
+            self.at.run()
+        self._timed('load', step)
+
+    def search(self) -> None:
+        self.searches += 1
+        if self.rng.random() < POPULAR_SHARE:
+            query = self.rng.choice(POPULAR_PLACES)
+        else:
+            query = f"Venue {self.index}-{self.searches}"
+
+        def step():
+            self.at.text_input[0].input(query)
+            self._button(lambda b: b.label == '🔍').click().run()
+        self._timed('search', step)
+
+    def change_dates(self) -> None:
+        start = date.today() + timedelta(days=self.rng.randrange(0, 4))
+        end = start + timedelta(days=self.rng.randrange(0, 7))
+        self._timed('date_change', lambda: self.at.date_input[0].set_value((start, end)).run())
+
+    def confirm(self) -> None:
+        self._timed('confirm', lambda: self._button(lambda b: 'Confirm' in b.label).click().run())
+
+    def click_dates(self) -> None:
+        for _ in range(DATE_CLICKS):
+            buttons = [b for b in self.at.button if b.key and b.key.startswith('date_')]
+            if not buttons:
+                return
+            button = self.rng.choice(buttons)
+            self._timed('date_click', lambda: button.click().run())
+
+    def click_map(self) -> None:
+        """Send the map component a marker click, as the browser would"""
+        components = self.at.get('component_instance')
+        coords = self.at.session_state['selected_coords']
+        if not components or not coords:
+            return
+        clicked = {'lat': coords[0] + self.rng.uniform(-0.05, 0.05),
+                   'lng': coords[1] + self.rng.uniform(-0.05, 0.05)}
+
+        def step():
+            # AppTest cannot interact with custom components, so add the
+            # component's widget state to the next run by hand
+            tree = self.at._tree
+            states = tree.get_widget_states()
+            state = states.widgets.add()
+            state.id = components[0].proto.id
+            state.json_value = json.dumps({'last_object_clicked': clicked})
+            tree._runner._run(states, timeout=120)
+        self._timed('map_click', step)
+
+    def run(self, iterations: int, start: threading.Barrier) -> None:
+        start.wait()
+        self.load()
+        for _ in range(iterations):
+            self.search()
+            self.change_dates()
+            self.confirm()
+            self.click_dates()
+            self.click_map()
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Count, mean, p50/p95/p99 and max of latencies in seconds"""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {'count': len(latencies), 'mean': statistics.fmean(latencies),
+            'p50': p50, 'p95': p95, 'p99': p99, 'max': max(latencies)}
+
+
+def _interaction_totals() -> Dict[str, Dict[str, float]]:
+    if not os.environ.get('PIXELCAST_DEBUG_TIMING'):
+        return {}
+    from pixelcast import instrumentation
+    return instrumentation.interaction_summary()
+
+
+def run_level(sessions: int, iterations: int, think_time: float, seed: int) -> Dict:
+    """Run ``sessions`` users concurrently; returns throughput and per-action stats"""
+    before = _interaction_totals()
+    recorder = LatencyRecorder()
+    barrier = threading.Barrier(sessions + 1)
+    users = [SimulatedSession(i, seed, recorder, think_time) for i in range(sessions)]
+    threads = [threading.Thread(target=user.run, args=(iterations, barrier), daemon=True)
+               for user in users]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    actions = {action: dict(summarize(recorder.latencies[action]), errors=recorder.errors[action])
+               for action in ACTIONS if recorder.latencies[action]}
+    total = sum(stats['count'] for stats in actions.values())
+    result = {'sessions': sessions, 'wall': wall, 'actions_per_second': total / wall, 'actions': actions}
+
+    after = _interaction_totals()
+    if after:
+        # Process-wide counters, so report this level's share of them
+        empty = {'count': 0, 'reruns': 0}
+        result['reruns'] = {
+            name: {'interactions': stats['count'] - before.get(name, empty)['count'],
+                   'reruns': stats['reruns'] - before.get(name, empty)['reruns'],
+                   'max_reruns': stats['max_reruns']}
+            for name, stats in sorted(after.items())
+        }
+    return result
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:9.1f}"
+
+
+def print_level(result: Dict, previous: Optional[Dict]) -> List[str]:
+    """Print one level's table; returns actions whose p95 regressed"""
+    print(f"\n{result['sessions']} session(s): {result['actions_per_second']:.1f} actions/s "
+          f"over {result['wall']:.1f} s")
+    print(f"  {'action':<12} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    regressed = []
+    for action, stats in result['actions'].items():
+        line = (f"  {action:<12} {stats['count']:>6} {stats['errors']:>6} {_ms(stats['p50'])} "
+                f"{_ms(stats['p95'])} {_ms(stats['p99'])} {_ms(stats['max'])}")
+        before = previous and previous['actions'].get(action)
+        if before:
+            ratio = stats['p95'] / before['p95']
+            line += f"  p95 {ratio - 1:+7.1%}"
+            if ratio > 1 + ARGS.threshold:
+                regressed.append(action)
+                line += "  REGRESSION"
+        print(line, flush=True)
+
+    if 'reruns' in result:
+        print(f"  {'interaction':<12} {'count':>6} {'reruns':>6} {'per':>6} {'max':>4}")
+        for name, stats in result['reruns'].items():
+            if stats['interactions']:
+                print(f"  {name:<12} {stats['interactions']:>6} {stats['reruns']:>6} "
+                      f"{stats['reruns'] / stats['interactions']:>6.2f} {stats['max_reruns']:>4}")
+    return regressed
+
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description="PixelCast concurrent-session load test")
+    parser.add_argument('--sessions', default='4',
+                        help="Concurrent sessions, or a comma-separated list of levels (default: 4)")
+    parser.add_argument('--iterations', type=int, default=3,
+                        help="Flows per session after the initial page load (default: 3)")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="Mean seconds a user pauses between actions (default: 0, back to back)")
+    parser.add_argument('--geocoder-latency', type=float, default=0.0,
+                        help="Seconds the stub geocoder takes per request")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the simulated flows")
+    parser.add_argument('--reruns', action='store_true',
+                        help="Enable timing instrumentation and report script reruns per interaction")
+    parser.add_argument('-o', '--output', help="Write results to a JSON file")
+    parser.add_argument('--compare', help="Earlier results JSON to compare p95 latencies against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed p95 slowdown versus --compare before failing (0.25 = 25%%)")
+    ARGS = args = parser.parse_args()
+    levels = [int(level) for level in args.sessions.split(',')]
+
+    if args.reruns:
+        # Read when the app first imports pixelcast, so it must be set before then
+        os.environ['PIXELCAST_DEBUG_TIMING'] = '1'
+    _start_geocoder(args.geocoder_latency)
+    _share_apptest_runtime()
+    logging.disable(logging.WARNING)
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['levels']
+
+    # Unrecorded pass so lazy imports and first-use setup don't land in level one
+    run_level(1, 1, 0.0, args.seed - 1)
+
+    results = {}
+    regressions = []
+    for sessions in levels:
+        result = run_level(sessions, args.iterations, args.think_time, args.seed)
+        results[str(sessions)] = result
+        regressions += [f"{sessions} session(s): {action}"
+                        for action in print_level(result, previous.get(str(sessions)))]
+
+    if args.output:
+        report = {
+            'meta': {
+                'revision': _git_revision(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'cpus': os.cpu_count(),
+                'args': {key: value for key, value in vars(args).items()
+                         if key not in ('output', 'compare', 'threshold')},
+            },
+            'levels': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote results to {args.output}")
+
+    if regressions:
+        print(f"\n{len(regressions)} action(s) regressed by more than {args.threshold:.0%} at p95:")
+        for name in regressions:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
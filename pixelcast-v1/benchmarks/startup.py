@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Cold-start import budget for the PixelCast app.
+
+Runs the app's first page in a fresh interpreter under ``python -X importtime``
+(Streamlit bare mode, no server) and reports where import time goes:
+
+    python benchmarks/startup.py                  # report and check the budget
+    python benchmarks/startup.py --budget-ms 800  # tighter budget
+
+The check fails (exit code 1) when total import time exceeds the budget or when
+any module in ``LAZY_MODULES`` is imported before a forecast exists. Like the
+benchmark baselines, absolute budgets are machine specific.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules the first page must not import; they load on first use
+LAZY_MODULES = ('folium', 'streamlit_folium', 'pandas', 'pyarrow', 'requests')
+DEFAULT_BUDGET_MS = 1000.0
+
+_FIRST_PAGE = "import runpy; runpy.run_path('app.py', run_name='__main__')"
+
+
+def profile_first_page() -> Tuple[float, List[Tuple[str, int, float]]]:
+    """Wall time of a cold first-page run and its (module, depth, cumulative ms) imports"""
+    env = dict(os.environ, STREAMLIT_BROWSER_GATHER_USAGE_STATS='false')
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _FIRST_PAGE],
+                          cwd=APP_DIR, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(f"first page run failed:\n{proc.stderr[-2000:]}")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(cumulative) / 1000))
+    return wall, imports
+
+
+def summarize(imports: List[Tuple[str, int, float]]) -> Dict[str, float]:
+    """Cumulative import milliseconds per top-level import"""
+    totals: Dict[str, float] = {}
+    for name, depth, cumulative in imports:
+        if depth == 0:
+            totals[name] = totals.get(name, 0.0) + cumulative
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PixelCast cold-start import budget")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum total import time for the first page")
+    parser.add_argument('--top', type=int, default=10, help="Top-level imports to list")
+    args = parser.parse_args()
+
+    wall, imports = profile_first_page()
+    totals = summarize(imports)
+    total_ms = sum(totals.values())
+
+    print(f"first page wall time  {wall * 1000:8.1f} ms")
+    print(f"total import time     {total_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(totals.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+    failures = []
+    loaded = {name.split('.')[0] for name, _, _ in imports}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.0f} ms exceeds budget of {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Local stand-in for the Nominatim search endpoint used by benchmarks.
+
+Every query resolves to a deterministic coordinate derived from its text, except
+queries containing "nowhere", which return an empty result list.
+"""
+
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def stub_coordinates(query: str) -> Tuple[float, float]:
+    """Deterministic coordinates for a query string"""
+    digest = zlib.crc32(query.encode('utf-8'))
+    return (digest % 12000) / 100 - 60, (digest // 12000 % 36000) / 100 - 180
+
+
+def start_stub_geocoder(latency: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a stub geocoder on a free local port and return (server, base URL)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+            if latency:
+                time.sleep(latency)
+            if 'nowhere' in query.lower():
+                results = []
+            else:
+                lat, lon = stub_coordinates(query)
+                results = [{'lat': str(lat), 'lon': str(lon), 'display_name': query.title()}]
+            body = json.dumps(results).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
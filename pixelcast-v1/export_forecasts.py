@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""Export PixelCast forecasts to CSV, Parquet or Arrow IPC.
+
+    python export_forecasts.py --point 40.7 -74.0 --days 7 -o forecast.csv
+    python export_forecasts.py --locations venues.csv --days 365 --hourly -o year.parquet
+"""
+
+from pixelcast.export import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"""PixelCast core: forecast generation and geocoding without any UI.
+
+The Streamlit app (``app.py``) and the headless HTTP service
+(``python -m pixelcast.service``) are both thin layers over this package.
+"""
+
+from .geocoding import GeocodingService
+from .geocoding_client import GeocodingError
+from .providers import ForecastProvider, ProviderError, TimeWindow
+from .weather import WeatherDataGenerator
+
+__all__ = ['ForecastProvider', 'GeocodingError', 'GeocodingService', 'ProviderError',
+           'TimeWindow', 'WeatherDataGenerator']
@@ -0,0 +1,161 @@
+"""Activity comfort scoring and best-time-window search.
+
+Each activity has a comfort range and weight per metric. Every hourly slot
+gets a score in [0, 1]: a metric inside its range scores 1 and falls
+linearly to 0 at ``tolerance`` outside it, and the slot score is the
+weighted mean over metrics. ``top_windows`` then finds the best contiguous
+runs of slots with cumulative-sum sliding windows, vectorized across any
+number of locations.
+"""
+
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+from . import instrumentation as timing
+from .weather import WeatherDataGenerator, _parse_hhmm
+
+
+class ComfortRange(NamedTuple):
+    low: float
+    high: float
+    tolerance: float
+    weight: float = 1.0
+
+
+class ActivityProfile(NamedTuple):
+    name: str
+    # metric -> comfort range; precipitation is in mm per hour
+    ranges: Dict[str, ComfortRange]
+
+
+ACTIVITY_PROFILES: Dict[str, ActivityProfile] = {
+    'Hiking': ActivityProfile('Hiking', {
+        'temperature': ComfortRange(10, 24, 10, 3.0),
+        'precipitation': ComfortRange(0, 0.2, 1.0, 3.0),
+        'humidity': ComfortRange(30, 70, 25, 1.0),
+        'wind_speed': ComfortRange(0, 20, 15, 1.5),
+        'uv_index': ComfortRange(0, 6, 4, 1.0),
+        'cloud_cover': ComfortRange(10, 70, 30, 0.5),
+    }),
+    'Running': ActivityProfile('Running', {
+        'temperature': ComfortRange(6, 18, 10, 3.0),
+        'precipitation': ComfortRange(0, 0.1, 0.8, 2.0),
+        'humidity': ComfortRange(30, 65, 25, 2.0),
+        'wind_speed': ComfortRange(0, 15, 12, 1.0),
+        'uv_index': ComfortRange(0, 4, 4, 1.5),
+        'cloud_cover': ComfortRange(20, 100, 30, 0.5),
+    }),
+    'Wedding': ActivityProfile('Wedding', {
+        'temperature': ComfortRange(18, 27, 8, 2.0),
+        'precipitation': ComfortRange(0, 0, 0.3, 4.0),
+        'humidity': ComfortRange(35, 65, 25, 1.0),
+        'wind_speed': ComfortRange(0, 12, 10, 2.0),
+        'uv_index': ComfortRange(0, 7, 4, 0.5),
+        'cloud_cover': ComfortRange(0, 50, 30, 1.0),
+    }),
+    'Photography': ActivityProfile('Photography', {
+        'temperature': ComfortRange(0, 30, 10, 0.5),
+        'precipitation': ComfortRange(0, 0, 0.5, 3.0),
+        'humidity': ComfortRange(0, 85, 15, 0.5),
+        'wind_speed': ComfortRange(0, 20, 15, 1.0),
+        'cloud_cover': ComfortRange(20, 60, 30, 3.0),
+    }),
+}
+
+# Used for custom activities without a profile of their own
+GENERAL_RANGES: Dict[str, ComfortRange] = {
+    'temperature': ComfortRange(12, 26, 10, 2.0),
+    'precipitation': ComfortRange(0, 0.2, 1.0, 2.0),
+    'humidity': ComfortRange(30, 70, 25, 1.0),
+    'wind_speed': ComfortRange(0, 20, 15, 1.0),
+    'uv_index': ComfortRange(0, 7, 4, 0.5),
+    'cloud_cover': ComfortRange(0, 80, 30, 0.5),
+}
+
+
+def get_activity_profile(activity: str) -> ActivityProfile:
+    """Profile for a named activity, falling back to general outdoor comfort"""
+    profile = ACTIVITY_PROFILES.get(activity)
+    if profile is None:
+        profile = ActivityProfile(activity, GENERAL_RANGES)
+    return profile
+
+
+@timing.timed('activities.score_slots')
+def score_slots(series: np.ndarray, profile: ActivityProfile, step_minutes: int = 60) -> np.ndarray:
+    """Comfort score in [0, 1] per slot.
+
+    ``series`` is ``(..., steps, metrics)`` as returned by
+    ``WeatherDataGenerator.generate_hourly_series``; the result drops the
+    metrics axis.
+    """
+    series = np.asarray(series, dtype=np.float32)
+    total = np.zeros(series.shape[:-1], dtype=np.float32)
+    weights = 0.0
+    for metric, comfort in profile.ranges.items():
+        values = series[..., WeatherDataGenerator.METRICS.index(metric)]
+        if metric == 'precipitation':
+            values = values * (60.0 / step_minutes)
+        outside = np.maximum(np.maximum(comfort.low - values, values - comfort.high), 0.0)
+        total += comfort.weight * np.clip(1.0 - outside / comfort.tolerance, 0.0, 1.0)
+        weights += comfort.weight
+    return total / weights
+
+
+@timing.timed('activities.top_windows')
+def top_windows(scores: np.ndarray, length: int, k: int = 3,
+                continuous: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """The ``k`` best non-overlapping windows of ``length`` consecutive slots.
+
+    ``scores`` is ``(..., days, steps)``. Windows stay within a day unless
+    ``continuous`` is set (the slots cover whole days back to back). Returns
+    ``(starts, means)`` of shape ``(..., k)``, best first: ``starts`` are
+    flat ``day * steps + step`` slot indices, -1 where fewer than ``k``
+    windows fit, and ``means`` the average slot score of each window.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    *lead, days, steps = scores.shape
+    if length < 1:
+        raise ValueError("length must be at least 1")
+
+    # O(n) sliding sums from one cumulative sum along the time axis
+    if continuous:
+        flat = scores.reshape(*lead, days * steps)
+        cumsum = np.concatenate([np.zeros((*lead, 1)), np.cumsum(flat, axis=-1)], axis=-1)
+        sums = cumsum[..., length:] - cumsum[..., :-length]
+        starts = np.arange(sums.shape[-1])
+    else:
+        cumsum = np.concatenate([np.zeros((*lead, days, 1)), np.cumsum(scores, axis=-1)], axis=-1)
+        sums = cumsum[..., length:] - cumsum[..., :-length]
+        per_day = sums.shape[-1]
+        sums = sums.reshape(*lead, days * per_day)
+        starts = (np.arange(days)[:, None] * steps + np.arange(per_day)[None, :]).ravel()
+
+    best_starts = np.full((*lead, k), -1, dtype=np.int64)
+    best_means = np.full((*lead, k), np.nan)
+    if sums.shape[-1] == 0:
+        return best_starts, best_means
+
+    # Greedy pick, then rule out every window overlapping it; k passes of O(n)
+    candidates = sums.copy()
+    for i in range(k):
+        index = np.argmax(candidates, axis=-1)
+        value = np.take_along_axis(candidates, index[..., None], axis=-1)[..., 0]
+        found = np.isfinite(value)
+        start = starts[index]
+        best_starts[..., i] = np.where(found, start, -1)
+        best_means[..., i] = np.where(found, value / length, np.nan)
+        overlap = np.abs(starts - start[..., None]) < length
+        candidates[overlap & found[..., None]] = -np.inf
+    return best_starts, best_means
+
+
+def window_end(last_slot: str, end_time: str, step_minutes: int = 60) -> str:
+    """``HH:MM`` end of a window whose last slot starts at ``last_slot``.
+
+    The last slot covers ``step_minutes``, but the end is clamped to the
+    selected ``end_time`` so a window never reads as running past it.
+    """
+    end = min(_parse_hhmm(last_slot) + step_minutes, _parse_hhmm(end_time))
+    return f"{end // 60:02d}:{end % 60:02d}"
@@ -0,0 +1,424 @@
+"""Caching basemap tile proxy, so browsers need not fetch tiles from OSM directly.
+
+When the tile server has a public URL (``PIXELCAST_TILE_URL``), the map's
+base layer is served by it from, in order:
+
+* offline tile packs: read-only MBTiles files (``PIXELCAST_BASEMAP_PACK``,
+  several separated by ``os.pathsep``),
+* a disk cache: an MBTiles file with LRU eviction past
+  ``PIXELCAST_BASEMAP_CACHE_MB`` (default 512), shared by every session and
+  worker process on the host,
+* the upstream tile server (``PIXELCAST_BASEMAP_URL``, OpenStreetMap by
+  default), unless ``PIXELCAST_BASEMAP_OFFLINE`` is set.
+
+Otherwise browsers load tiles from the upstream server directly. Upstream
+fetches use one keep-alive session, are rate limited
+(``PIXELCAST_BASEMAP_RATE`` tiles per second), and concurrent requests for
+the same tile share a single fetch. With ``PIXELCAST_BASEMAP_PREFETCH`` set,
+the tiles around a selected location are prefetched in the background.
+Build an offline pack for a region with::
+
+    python -m pixelcast.basemap seed --bbox 40.5 -74.3 40.95 -73.7 --zooms 10-14 nyc.mbtiles
+
+Bulk downloads are against the OpenStreetMap tile usage policy; seed packs
+from a tile provider that allows it (set ``PIXELCAST_BASEMAP_URL``).
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .geocoding_client import USER_AGENT, TokenBucket
+
+UPSTREAM_URL = os.environ.get('PIXELCAST_BASEMAP_URL', 'https://tile.openstreetmap.org/{z}/{x}/{y}.png')
+ATTRIBUTION = os.environ.get('PIXELCAST_BASEMAP_ATTRIBUTION', '&copy; OpenStreetMap contributors')
+DEFAULT_CACHE_PATH = os.environ.get(
+    'PIXELCAST_BASEMAP_CACHE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'basemap_cache.mbtiles')
+)
+CACHE_MB = float(os.environ.get('PIXELCAST_BASEMAP_CACHE_MB', 512))
+PACK_PATHS = [path for path in os.environ.get('PIXELCAST_BASEMAP_PACK', '').split(os.pathsep) if path]
+OFFLINE = os.environ.get('PIXELCAST_BASEMAP_OFFLINE', '').lower() in ('1', 'true', 'yes')
+# Upstream tiles per second, with bursts of a screenful
+UPSTREAM_RATE = float(os.environ.get('PIXELCAST_BASEMAP_RATE', 4.0))
+UPSTREAM_BURST = 16
+PREFETCH = os.environ.get('PIXELCAST_BASEMAP_PREFETCH', '').lower() in ('1', 'true', 'yes')
+
+# The map opens at zoom 12; a 3x3 block there covers the first view
+PREFETCH_ZOOMS = (12,)
+# Seconds before the same spot is prefetched again
+PREFETCH_INTERVAL = 3600.0
+MAX_ZOOM = 19
+
+TileKey = Tuple[int, int, int]
+
+
+def tile_for(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """XYZ (Web Mercator) tile containing a point"""
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_in_bbox(south: float, west: float, north: float, east: float,
+                  zooms: Sequence[int]) -> Iterator[TileKey]:
+    """Every tile covering a bounding box at each zoom level"""
+    for z in zooms:
+        x0, y0 = tile_for(north, west, z)
+        x1, y1 = tile_for(south, east, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+def tiles_around(lat: float, lon: float, zooms: Sequence[int], radius: int = 1) -> Iterator[TileKey]:
+    """The tile containing a point plus ``radius`` tiles on every side"""
+    for z in zooms:
+        cx, cy = tile_for(lat, lon, z)
+        n = 2 ** z
+        for x in range(cx - radius, cx + radius + 1):
+            for y in range(max(cy - radius, 0), min(cy + radius, n - 1) + 1):
+                yield z, x % n, y
+
+
+class MBTiles:
+    """Tiles in an MBTiles file (SQLite; rows are stored TMS-flipped)"""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS tiles (
+        zoom_level INTEGER,
+        tile_column INTEGER,
+        tile_row INTEGER,
+        tile_data BLOB,
+        PRIMARY KEY (zoom_level, tile_column, tile_row)
+    );
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self._db = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row(z: int, y: int) -> int:
+        return 2 ** z - 1 - y
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                (z, x, self._row(z, y))
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                             (z, x, self._row(z, y), data))
+
+    def set_metadata(self, **values) -> None:
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                                 [(name, str(value)) for name, value in values.items()])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM tiles').fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class DiskTileCache(MBTiles):
+    """MBTiles cache with LRU eviction once tiles exceed ``max_bytes``.
+
+    Access times live in a side table that MBTiles readers ignore, so the
+    cache file can also be used as a tile pack.
+    """
+
+    _USAGE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tile_usage (
+        zoom_level INTEGER,
+        tile_column INTEGER,
+        tile_row INTEGER,
+        size INTEGER NOT NULL,
+        fetched_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        PRIMARY KEY (zoom_level, tile_column, tile_row)
+    );
+    CREATE INDEX IF NOT EXISTS tile_usage_accessed ON tile_usage (accessed_at);
+    """
+    # Hits refresh the access time at most this often, to keep reads read-only
+    TOUCH_INTERVAL = 300.0
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = int(CACHE_MB * 1024 * 1024)):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self._db.executescript(self._USAGE_SCHEMA)
+        self._bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM tile_usage').fetchone()[0]
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def lookup(self, z: int, x: int, y: int) -> Optional[Tuple[bytes, float]]:
+        """``(tile, fetched_at)``, or None when the tile is not cached"""
+        key = (z, x, self._row(z, y))
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT t.tile_data, u.fetched_at, u.accessed_at FROM tiles t JOIN tile_usage u '
+                'USING (zoom_level, tile_column, tile_row) '
+                'WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?', key
+            ).fetchone()
+            if row is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['hits'] += 1
+            data, fetched_at, accessed_at = row
+            if now - accessed_at > self.TOUCH_INTERVAL:
+                self._db.execute('UPDATE tile_usage SET accessed_at = ? '
+                                 'WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?', (now,) + key)
+        return bytes(data), fetched_at
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        entry = self.lookup(z, x, y)
+        return entry[0] if entry else None
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        key = (z, x, self._row(z, y))
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute(
+                'SELECT size FROM tile_usage WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?', key
+            ).fetchone()
+            self._db.execute('BEGIN')
+            self._db.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)', key + (data,))
+            self._db.execute('INSERT OR REPLACE INTO tile_usage VALUES (?, ?, ?, ?, ?, ?)',
+                             key + (len(data), now, now))
+            self._db.execute('COMMIT')
+            self._bytes += len(data) - (previous[0] if previous else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Other processes write to the same file, so start from the true total
+        (self._bytes,) = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM tile_usage').fetchone()
+        # Evict down to 90% so the next few puts don't each trigger eviction
+        target = int(self.max_bytes * 0.9)
+        while self._bytes > target:
+            victims = self._db.execute(
+                'SELECT zoom_level, tile_column, tile_row, size FROM tile_usage '
+                'ORDER BY accessed_at LIMIT 256'
+            ).fetchall()
+            if not victims:
+                break
+            self._db.execute('BEGIN')
+            for z, x, row, size in victims:
+                self._db.execute('DELETE FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                                 (z, x, row))
+                self._db.execute('DELETE FROM tile_usage WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                                 (z, x, row))
+                self._bytes -= size
+                self._counters['evictions'] += 1
+                if self._bytes <= target:
+                    break
+            self._db.execute('COMMIT')
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (tiles,) = self._db.execute('SELECT COUNT(*) FROM tile_usage').fetchone()
+            return dict(self._counters, tiles=tiles, bytes=self._bytes, max_bytes=self.max_bytes)
+
+
+class TileProxy:
+    """Serve basemap tiles from packs, the disk cache, then upstream"""
+
+    def __init__(self, upstream_url: str = UPSTREAM_URL, cache: Optional[DiskTileCache] = None,
+                 packs: Sequence[MBTiles] = (), offline: bool = False,
+                 max_age: float = 30 * 24 * 3600, timeout: float = 10.0, pool_size: int = 2,
+                 rate_limiter: Optional[TokenBucket] = None):
+        self.upstream_url = upstream_url
+        self.cache = cache
+        self.packs = list(packs)
+        self.offline = offline
+        self.max_age = max_age
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.rate_limiter = rate_limiter or TokenBucket(rate=UPSTREAM_RATE, capacity=UPSTREAM_BURST)
+        self._session = None
+        self._in_flight: Dict[TileKey, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+        self._prefetched: Dict[Tuple[float, float], float] = {}
+        self.upstream_fetches = 0
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """PNG bytes for a tile, or None when it is unavailable"""
+        for pack in self.packs:
+            tile = pack.get(z, x, y)
+            if tile is not None:
+                return tile
+
+        cached = self.cache.lookup(z, x, y) if self.cache is not None else None
+        if cached is not None and (self.offline or time.time() - cached[1] < self.max_age):
+            return cached[0]
+        if self.offline:
+            return None
+        tile = self._fetch_coalesced((z, x, y))
+        # Serve a stale tile rather than nothing when upstream is unreachable
+        return tile if tile is not None else (cached[0] if cached else None)
+
+    def _fetch_coalesced(self, key: TileKey) -> Optional[bytes]:
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            tile = self._fetch(*key)
+            if tile is not None and self.cache is not None:
+                self.cache.put(*key, tile)
+            future.set_result(tile)
+            return tile
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def _fetch(self, z: int, x: int, y: int) -> Optional[bytes]:
+        import requests
+        if self._session is None:
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        self.rate_limiter.acquire()
+        self.upstream_fetches += 1
+        try:
+            response = self._session.get(self.upstream_url.format(z=z, x=x, y=y), timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        return response.content if response.status_code == 200 else None
+
+    def prefetch(self, lat: float, lon: float, zooms: Sequence[int] = PREFETCH_ZOOMS,
+                 radius: int = 1) -> int:
+        """Warm the cache around a point in the background; returns tiles queued"""
+        if self.offline or self.cache is None:
+            return 0
+        center = (round(lat, 2), round(lon, 2))
+        now = time.time()
+        with self._in_flight_lock:
+            if now - self._prefetched.get(center, 0.0) < PREFETCH_INTERVAL:
+                return 0
+            self._prefetched = {spot: at for spot, at in self._prefetched.items()
+                                if now - at < PREFETCH_INTERVAL}
+            self._prefetched[center] = now
+            if self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(max_workers=self.pool_size,
+                                                      thread_name_prefix='pixelcast-basemap')
+        missing = [key for key in tiles_around(lat, lon, zooms, radius) if self._needs_fetch(key)]
+        for key in missing:
+            self._prefetcher.submit(self._fetch_coalesced, key)
+        return len(missing)
+
+    def _needs_fetch(self, key: TileKey) -> bool:
+        if any(pack.get(*key) is not None for pack in self.packs):
+            return False
+        cached = self.cache.lookup(*key)
+        return cached is None or time.time() - cached[1] >= self.max_age
+
+
+def seed_pack(path: str, tiles: Sequence[TileKey], proxy: TileProxy,
+              bounds: Optional[Tuple[float, float, float, float]] = None) -> Tuple[int, int]:
+    """Write ``tiles`` into an offline pack; returns ``(written, missing)``"""
+    if not tiles:
+        raise ValueError("no tiles to seed; check the bounding box and zoom range")
+    pack = MBTiles(path)
+    pack.set_metadata(name=os.path.splitext(os.path.basename(path))[0], format='png', type='baselayer',
+                      attribution=ATTRIBUTION,
+                      minzoom=min(z for z, _, _ in tiles), maxzoom=max(z for z, _, _ in tiles))
+    if bounds is not None:
+        south, west, north, east = bounds
+        pack.set_metadata(bounds=f'{west},{south},{east},{north}')
+    written = missing = 0
+    with ThreadPoolExecutor(max_workers=proxy.pool_size) as pool:
+        for key, tile in zip(tiles, pool.map(lambda key: proxy.get(*key), tiles)):
+            if tile is None:
+                missing += 1
+            else:
+                pack.put(*key, tile)
+                written += 1
+    pack.close()
+    return written, missing
+
+
+_default_proxy: Optional[TileProxy] = None
+_default_proxy_lock = threading.Lock()
+
+
+def get_tile_proxy() -> TileProxy:
+    """Return the process-wide tile proxy, creating it on first use"""
+    global _default_proxy
+    if _default_proxy is None:
+        with _default_proxy_lock:
+            if _default_proxy is None:
+                packs = [MBTiles(path, readonly=True) for path in PACK_PATHS]
+                _default_proxy = TileProxy(cache=DiskTileCache(), packs=packs, offline=OFFLINE)
+    return _default_proxy
+
+
+def _zoom_range(text: str) -> List[int]:
+    low, _, high = text.partition('-')
+    return list(range(int(low), int(high or low) + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PixelCast basemap tile tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    seed = subparsers.add_parser('seed', help="Build an offline tile pack for a region")
+    seed.add_argument('output', help="MBTiles file to write")
+    seed.add_argument('--bbox', nargs=4, type=float, required=True,
+                      metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'))
+    seed.add_argument('--zooms', type=_zoom_range, default=_zoom_range('10-14'),
+                      help="Zoom levels, e.g. 12 or 10-14 (default: 10-14)")
+    seed.add_argument('--max-tiles', type=int, default=5000,
+                      help="Refuse to seed more tiles than this (default: 5000)")
+    subparsers.add_parser('stats', help="Show disk cache usage")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print(get_tile_proxy().cache.stats())
+        return
+    tiles = list(tiles_in_bbox(*args.bbox, args.zooms))
+    if not tiles:
+        parser.error("no tiles cover that area; SOUTH must not exceed NORTH and zooms must be ascending")
+    if len(tiles) > args.max_tiles:
+        parser.error(f"{len(tiles)} tiles exceeds --max-tiles {args.max_tiles}; "
+                     f"shrink the area or zoom range")
+    written, missing = seed_pack(args.output, tiles, get_tile_proxy(), tuple(args.bbox))
+    print(f"Wrote {written} tiles to {args.output}" + (f" ({missing} unavailable)" if missing else ""))
+
+
+if __name__ == '__main__':
+    main()
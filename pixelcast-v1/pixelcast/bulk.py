@@ -0,0 +1,147 @@
+"""Bulk forecasts for many venues at once.
+
+Venues come from CSV or plain ``name, lat, lon`` lines; names without
+coordinates are resolved through the offline gazetteer, then a capped number
+through the network geocoder. All venues x dates are computed in one
+vectorized ``generate_batch`` call; the largest comparison the app allows
+(``MAX_DAYS`` days of 50,000 venues) takes a fraction of a second.
+"""
+
+import csv
+import io
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import instrumentation as timing
+from .geocoding import GeocodingService
+from .weather import WeatherDataGenerator
+
+MAX_DAYS = 7
+# Names looked up on the network geocoder per comparison; it allows about
+# one request per second, so larger lists need coordinates
+MAX_GEOCODE_NAMES = 25
+
+_LAT_COLUMNS = ('lat', 'latitude')
+_LON_COLUMNS = ('lon', 'lng', 'long', 'longitude')
+_NAME_COLUMNS = ('name', 'venue', 'location', 'address')
+
+
+class Venue(NamedTuple):
+    name: str
+    lat: Optional[float]
+    lon: Optional[float]
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _coordinate(value: str, limit: float) -> Optional[float]:
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if -limit <= number <= limit else None
+
+
+def parse_venues(text: str) -> List[Venue]:
+    """Parse venues from CSV text.
+
+    A header row naming ``name``/``lat``/``lon`` columns (or their common
+    aliases) is optional; without one, rows ending in two numbers are
+    ``[name,] lat, lon`` and anything else is a place name to geocode.
+    Raises ValueError naming the first malformed line.
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    columns = None
+    if any(name in header for name in _LAT_COLUMNS + _LON_COLUMNS + _NAME_COLUMNS):
+        def find(aliases):
+            return next((header.index(alias) for alias in aliases if alias in header), None)
+        columns = (find(_NAME_COLUMNS), find(_LAT_COLUMNS), find(_LON_COLUMNS))
+        if (columns[1] is None) != (columns[2] is None):
+            raise ValueError("header must name both a latitude and a longitude column")
+        rows = rows[1:]
+        first_line = 2
+    else:
+        first_line = 1
+
+    venues = []
+    for line, row in enumerate(rows, start=first_line):
+        cells = [cell.strip() for cell in row]
+        if columns is not None:
+            name_col, lat_col, lon_col = columns
+            name = cells[name_col] if name_col is not None and name_col < len(cells) else ''
+            lat_text = cells[lat_col] if lat_col is not None and lat_col < len(cells) else ''
+            lon_text = cells[lon_col] if lon_col is not None and lon_col < len(cells) else ''
+        elif len(cells) >= 2 and _is_number(cells[-2]) and _is_number(cells[-1]):
+            name, lat_text, lon_text = ', '.join(cells[:-2]), cells[-2], cells[-1]
+        else:
+            # "Springfield, IL, USA" is one place name, not name/lat/lon
+            name, lat_text, lon_text = ', '.join(cell for cell in cells if cell), '', ''
+
+        if lat_text or lon_text:
+            lat, lon = _coordinate(lat_text, 90), _coordinate(lon_text, 180)
+            if lat is None or lon is None:
+                raise ValueError(f"line {line}: invalid coordinates {lat_text!r}, {lon_text!r}")
+            venues.append(Venue(name or f"{lat:.4f}, {lon:.4f}", lat, lon))
+        elif name:
+            venues.append(Venue(name, None, None))
+        else:
+            raise ValueError(f"line {line}: expected a name or coordinates")
+    return venues
+
+
+@timing.timed('bulk.resolve_venues')
+def resolve_venues(venues: Sequence[Venue],
+                   max_lookups: Optional[int] = None) -> Tuple[List[Venue], List[str]]:
+    """Geocode venues given by name only; returns (resolved venues, unresolved names).
+
+    At most ``max_lookups`` names missing from the offline gazetteer go to
+    the network geocoder; the rest come back unresolved.
+    """
+    pending = list(dict.fromkeys(venue.name for venue in venues if venue.lat is None))
+    found = dict(zip(pending, GeocodingService.geocode_locations(pending, max_lookups))) if pending else {}
+
+    resolved, unresolved = [], []
+    for venue in venues:
+        if venue.lat is not None:
+            resolved.append(venue)
+        elif found.get(venue.name):
+            lat, lon, _ = found[venue.name]
+            resolved.append(Venue(venue.name, lat, lon))
+        else:
+            unresolved.append(venue.name)
+    return resolved, unresolved
+
+
+@timing.timed('bulk.forecast_venues')
+def forecast_venues(venues: Sequence[Venue], dates) -> Dict[str, np.ndarray]:
+    """Daily forecasts for every venue and date, as metric -> (venues, days) arrays"""
+    lats = np.array([venue.lat for venue in venues], dtype=np.float64)
+    lons = np.array([venue.lon for venue in venues], dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    return WeatherDataGenerator.generate_batch(lats[:, None], lons[:, None], dates[None, :])
+
+
+def summarize_venues(forecasts: Dict[str, np.ndarray], day: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Per-venue comparison columns over the whole range, or a single day index"""
+    if day is not None:
+        return {metric: values[:, day] for metric, values in forecasts.items()}
+    return {
+        'temperature': forecasts['temperature'].mean(axis=1).round(1),
+        'temperature_max': forecasts['temperature'].max(axis=1),
+        'precipitation': forecasts['precipitation'].sum(axis=1).round(1),
+        'humidity': forecasts['humidity'].mean(axis=1).round(1),
+        'wind_speed': forecasts['wind_speed'].max(axis=1),
+        'uv_index': forecasts['uv_index'].max(axis=1),
+        'cloud_cover': forecasts['cloud_cover'].mean(axis=1).round(1),
+    }
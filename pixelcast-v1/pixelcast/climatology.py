@@ -0,0 +1,292 @@
+"""Gridded monthly climate normals used as forecast baselines.
+
+Normals are stored as one float32 array of shape ``(12, rows, columns,
+variables)`` on a regular lat/lon grid and memory-mapped at load time, so
+opening a grid is zero-copy and costs the same whatever its resolution;
+only the pages a query touches are ever read. ``Climatology.sample``
+interpolates bilinearly in space and linearly between mid-month normals for
+any number of points in one vectorized pass.
+
+Without a built grid, a synthetic one (zonal climate with seasons, an
+ITCZ and subtropical dry belts) is written on first use. Build one from real
+normals, e.g. regridded WorldClim or ERA5 monthly means, with::
+
+    python -m pixelcast.climatology build --normals normals.npz data/climatology
+
+where ``normals.npz`` holds a ``(12, rows, columns)`` array per variable
+plus scalar ``south``, ``west`` and ``resolution`` (degrees).
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import instrumentation as timing
+
+DEFAULT_CLIMATOLOGY_DIR = os.environ.get(
+    'PIXELCAST_CLIMATOLOGY',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'climatology')
+)
+
+# Monthly means: °C, mm/day, %, clear-sky noon UV index, %
+VARIABLES = ('temperature', 'precipitation', 'humidity', 'uv_index', 'cloud_cover')
+SYNTHETIC_RESOLUTION = 1.0
+# Locations whose twelve interpolated monthly normals are kept for reuse
+LOCATION_CACHE_SIZE = 1024
+
+_NORMALS_FILE = 'normals.npy'
+_GRID_FILE = 'grid.json'
+
+
+class Climatology:
+    """Monthly normals on a regular lat/lon grid.
+
+    ``normals`` may be a memory map or an in-memory array; grid nodes sit
+    at ``south + i * resolution`` and ``west + j * resolution``.
+    """
+
+    def __init__(self, normals: np.ndarray, south: float, west: float, resolution: float,
+                 variables: Tuple[str, ...] = VARIABLES):
+        if normals.ndim != 4 or normals.shape[0] != 12 or normals.shape[3] != len(variables):
+            raise ValueError(f"normals must have shape (12, rows, columns, {len(variables)}), "
+                             f"got {normals.shape}")
+        self.normals = normals
+        # One row per (month, row, column) node, all variables together, so a
+        # gather touches one cache line per node; a view, never a copy
+        self._nodes = np.asarray(normals).reshape(-1, len(variables))
+        self.south = south
+        self.west = west
+        self.resolution = resolution
+        self.variables = tuple(variables)
+        self.rows, self.columns = normals.shape[1:3]
+        # Global grids wrap around the antimeridian instead of clamping
+        self.wraps = self.columns * resolution >= 360.0 - 1e-9
+        self._locations: "OrderedDict[Tuple[float, float], np.ndarray]" = OrderedDict()
+        self._locations_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: str) -> 'Climatology':
+        with open(os.path.join(directory, _GRID_FILE), encoding='utf-8') as f:
+            grid = json.load(f)
+        normals = np.load(os.path.join(directory, _NORMALS_FILE), mmap_mode='r')
+        return cls(normals, grid['south'], grid['west'], grid['resolution'], tuple(grid['variables']))
+
+    def _corners(self, lats: np.ndarray, lons: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(node index within a month, bilinear weight) for the four surrounding nodes"""
+        y = np.clip((lats - self.south) / self.resolution, 0, self.rows - 1)
+        row = np.minimum(np.floor(y).astype(np.intp), self.rows - 2)
+        fy = (y - row).astype(np.float32)
+        x = (lons - self.west) / self.resolution
+        if self.wraps:
+            x = np.mod(x, self.columns)
+            col = np.floor(x).astype(np.intp) % self.columns
+            next_col = (col + 1) % self.columns
+        else:
+            x = np.clip(x, 0, self.columns - 1)
+            col = np.minimum(np.floor(x).astype(np.intp), self.columns - 2)
+            next_col = col + 1
+        fx = (x - col).astype(np.float32)
+        top, bottom = row * self.columns, (row + 1) * self.columns
+        return [(top + col, (1 - fy) * (1 - fx)), (top + next_col, (1 - fy) * fx),
+                (bottom + col, fy * (1 - fx)), (bottom + next_col, fy * fx)]
+
+    @staticmethod
+    def _months(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Month index before each day and the weight of the month after.
+
+        Normals describe mid-month, so each day blends the two nearest.
+        """
+        month_start = days.astype('datetime64[M]')
+        first_day = month_start.astype('datetime64[D]')
+        month_days = ((month_start + 1).astype('datetime64[D]') - first_day).astype(np.float64)
+        position = (month_start.astype(np.int64) % 12
+                    + ((days - first_day).astype(np.float64) + 0.5) / month_days - 0.5)
+        month = np.floor(position)
+        return month.astype(np.intp) % 12, (position - month).astype(np.float32)
+
+    def _interpolate(self, months: np.ndarray, corners) -> np.ndarray:
+        """Spatially interpolated normals, ``months`` broadcast against the points"""
+        plane = self.rows * self.columns
+        values = None
+        for node, weight in corners:
+            # Gathers read only the touched pages of a memory map
+            term = np.take(self._nodes, months * plane + node, axis=0) * weight[..., None]
+            values = term if values is None else values + term
+        return values
+
+    def _location_normals(self, lat: float, lon: float) -> np.ndarray:
+        """All twelve monthly normals at one location, shape ``(12, variables)``"""
+        key = (lat, lon)
+        with self._locations_lock:
+            table = self._locations.get(key)
+            if table is not None:
+                self._locations.move_to_end(key)
+                return table
+        corners = self._corners(np.array([lat]), np.array([lon]))
+        table = self._interpolate(np.arange(12)[:, None], corners)[:, 0]
+        with self._locations_lock:
+            self._locations[key] = table
+            if len(self._locations) > LOCATION_CACHE_SIZE:
+                self._locations.popitem(last=False)
+        return table
+
+    @timing.timed('climatology.sample')
+    def sample(self, lats, lons, dates) -> Dict[str, np.ndarray]:
+        """Normals at each (lat, lon, date), one float32 array per variable.
+
+        Inputs broadcast against each other like ``generate_batch``.
+        """
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=np.float64),
+                                         np.asarray(lons, dtype=np.float64))
+        days = np.asarray(dates, dtype='datetime64[D]')
+        shape = np.broadcast_shapes(lats.shape, days.shape)
+        size = int(np.prod(shape))
+        month, later = self._months(days.ravel())
+        next_month = (month + 1) % 12
+        months = np.unique(np.concatenate([month, next_month]))
+
+        if lats.size == 1:
+            # One location over any dates, the app's usual call: a small table
+            # lookup per call instead of a fresh spatial interpolation
+            table = self._location_normals(float(lats.flat[0]), float(lons.flat[0]))
+            later = later[:, None]
+            values = table[month] * (1 - later) + table[next_month] * later
+            values = np.broadcast_to(values.reshape(days.shape + (len(self.variables),)),
+                                     shape + (len(self.variables),)).reshape(size, -1)
+        elif len(months) * lats.size <= 2 * size:
+            # Few distinct months (a location over a date range, many locations
+            # on one day): interpolate each location once per month, then blend
+            grid = self._interpolate(months[:, None], self._corners(lats.ravel(), lons.ravel()))
+
+            def spread(values: np.ndarray) -> np.ndarray:
+                return np.broadcast_to(values.reshape(days.shape), shape).ravel()
+
+            point = np.broadcast_to(np.arange(lats.size).reshape(lats.shape), shape).ravel()
+            later = spread(later)[:, None]
+            values = (grid[np.searchsorted(months, spread(month)), point] * (1 - later)
+                      + grid[np.searchsorted(months, spread(next_month)), point] * later)
+        else:
+            lats, lons, days = (np.broadcast_to(a, shape).ravel() for a in (lats, lons, days))
+            month, later = self._months(days)
+            corners = self._corners(lats, lons)
+            later = later[:, None]
+            values = (self._interpolate(month, corners) * (1 - later)
+                      + self._interpolate((month + 1) % 12, corners) * later)
+        return {name: values[:, i].reshape(shape) for i, name in enumerate(self.variables)}
+
+
+def synthesize_normals(resolution: float = SYNTHETIC_RESOLUTION) -> Tuple[np.ndarray, float, float]:
+    """Plausible global normals from a simple zonal climate model.
+
+    Returns ``(normals, south, west)`` for a global grid. Good enough for
+    realistic-looking mock forecasts; use real normals where accuracy matters.
+    """
+    lats = np.arange(-90.0, 90.0 + resolution / 2, resolution)
+    lons = np.arange(-180.0, 180.0, resolution)
+    months = np.arange(12, dtype=np.float64)
+    lat = np.radians(lats)[None, :, None]
+    lon = np.radians(lons)[None, None, :]
+    abs_lat = np.abs(lats)[None, :, None]
+    # +1 in northern summer (July), -1 in northern winter
+    season = np.cos(2 * np.pi * (months - 6) / 12)[:, None, None]
+
+    # Warm tropics, seasonal swing growing with latitude, mild zonal variation
+    temperature = (-15 + 42 * np.cos(lat) ** 1.5
+                   + 0.3 * abs_lat * np.sign(lat) * season
+                   + 2 * np.sin(2 * lon) * np.cos(lat))
+
+    # Rain band following the sun, dry subtropics, wet mid-latitude storm tracks
+    itcz = 6 * np.exp(-((np.degrees(lat) - 8 * season) / 10) ** 2)
+    storm_tracks = 2.5 * np.exp(-((abs_lat - 50) / 12) ** 2)
+    dry_belts = 1.5 * np.exp(-((abs_lat - 25) / 8) ** 2)
+    precipitation = np.maximum(0.2, 2 + itcz + storm_tracks - dry_belts + 0.5 * np.cos(lon))
+    humidity = np.clip(78 - 25 * np.exp(-((abs_lat - 25) / 10) ** 2) + 2 * precipitation, 20, 95)
+    cloud_cover = np.clip(20 + 7 * precipitation, 5, 90)
+
+    # Clear-sky noon UV from the solar elevation
+    declination = np.radians(23.44) * season
+    noon_cos = np.clip(np.cos(lat - declination), 0, 1)
+    uv_index = np.clip(11 * noon_cos ** 3, 0, 11)
+
+    normals = np.stack([np.broadcast_to(v, (12, len(lats), len(lons)))
+                        for v in (temperature, precipitation, humidity, uv_index, cloud_cover)], axis=-1)
+    return normals.astype(np.float32), -90.0, -180.0
+
+
+def build_climatology(directory: str, normals: np.ndarray, south: float, west: float,
+                      resolution: float, variables: Tuple[str, ...] = VARIABLES) -> None:
+    """Write a grid directory; files are swapped in atomically"""
+    Climatology(normals, south, west, resolution, variables)  # validates the shape
+    os.makedirs(directory, exist_ok=True)
+    grid = {'south': float(south), 'west': float(west), 'resolution': float(resolution),
+            'variables': list(variables)}
+    for name, write in ((_NORMALS_FILE, lambda f: np.save(f, np.asarray(normals, dtype=np.float32))),
+                        (_GRID_FILE, lambda f: f.write(json.dumps(grid).encode('utf-8')))):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+
+def load_normals_npz(path: str) -> Tuple[np.ndarray, float, float, float]:
+    """Read ``(normals, south, west, resolution)`` from an npz of per-variable arrays"""
+    with np.load(path) as data:
+        missing = [name for name in VARIABLES if name not in data]
+        if missing:
+            raise ValueError(f"{path} is missing variables: {', '.join(missing)}")
+        normals = np.stack([data[name] for name in VARIABLES], axis=-1).astype(np.float32)
+        return normals, float(data['south']), float(data['west']), float(data['resolution'])
+
+
+_default_climatology: Optional[Climatology] = None
+_default_climatology_lock = threading.Lock()
+
+
+def get_climatology() -> Climatology:
+    """Return the process-wide climatology, building the synthetic grid if none exists"""
+    global _default_climatology
+    if _default_climatology is None:
+        with _default_climatology_lock:
+            if _default_climatology is None:
+                directory = DEFAULT_CLIMATOLOGY_DIR
+                # grid.json is written last, so its presence means a complete grid
+                if not os.path.exists(os.path.join(directory, _GRID_FILE)):
+                    normals, south, west = synthesize_normals()
+                    try:
+                        build_climatology(directory, normals, south, west, SYNTHETIC_RESOLUTION)
+                    except OSError:
+                        # Read-only install: keep the synthetic grid in memory
+                        _default_climatology = Climatology(normals, south, west, SYNTHETIC_RESOLUTION)
+                        return _default_climatology
+                _default_climatology = Climatology.load(directory)
+    return _default_climatology
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PixelCast climatology grid tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Write a normals grid")
+    build.add_argument('directory', nargs='?', default=DEFAULT_CLIMATOLOGY_DIR,
+                       help="Output directory for the grid")
+    build.add_argument('--normals', help="npz of monthly normals (default: synthetic grid)")
+    build.add_argument('--resolution', type=float, default=SYNTHETIC_RESOLUTION,
+                       help="Synthetic grid spacing in degrees")
+    args = parser.parse_args()
+
+    if args.normals:
+        normals, south, west, resolution = load_normals_npz(args.normals)
+    else:
+        (normals, south, west), resolution = synthesize_normals(args.resolution), args.resolution
+    build_climatology(args.directory, normals, south, west, resolution)
+    print(f"Wrote {normals.shape[1]}x{normals.shape[2]} grid "
+          f"({normals.nbytes / 2**20:.1f} MB) to {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
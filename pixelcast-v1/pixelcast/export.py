@@ -0,0 +1,250 @@
+"""Streaming forecast export to CSV, Parquet and Arrow IPC.
+
+Forecasts for (location, date) pairs are generated and written in fixed-size
+record batches, so memory stays bounded by ``chunk_rows`` no matter how many
+locations, days or hourly steps are exported::
+
+    python export_forecasts.py --locations venues.csv --days 365 --hourly -o year.parquet
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bulk import parse_venues, resolve_venues
+from .providers import DayForecast, TimeWindow, get_provider_runner
+from .weather import WeatherDataGenerator
+
+# pyarrow is imported on first export; Streamlit already depends on it
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# format -> (MIME type, file extension)
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', '.arrow'),
+}
+CHUNK_ROWS = 65_536
+# Largest export the UI builds for download; bigger ones go through the CLI
+MAX_DOWNLOAD_ROWS = int(os.environ.get('PIXELCAST_MAX_DOWNLOAD_ROWS', 2_000_000))
+
+
+# (lats, lons, dates, window) of matching points -> daily values (points, metrics),
+# or hourly series (points, steps, metrics) when a window is given
+ForecastSource = Callable[[np.ndarray, np.ndarray, np.ndarray, Optional[TimeWindow]], np.ndarray]
+# Per-location fetch, e.g. through a forecast provider: (location, dates, window) -> forecasts
+ForecastFetch = Callable[[Tuple[float, float], List[date], Optional[TimeWindow]], Sequence[DayForecast]]
+
+
+def generator_source(lats: np.ndarray, lons: np.ndarray, dates: np.ndarray,
+                     window: Optional[TimeWindow]) -> np.ndarray:
+    """Forecast values computed directly by ``WeatherDataGenerator``"""
+    if window is None:
+        daily = WeatherDataGenerator.generate_batch(lats, lons, dates)
+        return np.stack([daily[metric] for metric in WeatherDataGenerator.METRICS], axis=-1)
+    return WeatherDataGenerator.generate_hourly_series(lats, lons, dates, *window)
+
+
+def fetch_source(fetch: ForecastFetch) -> ForecastSource:
+    """Source that reads each location's forecasts through ``fetch``"""
+    def source(lats, lons, dates, window):
+        # Points arrive location by location, so each run of one location is one fetch
+        breaks = np.flatnonzero((np.diff(lats) != 0) | (np.diff(lons) != 0)) + 1
+        values = []
+        for run in np.split(np.arange(len(lats)), breaks):
+            first = run[0]
+            forecasts = fetch((float(lats[first]), float(lons[first])), dates[run].astype(object).tolist(), window)
+            if window is None:
+                values += [[forecast.daily[metric] for metric in WeatherDataGenerator.METRICS]
+                           for forecast in forecasts]
+            else:
+                values += [forecast.hourly for forecast in forecasts]
+        # Same dtypes as the generator: float64 daily values, float32 series
+        return np.asarray(values, dtype=np.float64 if window is None else np.float32)
+    return source
+
+
+def provider_source(daily_window: TimeWindow = TimeWindow('00:00', '23:00')) -> ForecastSource:
+    """Source backed by the configured forecast provider (``PIXELCAST_FORECAST_PROVIDER``)"""
+    runner = get_provider_runner()
+    return fetch_source(lambda location, dates, window: runner.fetch_range(location, dates, window or daily_window))
+
+
+def format_for_path(path: str) -> str:
+    """Export format implied by a file name's extension"""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, (_, fmt_extension) in FORMATS.items():
+        if extension == fmt_extension or (fmt == 'arrow' and extension in ('.feather', '.ipc')):
+            return fmt
+    raise ValueError(f"cannot infer export format from {path!r}; use one of {', '.join(FORMATS)}")
+
+
+def iter_forecast_batches(lats: Sequence[float], lons: Sequence[float], dates: Sequence,
+                          window: Optional[TimeWindow] = None, names: Optional[Sequence[str]] = None,
+                          chunk_rows: int = CHUNK_ROWS,
+                          source: ForecastSource = generator_source) -> Iterator["pa.RecordBatch"]:
+    """Record batches of daily rows, or hourly rows when ``window`` is given.
+
+    Rows are ordered by location, then date (then time), and each batch
+    holds at most ``chunk_rows`` rows. Values come from ``source``; pass the
+    one the forecast on screen uses so the file matches it.
+    """
+    import pyarrow as pa
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    names = np.asarray(names, dtype=object) if names is not None else None
+    minutes = None
+    if window is not None:
+        minutes = WeatherDataGenerator.time_steps(*window).astype('timedelta64[m]')
+    rows_per_point = len(minutes) if minutes is not None else 1
+    points_per_chunk = max(1, chunk_rows // rows_per_point)
+    total_points = len(lats) * len(dates)
+
+    for start in range(0, total_points, points_per_chunk):
+        flat = np.arange(start, min(start + points_per_chunk, total_points))
+        location, day = np.divmod(flat, len(dates))
+        point_lats, point_lons, point_dates = lats[location], lons[location], dates[day]
+
+        columns = {}
+        series = source(point_lats, point_lons, point_dates, window)
+        if minutes is None:
+            if names is not None:
+                columns['name'] = names[location]
+            columns['lat'], columns['lon'] = point_lats, point_lons
+            columns['date'] = point_dates
+        else:
+            # float32 rounding keeps the text formats short without widening the column
+            series = np.round(series, 2).reshape(-1, len(WeatherDataGenerator.METRICS))
+            repeat = len(minutes)
+            if names is not None:
+                columns['name'] = np.repeat(names[location], repeat)
+            columns['lat'], columns['lon'] = np.repeat(point_lats, repeat), np.repeat(point_lons, repeat)
+            columns['timestamp'] = (point_dates[:, None] + minutes[None, :]).ravel().astype('datetime64[s]')
+        values = {metric: series[:, i] for i, metric in enumerate(WeatherDataGenerator.METRICS)}
+        columns.update(values)
+        yield pa.record_batch({name: pa.array(column) for name, column in columns.items()})
+
+
+def write_forecasts(sink, fmt: str, lats, lons, dates, window: Optional[TimeWindow] = None,
+                    names: Optional[Sequence[str]] = None, chunk_rows: int = CHUNK_ROWS,
+                    source: ForecastSource = generator_source) -> int:
+    """Stream forecasts to a path or binary file object; returns the number of rows"""
+    import pyarrow as pa
+
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; use one of {', '.join(FORMATS)}")
+    batches = iter_forecast_batches(lats, lons, dates, window, names, chunk_rows, source)
+    first = next(batches, None)
+    if first is None:
+        return 0
+
+    if fmt == 'csv':
+        import pyarrow.csv
+        writer = pyarrow.csv.CSVWriter(sink, first.schema)
+    elif fmt == 'parquet':
+        import pyarrow.parquet
+        writer = pyarrow.parquet.ParquetWriter(sink, first.schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(sink, first.schema)
+
+    rows = 0
+    with writer:
+        for batch in itertools.chain([first], batches):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def count_rows(lats: Sequence[float], dates: Sequence, window: Optional[TimeWindow] = None) -> int:
+    """Number of rows an export of these locations, dates and window produces"""
+    rows_per_point = len(WeatherDataGenerator.time_steps(*window)) if window is not None else 1
+    return len(lats) * len(dates) * rows_per_point
+
+
+def export_file(fmt: str, lats, lons, dates, window: Optional[TimeWindow] = None,
+                names: Optional[Sequence[str]] = None, max_rows: Optional[int] = MAX_DOWNLOAD_ROWS,
+                source: ForecastSource = generator_source):
+    """Export into an anonymous temporary file, rewound and ready to read.
+
+    Batches are streamed to disk as they are generated, so neither the table
+    nor the encoded file is held in memory while it is built. Raises
+    ValueError when the export would exceed ``max_rows``.
+    """
+    rows = count_rows(lats, dates, window)
+    if max_rows is not None and rows > max_rows:
+        raise ValueError(f"export of {rows:,} rows exceeds the {max_rows:,} row download limit")
+    # Unbuffered, so callers get a raw file object they can read in one go
+    sink = tempfile.TemporaryFile(buffering=0)
+    try:
+        write_forecasts(sink, fmt, lats, lons, dates, window, names, source=source)
+        sink.seek(0)
+    except BaseException:
+        sink.close()
+        raise
+    return sink
+
+
+def _date_range(start: date, days: int) -> List[date]:
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export PixelCast forecasts to CSV, Parquet or Arrow")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--locations', help="CSV of venues (name, lat, lon or place names)")
+    where.add_argument('--point', nargs=2, type=float, metavar=('LAT', 'LON'), help="A single location")
+    parser.add_argument('--start', type=date.fromisoformat, default=date.today(),
+                        help="First day, YYYY-MM-DD (default: today)")
+    parser.add_argument('--days', type=int, default=7, help="Number of days (default: 7)")
+    parser.add_argument('--hourly', action='store_true', help="Export hourly rows instead of daily")
+    parser.add_argument('--start-time', default='00:00', help="Hourly window start, HH:MM")
+    parser.add_argument('--end-time', default='23:00', help="Hourly window end, HH:MM")
+    parser.add_argument('--step-minutes', type=int, default=60, help="Hourly step in minutes")
+    parser.add_argument('--format', choices=sorted(FORMATS), help="Output format (default: from extension)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Rows per written batch")
+    parser.add_argument('--provider', action='store_true',
+                        help="Read forecasts through the configured forecast provider, as the app does")
+    parser.add_argument('-o', '--output', required=True, help="Output file, or - for CSV on stdout")
+    args = parser.parse_args()
+
+    if args.output == '-':
+        fmt = args.format or 'csv'
+    else:
+        try:
+            fmt = args.format or format_for_path(args.output)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+
+    if args.point:
+        lats, lons, names = [args.point[0]], [args.point[1]], None
+    else:
+        with open(args.locations, encoding='utf-8') as f:
+            venues, unresolved = resolve_venues(parse_venues(f.read()))
+        for name in unresolved:
+            print(f"warning: could not locate {name!r}", file=sys.stderr)
+        lats = [venue.lat for venue in venues]
+        lons = [venue.lon for venue in venues]
+        names = [venue.name for venue in venues]
+
+    window = TimeWindow(args.start_time, args.end_time, args.step_minutes) if args.hourly else None
+    dates = _date_range(args.start, args.days)
+    source = provider_source() if args.provider else generator_source
+    sink = sys.stdout.buffer if args.output == '-' else args.output
+    rows = write_forecasts(sink, fmt, lats, lons, dates, window, names, args.chunk_rows, source)
+    print(f"Wrote {rows:,} rows ({len(lats):,} locations x {len(dates)} days) as {fmt}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Process-wide store of computed forecasts, shared by every session.
+
+Each entry holds one (location, date, time window) as compact read-only
+float32 arrays: the daily values in ``WeatherDataGenerator.METRICS`` order
+and the intraday series. Sessions keep only the keys and read views, so a
+popular location is held once no matter how many users look at it. Total
+size is capped (``PIXELCAST_FORECAST_STORE_MB``, default 256) with LRU
+eviction; evicted entries are simply regenerated on next use.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .weather import WeatherDataGenerator
+
+FORECAST_STORE_MB = float(os.environ.get('PIXELCAST_FORECAST_STORE_MB', 256))
+# Decimal places kept in store keys (4 places is about 11 m)
+COORD_PRECISION = 4
+# Rough per-entry cost of the key, entry tuple and array headers
+ENTRY_OVERHEAD_BYTES = 512
+
+# (lat, lon, date 'YYYY-MM-DD', start_time, end_time)
+StoreKey = Tuple[float, float, str, str, str]
+
+
+def store_coords(lat: float, lon: float) -> Tuple[float, float]:
+    """Coordinates rounded to the store's key precision"""
+    return round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)
+
+
+class StoredForecast(NamedTuple):
+    daily: np.ndarray   # (metrics,) float32
+    hourly: np.ndarray  # (steps, metrics) float32
+
+    @property
+    def nbytes(self) -> int:
+        return self.daily.nbytes + self.hourly.nbytes + ENTRY_OVERHEAD_BYTES
+
+    def daily_dict(self) -> Dict[str, float]:
+        """Daily values as rounded Python floats, for display"""
+        return {metric: round(float(value), 1)
+                for metric, value in zip(WeatherDataGenerator.METRICS, self.daily)}
+
+
+class ForecastStore:
+    """Thread-safe LRU of read-only forecast arrays with a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[StoreKey, StoredForecast]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'rejected': 0}
+
+    def get(self, key: StoreKey) -> Optional[StoredForecast]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry
+
+    def put(self, key: StoreKey, daily: Dict[str, float], hourly: np.ndarray) -> StoredForecast:
+        """Store one forecast and return the shared read-only entry.
+
+        An entry bigger than the whole budget is returned but not kept, rather
+        than evicting everything else to make room for it.
+        """
+        daily_array = np.array([daily[metric] for metric in WeatherDataGenerator.METRICS], dtype=np.float32)
+        hourly_array = np.array(hourly, dtype=np.float32)  # a private copy, safe to freeze
+        daily_array.setflags(write=False)
+        hourly_array.setflags(write=False)
+        entry = StoredForecast(daily_array, hourly_array)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            if entry.nbytes > self.max_bytes:
+                self._counters['rejected'] += 1
+                return entry
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._counters['evictions'] += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries),
+                        bytes=self._bytes, max_bytes=self.max_bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_store: Optional[ForecastStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_forecast_store() -> ForecastStore:
+    """Return the process-wide forecast store, creating it on first use"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ForecastStore(int(FORECAST_STORE_MB * 1024 * 1024))
+    return _default_store
@@ -0,0 +1,251 @@
+"""Offline gazetteer for forward, prefix and reverse geocoding.
+
+A GeoNames-style place dump (for example ``cities15000.txt``) is compiled once
+into flat NumPy arrays that are memory-mapped at load time:
+
+* a sorted name index for exact and prefix lookups (binary search), and
+* a one-degree lat/lon bucket grid for nearest-place reverse lookups.
+
+Build an index with::
+
+    python -m pixelcast.gazetteer build cities15000.txt data/gazetteer
+"""
+
+import argparse
+import bisect
+import math
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .geocoding_cache import GeocodeResult, normalize_query
+
+DEFAULT_GAZETTEER_DIR = os.environ.get(
+    'PIXELCAST_GAZETTEER',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'gazetteer')
+)
+
+EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE = 111.2
+_GRID_COLS = 360
+_GRID_CELLS = 180 * _GRID_COLS
+
+_ARRAYS = ('lat', 'lon', 'population', 'label_offsets', 'labels',
+           'key_offsets', 'keys', 'key_ids', 'grid_starts', 'grid_ids')
+
+
+def _grid_cell(lat, lon):
+    row = np.clip(np.floor(np.asarray(lat) + 90), 0, 179).astype(np.int64)
+    col = np.floor(np.asarray(lon) + 180).astype(np.int64) % _GRID_COLS
+    return row * _GRID_COLS + col
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into a UTF-8 blob plus an offsets array"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+class _PackedStrings:
+    """Read-only sequence view over a packed UTF-8 string array"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._blob[start:end].tobytes().decode('utf-8')
+
+
+class Gazetteer:
+    """Memory-mapped place index"""
+
+    def __init__(self, directory: str):
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                  for name in _ARRAYS}
+        self.lat = arrays['lat']
+        self.lon = arrays['lon']
+        self.population = arrays['population']
+        self._labels = _PackedStrings(arrays['label_offsets'], arrays['labels'])
+        self._keys = _PackedStrings(arrays['key_offsets'], arrays['keys'])
+        self._key_ids = arrays['key_ids']
+        self._grid_starts = arrays['grid_starts']
+        self._grid_ids = arrays['grid_ids']
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _result(self, place_id: int) -> GeocodeResult:
+        return float(self.lat[place_id]), float(self.lon[place_id]), self._labels[place_id]
+
+    def _key_range(self, key: str, prefix: bool) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + '\U0010ffff', lo) if prefix else \
+            bisect.bisect_right(self._keys, key, lo)
+        return lo, hi
+
+    def _ranked_ids(self, lo: int, hi: int, limit: int) -> List[int]:
+        """Distinct place ids in an index range, most populous first"""
+        ids = np.unique(self._key_ids[lo:hi])
+        if len(ids) > limit:
+            ids = ids[np.argpartition(-self.population[ids], limit - 1)[:limit]]
+        return ids[np.argsort(-self.population[ids], kind='stable')].tolist()
+
+    def geocode(self, query: str) -> Optional[GeocodeResult]:
+        """Exact name lookup, preferring the most populous match"""
+        lo, hi = self._key_range(normalize_query(query), prefix=False)
+        if lo == hi:
+            return None
+        return self._result(self._ranked_ids(lo, hi, 1)[0])
+
+    def autocomplete(self, prefix: str, limit: int = 5) -> List[GeocodeResult]:
+        """Places whose name starts with ``prefix``, most populous first"""
+        key = normalize_query(prefix)
+        if not key:
+            return []
+        lo, hi = self._key_range(key, prefix=True)
+        return [self._result(place_id) for place_id in self._ranked_ids(lo, hi, limit)]
+
+    def reverse(self, lat: float, lon: float, max_distance_km: float = 50.0) -> Optional[GeocodeResult]:
+        """Nearest place within ``max_distance_km`` of the given point"""
+        cell_row = int(np.clip(math.floor(lat + 90), 0, 179))
+        cell_col = int(math.floor(lon + 180)) % _GRID_COLS
+        # Anything in range is at most this many rows away
+        max_ring = math.ceil(max_distance_km / _KM_PER_DEGREE)
+        best_id, best_km = -1, max_distance_km
+        for ring in range(max_ring + 1):
+            # A degree of longitude shrinks towards the poles, so widen the
+            # window in columns until it spans the whole parallel
+            edge_lat = min(89.9, abs(lat) + ring + 1)
+            half_cols = min(_GRID_COLS // 2, math.ceil(ring / math.cos(math.radians(edge_lat))))
+            candidates = self._window_ids(cell_row, cell_col, ring, half_cols)
+            if len(candidates):
+                distances = self._haversine_km(lat, lon, candidates)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] < best_km:
+                    best_id, best_km = int(candidates[nearest]), float(distances[nearest])
+            # Points outside this window are at least this far away
+            if ring * _KM_PER_DEGREE >= best_km:
+                break
+        return self._result(best_id) if best_id >= 0 else None
+
+    def _window_ids(self, cell_row: int, cell_col: int, rows: int, half_cols: int) -> np.ndarray:
+        """Place ids in the grid cells within ``rows`` rows and ``half_cols`` columns of a cell"""
+        if half_cols >= _GRID_COLS // 2:
+            spans = [(0, _GRID_COLS - 1)]
+        else:
+            first, last = cell_col - half_cols, cell_col + half_cols
+            if first < 0:
+                spans = [(first + _GRID_COLS, _GRID_COLS - 1), (0, last)]
+            elif last >= _GRID_COLS:
+                spans = [(first, _GRID_COLS - 1), (0, last - _GRID_COLS)]
+            else:
+                spans = [(first, last)]
+        # Cells are stored row-major, so each row's column span is one slice
+        slices = [
+            self._grid_ids[self._grid_starts[row * _GRID_COLS + first]:
+                           self._grid_starts[row * _GRID_COLS + last + 1]]
+            for row in range(max(0, cell_row - rows), min(179, cell_row + rows) + 1)
+            for first, last in spans
+        ]
+        return np.concatenate(slices)
+
+    def _haversine_km(self, lat: float, lon: float, ids: np.ndarray) -> np.ndarray:
+        lat1, lon1 = math.radians(lat), math.radians(lon)
+        lat2 = np.radians(self.lat[ids].astype(np.float64))
+        lon2 = np.radians(self.lon[ids].astype(np.float64))
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def build_gazetteer(dump_path: str, directory: str, min_population: int = 0) -> int:
+    """Compile a GeoNames tab-separated dump into a gazetteer directory"""
+    lats, lons, populations, labels = [], [], [], []
+    index: List[Tuple[str, int]] = []
+    with open(dump_path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 15:
+                continue
+            population = int(fields[14] or 0)
+            if population < min_population:
+                continue
+            place_id = len(lats)
+            name, ascii_name, country = fields[1], fields[2], fields[8]
+            lats.append(float(fields[4]))
+            lons.append(float(fields[5]))
+            populations.append(population)
+            labels.append(f"{name}, {country}" if country else name)
+            for key in {normalize_query(name), normalize_query(ascii_name)}:
+                if key:
+                    index.append((key, place_id))
+
+    index.sort()
+    lat = np.asarray(lats, dtype=np.float32)
+    lon = np.asarray(lons, dtype=np.float32)
+    cells = _grid_cell(lat, lon)
+    grid_ids = np.argsort(cells, kind='stable').astype(np.int32)
+    grid_starts = np.searchsorted(cells[grid_ids], np.arange(_GRID_CELLS + 1)).astype(np.int64)
+    label_offsets, label_blob = _pack_strings(labels)
+    key_offsets, key_blob = _pack_strings([key for key, _ in index])
+
+    arrays = {
+        'lat': lat,
+        'lon': lon,
+        'population': np.asarray(populations, dtype=np.int64),
+        'label_offsets': label_offsets,
+        'labels': label_blob,
+        'key_offsets': key_offsets,
+        'keys': key_blob,
+        'key_ids': np.asarray([place_id for _, place_id in index], dtype=np.int32),
+        'grid_starts': grid_starts,
+        'grid_ids': grid_ids,
+    }
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), array)
+    return len(lat)
+
+
+_default_gazetteer: Optional[Gazetteer] = None
+_default_gazetteer_loaded = False
+_default_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Return the process-wide gazetteer, or None if no index has been built"""
+    global _default_gazetteer, _default_gazetteer_loaded
+    if not _default_gazetteer_loaded:
+        with _default_gazetteer_lock:
+            if not _default_gazetteer_loaded:
+                if os.path.exists(os.path.join(DEFAULT_GAZETTEER_DIR, 'lat.npy')):
+                    _default_gazetteer = Gazetteer(DEFAULT_GAZETTEER_DIR)
+                _default_gazetteer_loaded = True
+    return _default_gazetteer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PixelCast offline gazetteer tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Compile a GeoNames dump into an index")
+    build.add_argument('dump', help="GeoNames tab-separated place dump")
+    build.add_argument('directory', nargs='?', default=DEFAULT_GAZETTEER_DIR,
+                       help="Output directory for the index arrays")
+    build.add_argument('--min-population', type=int, default=0)
+    args = parser.parse_args()
+
+    count = build_gazetteer(args.dump, args.directory, args.min_population)
+    print(f"Indexed {count} places into {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Location lookups: offline gazetteer first, Nominatim as the fallback."""
+
+from typing import List, Optional, Tuple
+
+from . import instrumentation as timing
+from .gazetteer import get_gazetteer
+from .geocoding_client import get_geocoding_client
+
+class GeocodingService:
+    """Handle location geocoding using OpenStreetMap Nominatim API"""
+    
+    @staticmethod
+    @timing.timed('geocoding.geocode_location')
+    def geocode_location(location: str) -> Optional[Tuple[float, float, str]]:
+        """Geocode a location string to coordinates.
+
+        Returns None when nothing matches; raises GeocodingError when the
+        network geocoder cannot be reached.
+        """
+        # Offline gazetteer first, network only when it has no answer
+        gazetteer = get_gazetteer()
+        if gazetteer is not None:
+            result = gazetteer.geocode(location)
+            if result:
+                return result
+        
+        # Shared pooled, rate-limited and cached Nominatim client
+        return get_geocoding_client().geocode(location)
+    
+    @staticmethod
+    @timing.timed('geocoding.geocode_locations')
+    def geocode_locations(locations: List[str],
+                          max_network: Optional[int] = None) -> List[Optional[Tuple[float, float, str]]]:
+        """Geocode many location strings; unresolved entries come back as None.
+
+        The offline gazetteer answers first; at most ``max_network`` of the
+        remaining locations are sent to the network geocoder.
+        """
+        gazetteer = get_gazetteer()
+        results = [gazetteer.geocode(location) if gazetteer is not None else None
+                   for location in locations]
+        remaining = [i for i, result in enumerate(results) if result is None]
+        if max_network is not None:
+            remaining = remaining[:max_network]
+        if remaining:
+            found = get_geocoding_client().geocode_many([locations[i] for i in remaining])
+            for i, result in zip(remaining, found):
+                results[i] = result
+        return results
+    
+    @staticmethod
+    @timing.timed('geocoding.suggest_locations')
+    def suggest_locations(prefix: str, limit: int = 5) -> List[Tuple[float, float, str]]:
+        """Offline autocomplete suggestions for a partial location name"""
+        gazetteer = get_gazetteer()
+        if gazetteer is None:
+            return []
+        return gazetteer.autocomplete(prefix, limit)
+    
+    @staticmethod
+    @timing.timed('geocoding.reverse_geocode')
+    def reverse_geocode(lat: float, lon: float) -> Optional[str]:
+        """Name of the nearest known place to the given coordinates"""
+        gazetteer = get_gazetteer()
+        if gazetteer is None:
+            return None
+        result = gazetteer.reverse(lat, lon)
+        return result[2] if result else None
@@ -0,0 +1,202 @@
+"""Process-wide geocoding cache shared by every PixelCast session.
+
+Lookups hit an in-memory LRU first and fall back to a SQLite file, so results
+survive restarts and are shared between worker processes on the same host.
+Misses are cached too (with a shorter TTL) so bad queries don't hammer the
+upstream geocoder.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+GeocodeResult = Tuple[float, float, str]
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'PIXELCAST_GEOCODE_CACHE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'geocode_cache.sqlite3')
+)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a location query for use as a cache key"""
+    query = unicodedata.normalize('NFKC', query).casefold()
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+class GeocodeCache:
+    """Thread-safe LRU geocoding cache backed by a SQLite file"""
+
+    # Access times of memory-tier hits are written to disk in batches of
+    # this many, or at least this often, so the disk LRU sees hot entries
+    TOUCH_BATCH = 256
+    TOUCH_INTERVAL = 60.0
+    # Other processes insert into the same file; recount at least this often
+    RECOUNT_INSERTS = 1000
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS geocode (
+        key TEXT PRIMARY KEY,
+        lat REAL,
+        lon REAL,
+        display_name TEXT,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    )
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, ttl: float = 7 * 24 * 3600,
+                 negative_ttl: float = 3600, max_memory_entries: int = 10_000,
+                 max_disk_entries: int = 100_000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Tuple[Optional[GeocodeResult], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'evictions': 0}
+        self._touched: Dict[str, float] = {}
+        self._touched_flushed_at = time.time()
+        self._db = None
+        self._disk_entries = 0
+        self._inserts_since_count = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(self._SCHEMA)
+            (self._disk_entries,) = self._db.execute('SELECT COUNT(*) FROM geocode').fetchone()
+
+    def lookup(self, query: str) -> Tuple[bool, Optional[GeocodeResult]]:
+        """Return ``(found, result)``; a cached miss is ``(True, None)``"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._memory[key]
+                entry = None
+            if entry is None:
+                entry = self._load(key, now)
+                if entry is not None:
+                    self._remember(key, entry)
+            else:
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+
+            if entry is None:
+                self._counters['misses'] += 1
+                return False, None
+            self._counters['hits' if entry[0] is not None else 'negative_hits'] += 1
+            return True, entry[0]
+
+    def store(self, query: str, result: Optional[GeocodeResult]) -> None:
+        """Cache a result, or ``None`` to record that the query found nothing"""
+        key = normalize_query(query)
+        now = time.time()
+        expires_at = now + (self.ttl if result is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(key, (result, expires_at))
+            if self._db is not None:
+                lat, lon, display_name = result if result is not None else (None, None, None)
+                exists = self._db.execute('SELECT 1 FROM geocode WHERE key = ?', (key,)).fetchone()
+                self._db.execute(
+                    'INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, lat, lon, display_name, expires_at, now)
+                )
+                self._touched.pop(key, None)
+                if not exists:
+                    self._disk_entries += 1
+                    self._inserts_since_count += 1
+                    if (self._disk_entries > self.max_disk_entries
+                            or self._inserts_since_count >= self.RECOUNT_INSERTS):
+                        self._evict_disk(now)
+
+    def clear(self) -> None:
+        """Drop every cached entry from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM geocode')
+                self._disk_entries = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus current memory size"""
+        with self._lock:
+            return dict(self._counters, memory_entries=len(self._memory))
+
+    def _remember(self, key: str, entry: Tuple[Optional[GeocodeResult], float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def _load(self, key: str, now: float) -> Optional[Tuple[Optional[GeocodeResult], float]]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            'SELECT lat, lon, display_name, expires_at FROM geocode WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        lat, lon, display_name, expires_at = row
+        if expires_at <= now:
+            self._db.execute('DELETE FROM geocode WHERE key = ?', (key,))
+            return None
+        self._db.execute('UPDATE geocode SET accessed_at = ? WHERE key = ?', (now, key))
+        result = (lat, lon, display_name) if lat is not None else None
+        return result, expires_at
+
+    def _touch(self, key: str, now: float) -> None:
+        if self._db is None:
+            return
+        self._touched[key] = now
+        if len(self._touched) >= self.TOUCH_BATCH or now - self._touched_flushed_at >= self.TOUCH_INTERVAL:
+            self._flush_touched(now)
+
+    def _flush_touched(self, now: float) -> None:
+        if self._touched:
+            self._db.executemany('UPDATE geocode SET accessed_at = ? WHERE key = ?',
+                                 [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+        self._touched_flushed_at = now
+
+    def _evict_disk(self, now: float) -> None:
+        # The counter only tracks this process's inserts; recount before evicting
+        (self._disk_entries,) = self._db.execute('SELECT COUNT(*) FROM geocode').fetchone()
+        self._inserts_since_count = 0
+        if self._disk_entries <= self.max_disk_entries:
+            return
+        self._flush_touched(now)
+        self._db.execute('DELETE FROM geocode WHERE expires_at <= ?', (now,))
+        # Evict down to 90% so the next inserts don't each trigger eviction
+        target = int(self.max_disk_entries * 0.9)
+        self._db.execute(
+            'DELETE FROM geocode WHERE key IN ('
+            'SELECT key FROM geocode ORDER BY accessed_at LIMIT '
+            '(SELECT MAX(COUNT(*) - ?, 0) FROM geocode))',
+            (target,)
+        )
+        (self._disk_entries,) = self._db.execute('SELECT COUNT(*) FROM geocode').fetchone()
+
+
+_default_cache: Optional[GeocodeCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """Return the process-wide cache, creating it on first use"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = GeocodeCache()
+    return _default_cache
@@ -0,0 +1,183 @@
+"""Pooled, rate-limited Nominatim client shared by every PixelCast session.
+
+All lookups go through one keep-alive ``requests.Session`` and one token
+bucket, so the whole process stays within Nominatim's usage policy (one
+request per second) no matter how many users are searching. Identical
+queries that are already in flight share a single upstream call.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from .geocoding_cache import GeocodeCache, GeocodeResult, get_geocode_cache, normalize_query
+
+NOMINATIM_URL = os.environ.get('PIXELCAST_GEOCODER_URL', "https://nominatim.openstreetmap.org")
+# Requests per second across the whole process (Nominatim policy: 1/s)
+GEOCODER_RATE = float(os.environ.get('PIXELCAST_GEOCODER_RATE', 1.0))
+USER_AGENT = "PixelCast Weather App"
+# Longest a Retry-After header may stall a lookup, in seconds
+MAX_RETRY_WAIT = 30.0
+
+
+class GeocodingError(Exception):
+    """Raised when the geocoding backend cannot answer a query"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the time spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class GeocodingClient:
+    """Nominatim search client with pooling, rate limiting, retries and coalescing"""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url: str = NOMINATIM_URL, rate_limiter: Optional[TokenBucket] = None,
+                 cache: Optional[GeocodeCache] = None, timeout: float = 10.0,
+                 max_retries: int = 3, backoff: float = 0.5, pool_size: int = 8):
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter or TokenBucket(rate=GEOCODER_RATE)
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # requests is imported here rather than at module load so importing the
+        # package (and the app's first page) doesn't pay for it
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+    def geocode(self, query: str) -> Optional[GeocodeResult]:
+        """Geocode one query; ``None`` means the backend found nothing"""
+        if self.cache is not None:
+            found, cached_result = self.cache.lookup(query)
+            if found:
+                return cached_result
+
+        key = normalize_query(query)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._search(query)
+            if self.cache is not None:
+                # Cache misses too, so repeated bad queries skip the API
+                self.cache.store(query, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def geocode_many(self, queries: Iterable[str], max_concurrency: int = 4) -> List[Optional[GeocodeResult]]:
+        """Geocode many queries with bounded concurrency, preserving order.
+
+        Failed lookups come back as ``None`` rather than aborting the batch.
+        """
+        import requests
+
+        def safe_geocode(query: str) -> Optional[GeocodeResult]:
+            try:
+                return self.geocode(query)
+            except (GeocodingError, requests.RequestException):
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            return list(pool.map(safe_geocode, queries))
+
+    def _search(self, query: str) -> Optional[GeocodeResult]:
+        import requests
+        params = {
+            'q': query,
+            'format': 'json',
+            'limit': 1,
+            'addressdetails': 1
+        }
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(f"{self.base_url}/search", params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = e
+                continue
+            if response.status_code in self.RETRY_STATUSES:
+                last_error = GeocodingError(f"HTTP {response.status_code} from geocoder")
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    # Honour the server's hint, but never past our own backoff
+                    time.sleep(min(float(retry_after), self.backoff * 2 ** attempt, MAX_RETRY_WAIT))
+                continue
+            if response.status_code != 200:
+                raise GeocodingError(f"HTTP {response.status_code} from geocoder")
+
+            return self._parse(query, response)
+        raise GeocodingError(f"Geocoding failed after {self.max_retries + 1} attempts: {last_error}")
+
+    @staticmethod
+    def _parse(query: str, response) -> Optional[GeocodeResult]:
+        """First search hit, or None; an HTML error page or odd payload is a GeocodingError"""
+        try:
+            data = response.json()
+            if not data:
+                return None
+            result = data[0]
+            return float(result['lat']), float(result['lon']), result.get('display_name', query)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise GeocodingError(f"Malformed response from geocoder: {e}") from e
+
+
+_default_client: Optional[GeocodingClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_geocoding_client() -> GeocodingClient:
+    """Return the process-wide client, creating it on first use"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = GeocodingClient(cache=get_geocode_cache())
+    return _default_client
@@ -0,0 +1,326 @@
+"""Lightweight timing spans for PixelCast's hot paths.
+
+Timing is opt-in: set ``PIXELCAST_DEBUG_TIMING=1`` to collect spans, show the
+sidebar debug panel and (optionally) export metrics. When it is off,
+``span()`` hands back a shared no-op context manager and ``timed`` wrappers
+call straight through, so the cost is a single flag check.
+
+Spans are recorded per script rerun (the rerun runs on one thread, so the
+current rerun is thread-local), rolled up per session, and aggregated for the
+whole process. Each rerun is also attributed to the user interaction that
+caused it (``interaction()``, called from widget callbacks), and follow-up
+reruns requested with ``st.rerun()`` (``expect_rerun()``) are charged to the
+same interaction, so the reruns each kind of interaction costs can be read
+off ``interaction_summary()``. Exports:
+
+* ``PIXELCAST_METRICS_FILE``: Prometheus text exposition, rewritten each rerun
+* ``PIXELCAST_TIMING_LOG``: one JSON line appended per rerun
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from typing import Deque, Dict, List, Optional, Tuple
+
+ENABLED = os.environ.get('PIXELCAST_DEBUG_TIMING', '').lower() in ('1', 'true', 'yes')
+METRICS_FILE = os.environ.get('PIXELCAST_METRICS_FILE')
+TIMING_LOG = os.environ.get('PIXELCAST_TIMING_LOG')
+MAX_SESSIONS = 1000
+
+_NOOP = nullcontext()
+
+
+class SpanStats:
+    """Running count/total/max for one span name"""
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'count': self.count, 'total': self.total, 'max': self.max,
+                'mean': self.total / self.count if self.count else 0.0}
+
+
+class RerunTimings:
+    """Spans recorded during one script rerun"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall_time = time.time()
+        self.spans: List[Tuple[str, float]] = []
+        self.counts: Dict[str, int] = {}
+        self.interaction: Optional[str] = None
+        self.follow_up = False
+        self.duration: Optional[float] = None
+
+
+class InteractionStats:
+    """Interactions of one kind and the reruns they cost"""
+
+    __slots__ = ('count', 'reruns', 'max_reruns')
+
+    def __init__(self):
+        self.count = 0
+        self.reruns = 0
+        self.max_reruns = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'count': self.count, 'reruns': self.reruns, 'max_reruns': self.max_reruns,
+                'reruns_per_interaction': self.reruns / self.count if self.count else 0.0}
+
+
+class SessionTimings:
+    """Recent reruns and per-span totals for one session"""
+
+    def __init__(self, history: int = 50):
+        self.reruns: Deque[RerunTimings] = deque(maxlen=history)
+        self.totals: Dict[str, SpanStats] = {}
+        self.counts: Dict[str, int] = {}
+        self.interactions: Dict[str, InteractionStats] = {}
+        # The interaction follow-up reruns are charged to, and its reruns so far
+        self.current_interaction: Optional[str] = None
+        self.current_reruns = 0
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_process_totals: Dict[str, SpanStats] = {}
+_process_counts: Dict[str, int] = {}
+_process_interactions: Dict[str, InteractionStats] = {}
+_sessions: "OrderedDict[str, SessionTimings]" = OrderedDict()
+_rerun_count = 0
+
+
+def _record(name: str, seconds: float) -> None:
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun.spans.append((name, seconds))
+    with _lock:
+        _process_totals.setdefault(name, SpanStats()).add(seconds)
+
+
+@contextmanager
+def _timed_span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def span(name: str):
+    """Context manager timing a block under ``name`` (no-op when disabled)"""
+    if not ENABLED:
+        return _NOOP
+    return _timed_span(name)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function under ``name``"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add ``n`` to an event counter (no-op when disabled)"""
+    if not ENABLED:
+        return
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun.counts[name] = rerun.counts.get(name, 0) + n
+    with _lock:
+        _process_counts[name] = _process_counts.get(name, 0) + n
+
+
+def interaction(name: str) -> None:
+    """Attribute the current rerun to a user interaction.
+
+    Widget callbacks run on the script thread before the rerun starts, so a
+    label set there is carried into the next ``begin_rerun()``.
+    """
+    if not ENABLED:
+        return
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun.interaction = name
+    else:
+        _local.pending_interaction = name
+
+
+def expect_rerun() -> None:
+    """Charge the next rerun to the current interaction; call before ``st.rerun()``"""
+    if ENABLED:
+        _local.follow_up = True
+
+
+def begin_rerun() -> None:
+    """Start collecting spans for the script run on this thread"""
+    if ENABLED:
+        rerun = RerunTimings()
+        rerun.interaction = getattr(_local, 'pending_interaction', None)
+        rerun.follow_up = getattr(_local, 'follow_up', False)
+        _local.pending_interaction = None
+        _local.follow_up = False
+        _local.rerun = rerun
+
+
+def _charge_interaction(session: SessionTimings, rerun: RerunTimings) -> None:
+    """Count a rerun against its interaction, starting a new one unless it is a follow-up"""
+    if rerun.follow_up and rerun.interaction is None and session.current_interaction:
+        rerun.interaction = session.current_interaction
+        session.current_reruns += 1
+        new = False
+    else:
+        if rerun.interaction is None:
+            # Unlabelled reruns come from widgets without a callback
+            rerun.interaction = 'widget'
+        session.current_interaction = rerun.interaction
+        session.current_reruns = 1
+        new = True
+    for interactions in (session.interactions, _process_interactions):
+        stats = interactions.setdefault(rerun.interaction, InteractionStats())
+        if new:
+            stats.count += 1
+        stats.reruns += 1
+        stats.max_reruns = max(stats.max_reruns, session.current_reruns)
+
+
+def end_rerun(session_id: str) -> Optional[RerunTimings]:
+    """Finish the current rerun, fold it into the session and export it"""
+    global _rerun_count
+    rerun = getattr(_local, 'rerun', None)
+    if not ENABLED or rerun is None:
+        return None
+    _local.rerun = None
+    rerun.duration = time.perf_counter() - rerun.started
+
+    with _lock:
+        _rerun_count += 1
+        _process_totals.setdefault('rerun', SpanStats()).add(rerun.duration)
+        session = _sessions.setdefault(session_id, SessionTimings())
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        _charge_interaction(session, rerun)
+        session.reruns.append(rerun)
+        session.totals.setdefault('rerun', SpanStats()).add(rerun.duration)
+        for name, seconds in rerun.spans:
+            session.totals.setdefault(name, SpanStats()).add(seconds)
+        for name, n in rerun.counts.items():
+            session.counts[name] = session.counts.get(name, 0) + n
+
+    if TIMING_LOG:
+        with open(TIMING_LOG, 'a') as f:
+            f.write(json.dumps({
+                'time': rerun.wall_time,
+                'session': session_id,
+                'interaction': rerun.interaction,
+                'duration': rerun.duration,
+                'spans': [{'name': name, 'seconds': seconds} for name, seconds in rerun.spans],
+                'counts': rerun.counts,
+            }) + '\n')
+    if METRICS_FILE:
+        write_prometheus(METRICS_FILE)
+    return rerun
+
+
+def session_summary(session_id: str) -> Dict[str, Dict[str, float]]:
+    """Per-span totals for one session"""
+    with _lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            return {}
+        return {name: stats.as_dict() for name, stats in session.totals.items()}
+
+
+def process_summary() -> Dict[str, Dict[str, float]]:
+    """Per-span totals for the whole process"""
+    with _lock:
+        return {name: stats.as_dict() for name, stats in _process_totals.items()}
+
+
+def session_counts(session_id: str) -> Dict[str, int]:
+    """Event counters for one session"""
+    with _lock:
+        session = _sessions.get(session_id)
+        return dict(session.counts) if session else {}
+
+
+def process_counts() -> Dict[str, int]:
+    """Event counters for the whole process"""
+    with _lock:
+        return dict(_process_counts)
+
+
+def interaction_summary(session_id: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Interactions and reruns per interaction kind, for one session or the process"""
+    with _lock:
+        if session_id is None:
+            interactions = _process_interactions
+        else:
+            session = _sessions.get(session_id)
+            interactions = session.interactions if session else {}
+        return {name: stats.as_dict() for name, stats in interactions.items()}
+
+
+def prometheus_text() -> str:
+    """Process-wide span metrics in Prometheus text exposition format"""
+    with _lock:
+        lines = [
+            '# HELP pixelcast_reruns_total Script reruns observed',
+            '# TYPE pixelcast_reruns_total counter',
+            f'pixelcast_reruns_total {_rerun_count}',
+            '# HELP pixelcast_span_seconds Time spent in instrumented sections',
+            '# TYPE pixelcast_span_seconds summary',
+        ]
+        for name, stats in sorted(_process_totals.items()):
+            lines.append(f'pixelcast_span_seconds_sum{{span="{name}"}} {stats.total:.6f}')
+            lines.append(f'pixelcast_span_seconds_count{{span="{name}"}} {stats.count}')
+        lines.append('# HELP pixelcast_span_seconds_max Slowest observation per section')
+        lines.append('# TYPE pixelcast_span_seconds_max gauge')
+        for name, stats in sorted(_process_totals.items()):
+            lines.append(f'pixelcast_span_seconds_max{{span="{name}"}} {stats.max:.6f}')
+        lines.append('# HELP pixelcast_events_total Counted events')
+        lines.append('# TYPE pixelcast_events_total counter')
+        for name, n in sorted(_process_counts.items()):
+            lines.append(f'pixelcast_events_total{{event="{name}"}} {n}')
+        lines.append('# HELP pixelcast_interactions_total User interactions by kind')
+        lines.append('# TYPE pixelcast_interactions_total counter')
+        for name, stats in sorted(_process_interactions.items()):
+            lines.append(f'pixelcast_interactions_total{{interaction="{name}"}} {stats.count}')
+        lines.append('# HELP pixelcast_interaction_reruns_total Script reruns caused by each kind of interaction')
+        lines.append('# TYPE pixelcast_interaction_reruns_total counter')
+        for name, stats in sorted(_process_interactions.items()):
+            lines.append(f'pixelcast_interaction_reruns_total{{interaction="{name}"}} {stats.reruns}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path: str) -> None:
+    """Atomically rewrite a Prometheus textfile-collector file"""
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
@@ -0,0 +1,288 @@
+"""Forecast overview generation for the "AI Overview" card.
+
+An engine turns the computed forecast, activity and best time window into a
+short summary followed by recommendations, streamed line by line. The
+rule-based engine needs nothing but the forecast; ``ModelEngine`` sends a
+prompt to a pluggable text-generation backend (``StubModelBackend`` streams
+locally for testing) and falls back to the rules on timeout or error.
+
+Generation runs on a background event loop. ``OverviewService.request``
+returns immediately with an ``OverviewJob`` whose text fills in as chunks
+arrive, and jobs are memoized per (location, dates, window, activity) with
+LRU eviction, so a rerun never waits on or repeats generation. Failed jobs
+are evicted so they are retried on the next request. Select the
+engine with ``PIXELCAST_OVERVIEW_ENGINE`` (default ``rules``).
+"""
+
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from . import instrumentation as timing
+
+OVERVIEW_ENGINE = os.environ.get('PIXELCAST_OVERVIEW_ENGINE', 'rules')
+# Seconds a model backend gets before the rule-based overview is used instead
+OVERVIEW_TIMEOUT = float(os.environ.get('PIXELCAST_OVERVIEW_TIMEOUT', 10.0))
+
+
+class OverviewRequest(NamedTuple):
+    location: str
+    # date -> daily forecast, as in st.session_state.weather_data
+    weather_data: Dict[str, Dict[str, float]]
+    activity: Optional[str] = None
+    best_window: Optional[str] = None
+
+
+def _day_label(date_str: str) -> str:
+    return datetime.strptime(date_str, "%Y-%m-%d").strftime("%a %d")
+
+
+def _days_where(weather_data: Dict[str, Dict[str, float]], metric: str, threshold: float) -> List[str]:
+    return [_day_label(day) for day, weather in sorted(weather_data.items()) if weather[metric] >= threshold]
+
+
+def rule_based_lines(request: OverviewRequest) -> List[str]:
+    """Summary line followed by recommendations, derived from the forecast"""
+    days = [request.weather_data[day] for day in sorted(request.weather_data)]
+    temperatures = [day['temperature'] for day in days]
+    mean_temperature = sum(temperatures) / len(temperatures)
+    total_rain = sum(day['precipitation'] for day in days)
+    max_wind = max(day['wind_speed'] for day in days)
+    max_uv = max(day['uv_index'] for day in days)
+    mean_humidity = sum(day['humidity'] for day in days) / len(days)
+
+    span = f"{len(days)}-day outlook" if len(days) > 1 else "Outlook"
+    lines = [f"{span} for {request.location}: {min(temperatures):.0f}–{max(temperatures):.0f}°C "
+             f"with {total_rain:.1f} mm of rain in total."]
+
+    if mean_temperature < 5:
+        lines.append("Cold conditions - dress in warm layers")
+    elif mean_temperature < 15:
+        lines.append("Cool temperatures - bring a jacket")
+    elif mean_temperature < 25:
+        lines.append("Temperature looks comfortable for outdoor activities")
+    elif mean_temperature < 30:
+        lines.append("Warm days ahead - stay hydrated")
+    else:
+        lines.append("Hot conditions - avoid strenuous activity at midday")
+
+    rainy_days = _days_where(request.weather_data, 'precipitation', 1.0)
+    if rainy_days:
+        lines.append(f"Rain expected on {', '.join(rainy_days)} - consider bringing an umbrella")
+    else:
+        lines.append("Mostly dry - no umbrella needed")
+
+    if max_wind >= 30:
+        lines.append(f"Strong winds on {', '.join(_days_where(request.weather_data, 'wind_speed', 30))} "
+                     f"- secure loose items")
+    elif max_wind >= 20:
+        lines.append("Breezy at times - watch out when cycling")
+    else:
+        lines.append("Light winds throughout")
+
+    if max_uv >= 8:
+        lines.append("Very high UV - sunscreen and shade are essential")
+    elif max_uv >= 6:
+        lines.append("High UV levels - sunscreen recommended")
+    elif max_uv >= 3:
+        lines.append("UV levels are moderate - sunscreen recommended for long exposure")
+
+    if mean_humidity >= 80:
+        lines.append("Humid air - it will feel warmer than the thermometer says")
+
+    if request.activity and request.best_window:
+        lines.append(f"Best time for {request.activity.lower()}: {request.best_window}")
+    elif request.activity:
+        lines.append(f"Check the hourly outlook to plan your {request.activity.lower()}")
+    return lines
+
+
+def build_prompt(request: OverviewRequest) -> str:
+    """Prompt for model backends: the forecast table plus what to produce"""
+    rows = "\n".join(
+        f"{day}: {weather['temperature']}°C, {weather['precipitation']} mm rain, "
+        f"{weather['humidity']}% humidity, {weather['wind_speed']} km/h wind, "
+        f"UV {weather['uv_index']}, {weather['cloud_cover']}% cloud"
+        for day, weather in sorted(request.weather_data.items())
+    )
+    activity = f"The user is planning: {request.activity}.\n" if request.activity else ""
+    best = f"Most comfortable window: {request.best_window}.\n" if request.best_window else ""
+    return (f"Daily forecast for {request.location}:\n{rows}\n{activity}{best}"
+            "Write a one-sentence summary on the first line, then up to six short, "
+            "practical recommendations, one per line.")
+
+
+class OverviewEngine(ABC):
+    """Base class for overview generators"""
+
+    name = 'base'
+
+    @abstractmethod
+    def stream(self, request: OverviewRequest) -> AsyncIterator[str]:
+        """Yield the overview as text chunks; lines are separated by newlines"""
+
+
+class RuleBasedEngine(OverviewEngine):
+    name = 'rules'
+
+    async def stream(self, request: OverviewRequest) -> AsyncIterator[str]:
+        for line in rule_based_lines(request):
+            yield line + "\n"
+
+
+class ModelBackend(ABC):
+    """Text-generation backend used by ModelEngine.
+
+    Real backends send ``prompt`` to a model; ``request`` is there for
+    backends that need structured access to the forecast.
+    """
+
+    @abstractmethod
+    def stream(self, prompt: str, request: OverviewRequest) -> AsyncIterator[str]:
+        """Yield generated text chunks for ``prompt``"""
+
+
+class StubModelBackend(ModelBackend):
+    """Local stand-in for a model: streams the rule-based text word by word"""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+
+    async def stream(self, prompt: str, request: OverviewRequest) -> AsyncIterator[str]:
+        for line in rule_based_lines(request):
+            words = line.split(' ')
+            for i, word in enumerate(words):
+                await asyncio.sleep(self.latency)
+                yield word + (' ' if i < len(words) - 1 else '\n')
+
+
+class ModelEngine(OverviewEngine):
+    """Prompted model backend with a rule-based fallback"""
+
+    def __init__(self, backend: ModelBackend, timeout: float = OVERVIEW_TIMEOUT):
+        self.backend = backend
+        self.timeout = timeout
+        self.name = type(backend).__name__
+
+    async def stream(self, request: OverviewRequest) -> AsyncIterator[str]:
+        chunks = self.backend.stream(build_prompt(request), request).__aiter__()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        produced = False
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    return
+                produced = True
+                yield chunk
+        except Exception:
+            if produced:
+                # Keep what already streamed; just close the line cleanly
+                yield "\n"
+                return
+            async for chunk in RuleBasedEngine().stream(request):
+                yield chunk
+        finally:
+            if hasattr(chunks, 'aclose'):
+                await chunks.aclose()
+
+
+ENGINES: Dict[str, Callable[[], OverviewEngine]] = {
+    'rules': RuleBasedEngine,
+    'stub': lambda: ModelEngine(StubModelBackend()),
+}
+
+
+def register_engine(name: str, factory: Callable[[], OverviewEngine]) -> None:
+    """Make an engine selectable through ``PIXELCAST_OVERVIEW_ENGINE``"""
+    ENGINES[name] = factory
+
+
+class OverviewJob:
+    """Overview text that fills in as the engine streams it"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.error: Optional[str] = None
+        self._finished = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block up to ``timeout`` seconds for generation to finish"""
+        return self._finished.wait(timeout)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.chunks)
+
+    @property
+    def lines(self) -> List[str]:
+        return [line for line in self.text.split('\n') if line.strip()]
+
+
+class OverviewService:
+    """Runs engines on a background loop and memoizes their jobs"""
+
+    def __init__(self, engine: OverviewEngine, max_entries: int = 256):
+        self.engine = engine
+        self.max_entries = max_entries
+        self._jobs: "OrderedDict[Hashable, OverviewJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.loop.run_forever, name='pixelcast-overview', daemon=True)
+        thread.start()
+
+    def request(self, key: Hashable, request: OverviewRequest) -> OverviewJob:
+        """Cached job for ``key``, starting generation on a miss; never blocks"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+                return job
+            job = OverviewJob()
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+        asyncio.run_coroutine_threadsafe(self._generate(key, job, request), self.loop)
+        return job
+
+    async def _generate(self, key: Hashable, job: OverviewJob, request: OverviewRequest) -> None:
+        with timing.span('overview.generate'):
+            try:
+                async for chunk in self.engine.stream(request):
+                    job.chunks.append(chunk)
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                # Drop the failed job so the next request retries instead of
+                # every session seeing the cached error
+                with self._lock:
+                    if self._jobs.get(key) is job:
+                        del self._jobs[key]
+            finally:
+                job._finished.set()
+
+
+_default_service: Optional[OverviewService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_overview_service() -> OverviewService:
+    """Return the process-wide overview service, creating it on first use"""
+    global _default_service
+    if _default_service is None:
+        with _default_service_lock:
+            if _default_service is None:
+                factory = ENGINES.get(OVERVIEW_ENGINE)
+                if factory is None:
+                    raise ValueError(f"unknown overview engine: {OVERVIEW_ENGINE}")
+                _default_service = OverviewService(factory())
+    return _default_service
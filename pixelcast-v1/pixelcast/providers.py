@@ -0,0 +1,237 @@
+"""Pluggable forecast providers.
+
+A provider answers ``fetch_range(location, dates, window)`` asynchronously.
+The base class fetches the days of a range concurrently, so a backend that
+only exposes a per-day endpoint still costs one round trip per range rather
+than one per day; backends with a native range or batch API override
+``fetch_range`` directly.
+
+All providers run on one background event loop shared by every session.
+``CoalescingProvider`` sits on top of the configured provider so concurrent
+requests for the same (location, date, window) share a single upstream call.
+Select the provider with ``PIXELCAST_FORECAST_PROVIDER`` (default ``stub``).
+"""
+
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import instrumentation as timing
+from .weather import WeatherDataGenerator
+
+Location = Tuple[float, float]
+
+FORECAST_PROVIDER = os.environ.get('PIXELCAST_FORECAST_PROVIDER', 'stub')
+# Seconds a synchronous caller waits for a whole range
+PROVIDER_TIMEOUT = float(os.environ.get('PIXELCAST_PROVIDER_TIMEOUT', 30.0))
+
+
+class ProviderError(Exception):
+    """Raised when a forecast provider cannot answer a request"""
+
+
+class TimeWindow(NamedTuple):
+    """Intraday window for hourly series, as ``HH:MM`` strings"""
+    start_time: str
+    end_time: str
+    step_minutes: int = 60
+
+
+class DayForecast(NamedTuple):
+    """One day at one location: daily summary plus intraday series"""
+    daily: Dict[str, float]
+    hourly: np.ndarray  # (steps, len(WeatherDataGenerator.METRICS)) float32
+
+
+def _day_key(day) -> str:
+    return str(np.datetime64(day, 'D'))
+
+
+class ForecastProvider(ABC):
+    """Base class for forecast backends.
+
+    Subclasses implement ``fetch_day``, and also override ``fetch_range`` when
+    the backend can answer a whole range in one call.
+    """
+
+    name = 'base'
+    # Upper bound on concurrent per-day requests issued by fetch_range
+    max_concurrency = 16
+
+    @abstractmethod
+    async def fetch_day(self, location: Location, day: date, window: TimeWindow) -> DayForecast:
+        """Forecast for one day at one location"""
+
+    async def fetch_range(self, location: Location, dates: Sequence[date],
+                          window: TimeWindow) -> List[DayForecast]:
+        """Forecasts for ``dates`` in order, fetched concurrently"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(day: date) -> DayForecast:
+            async with semaphore:
+                return await self.fetch_day(location, day, window)
+
+        return list(await asyncio.gather(*(fetch(day) for day in dates)))
+
+
+class LocalStubProvider(ForecastProvider):
+    """In-process provider backed by the deterministic mock generator.
+
+    ``latency`` simulates a network round trip per call, which is handy for
+    exercising concurrency and coalescing without a real backend.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    async def fetch_range(self, location: Location, dates: Sequence[date],
+                          window: TimeWindow) -> List[DayForecast]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not dates:
+            return []
+        lat, lon = location
+        batch = WeatherDataGenerator.generate_batch(lat, lon, dates)
+        hourly = WeatherDataGenerator.generate_hourly_series(
+            lat, lon, dates, window.start_time, window.end_time, window.step_minutes
+        )
+        return [
+            DayForecast({metric: float(values[i]) for metric, values in batch.items()}, hourly[i])
+            for i in range(len(dates))
+        ]
+
+    async def fetch_day(self, location: Location, day: date, window: TimeWindow) -> DayForecast:
+        return (await self.fetch_range(location, [day], window))[0]
+
+
+class CoalescingProvider(ForecastProvider):
+    """Share in-flight upstream calls for the same (location, date, window).
+
+    Days another request is already fetching are awaited rather than
+    requested again; the remaining days go upstream in one ``fetch_range``
+    call. Must only be used from a single event loop.
+    """
+
+    def __init__(self, provider: ForecastProvider):
+        self.provider = provider
+        self.name = provider.name
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.upstream_calls = 0
+        self.coalesced_days = 0
+
+    async def fetch_range(self, location: Location, dates: Sequence[date],
+                          window: TimeWindow) -> List[DayForecast]:
+        loop = asyncio.get_running_loop()
+        keys = [(location, _day_key(day), window) for day in dates]
+        futures: List[asyncio.Future] = []
+        owned: Dict[tuple, asyncio.Future] = {}
+        new_dates = []
+        for key, day in zip(keys, dates):
+            future = self._in_flight.get(key) or owned.get(key)
+            if future is None:
+                future = loop.create_future()
+                owned[key] = future
+                new_dates.append(day)
+            else:
+                self.coalesced_days += 1
+            futures.append(future)
+
+        if owned:
+            for key, future in owned.items():
+                self._in_flight[key] = future
+            self.upstream_calls += 1
+            # The upstream call runs as its own task so a caller that gives up
+            # (timeout, closed session) doesn't cancel it for everyone else
+            loop.create_task(self._fetch_upstream(location, new_dates, window, owned))
+
+        return [await asyncio.shield(future) for future in futures]
+
+    async def _fetch_upstream(self, location: Location, dates: List[date], window: TimeWindow,
+                              owned: Dict[tuple, asyncio.Future]) -> None:
+        try:
+            results = await self.provider.fetch_range(location, dates, window)
+            if len(results) != len(dates):
+                raise ProviderError(f"{self.name} provider returned {len(results)} forecasts "
+                                    f"for {len(dates)} days")
+            for future, result in zip(owned.values(), results):
+                future.set_result(result)
+        except Exception as e:
+            self._fail(owned, e)
+        finally:
+            # Cancellation skips the handler above; never leave a waiter hanging
+            self._fail(owned, ProviderError(f"{self.name} provider fetch was cancelled"))
+            for key in owned:
+                del self._in_flight[key]
+
+    @staticmethod
+    def _fail(owned: Dict[tuple, asyncio.Future], error: BaseException) -> None:
+        for future in owned.values():
+            if not future.done():
+                future.set_exception(error)
+                # Waiters re-raise it; don't warn when nobody is left waiting
+                future.exception()
+
+    async def fetch_day(self, location: Location, day: date, window: TimeWindow) -> DayForecast:
+        return (await self.fetch_range(location, [day], window))[0]
+
+
+PROVIDERS: Dict[str, Callable[[], ForecastProvider]] = {
+    'stub': LocalStubProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[[], ForecastProvider]) -> None:
+    """Make a provider selectable through ``PIXELCAST_FORECAST_PROVIDER``"""
+    PROVIDERS[name] = factory
+
+
+class ProviderRunner:
+    """Background event loop that runs provider calls for synchronous callers"""
+
+    def __init__(self, provider: ForecastProvider):
+        self.provider = CoalescingProvider(provider)
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.loop.run_forever, name='pixelcast-providers', daemon=True)
+        thread.start()
+
+    @timing.timed('providers.fetch_range')
+    def fetch_range(self, location: Location, dates: Sequence[date], window: TimeWindow,
+                    timeout: float = PROVIDER_TIMEOUT) -> List[DayForecast]:
+        """Blocking ``fetch_range`` on the shared loop"""
+        future = asyncio.run_coroutine_threadsafe(
+            self.provider.fetch_range(location, list(dates), window), self.loop
+        )
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ProviderError(f"{self.provider.name} provider timed out after {timeout:g}s")
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(f"{self.provider.name} provider failed: {e}") from e
+
+
+_default_runner: Optional[ProviderRunner] = None
+_default_runner_lock = threading.Lock()
+
+
+def get_provider_runner() -> ProviderRunner:
+    """Return the process-wide provider runner, creating it on first use"""
+    global _default_runner
+    if _default_runner is None:
+        with _default_runner_lock:
+            if _default_runner is None:
+                factory = PROVIDERS.get(FORECAST_PROVIDER)
+                if factory is None:
+                    raise ProviderError(f"unknown forecast provider: {FORECAST_PROVIDER}")
+                _default_runner = ProviderRunner(factory())
+    return _default_runner
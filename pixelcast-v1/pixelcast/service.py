@@ -0,0 +1,327 @@
+"""Headless HTTP/JSON forecast and geocoding service.
+
+Serves the PixelCast core over plain asyncio streams so other systems can
+fetch forecasts in bulk without a Streamlit session in the path::
+
+    python -m pixelcast.service --port 8600
+
+Endpoints:
+
+* ``GET  /healthz``
+* ``GET  /v1/forecast?lat=&lon=&start=YYYY-MM-DD&end=YYYY-MM-DD``
+  (add ``start_time``/``end_time``/``step_minutes`` for hourly series)
+* ``POST /v1/forecast`` with ``{"lats": [...], "lons": [...], "dates": [...]}``;
+  the three arrays are broadcast against each other and an optional
+  ``"hourly": {"start_time", "end_time", "step_minutes"}`` adds intraday series
+* ``GET  /v1/geocode?q=`` and ``POST /v1/geocode`` with ``{"queries": [...]}``
+* ``GET  /v1/reverse?lat=&lon=``
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .geocoding import GeocodingService
+from .geocoding_client import GeocodingError
+from .weather import WeatherDataGenerator
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_POINTS = 1_000_000
+MAX_RANGE_DAYS = 366
+MAX_GEOCODE_QUERIES = 100
+# Batches producing more values (points x hourly steps) are computed off the event loop
+INLINE_VALUES = 10_000
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 502: 'Bad Gateway'}
+
+
+class HTTPError(Exception):
+    """Error with an HTTP status, reported to the client as JSON"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(query: Dict[str, list], name: str, default: Optional[str] = None) -> str:
+    values = query.get(name)
+    if values:
+        return values[0]
+    if default is None:
+        raise HTTPError(400, f"missing parameter: {name}")
+    return default
+
+
+def _float_param(query: Dict[str, list], name: str) -> float:
+    try:
+        return float(_param(query, name))
+    except ValueError:
+        raise HTTPError(400, f"invalid number for {name}")
+
+
+def _check_coords(lats, lons) -> None:
+    """Reject NaN, infinite and out-of-range coordinates"""
+    with np.errstate(invalid='ignore'):
+        if not np.all(np.abs(lats) <= 90):
+            raise HTTPError(400, "latitudes must be finite and within [-90, 90]")
+        if not np.all(np.abs(lons) <= 180):
+            raise HTTPError(400, "longitudes must be finite and within [-180, 180]")
+
+
+def _hourly_params(hourly) -> Tuple[str, str, int]:
+    """Validated ``(start_time, end_time, step_minutes)`` from an hourly request"""
+    if not isinstance(hourly, dict):
+        raise HTTPError(400, "hourly must be an object")
+    start_time = hourly.get('start_time', '00:00')
+    end_time = hourly.get('end_time', '23:00')
+    if not isinstance(start_time, str) or not isinstance(end_time, str):
+        raise HTTPError(400, "start_time and end_time must be HH:MM strings")
+    try:
+        step_minutes = int(hourly.get('step_minutes', 60))
+    except (TypeError, ValueError):
+        raise HTTPError(400, "step_minutes must be an integer")
+    return start_time, end_time, step_minutes
+
+
+def _value_count(points: int, hourly) -> int:
+    """Forecast values a request asks for: points, times the hourly steps if any"""
+    if hourly is None:
+        return points
+    start_time, end_time, step_minutes = _hourly_params(hourly)
+    try:
+        return points * len(WeatherDataGenerator.time_steps(start_time, end_time, step_minutes))
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+
+async def _forecast(lats, lons, dates, hourly: Optional[Dict] = None) -> Dict:
+    """``forecast_batch`` inline for small requests, on the default executor otherwise"""
+    try:
+        points = np.broadcast(lats, lons, dates).size
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, f"invalid forecast request: {e}")
+    if _value_count(points, hourly) <= INLINE_VALUES:
+        return forecast_batch(lats, lons, dates, hourly)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, forecast_batch, lats, lons, dates, hourly)
+
+
+def _geocode_json(result) -> Optional[Dict]:
+    if result is None:
+        return None
+    lat, lon, display_name = result
+    return {'lat': lat, 'lon': lon, 'display_name': display_name}
+
+
+def forecast_batch(lats, lons, dates, hourly: Optional[Dict] = None) -> Dict:
+    """Columnar JSON-ready forecast for broadcast (lats, lons, dates)"""
+    try:
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        shape = np.broadcast_shapes(lats.shape, lons.shape, dates.shape)
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, f"invalid forecast request: {e}")
+    _check_coords(lats, lons)
+    if int(np.prod(shape)) > MAX_POINTS:
+        raise HTTPError(413, f"at most {MAX_POINTS} points per request")
+    if hourly is not None:
+        start_time, end_time, step_minutes = _hourly_params(hourly)
+        try:
+            minutes = WeatherDataGenerator.time_steps(start_time, end_time, step_minutes)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        if int(np.prod(shape)) * len(minutes) > MAX_POINTS:
+            raise HTTPError(413, f"at most {MAX_POINTS} hourly values per request")
+
+    daily = WeatherDataGenerator.generate_batch(lats, lons, dates)
+    response = {
+        'shape': list(shape),
+        'metrics': list(WeatherDataGenerator.METRICS),
+        'daily': {metric: values.tolist() for metric, values in daily.items()},
+    }
+    if hourly is not None:
+        series = WeatherDataGenerator.generate_hourly_series(
+            lats, lons, dates, start_time, end_time, step_minutes
+        )
+        response['hourly'] = {
+            'times': [f"{int(m) // 60:02d}:{int(m) % 60:02d}" for m in minutes],
+            # float32 -> float64 first so the JSON carries the rounded value, not float32 noise
+            'values': np.round(series.astype(np.float64), 2).tolist(),
+        }
+    return response
+
+
+class ForecastService:
+    """Request router for the headless service"""
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, Dict]:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        routes = {
+            '/healthz': {'GET': self.health},
+            '/v1/forecast': {'GET': self.get_forecast, 'POST': self.post_forecast},
+            '/v1/geocode': {'GET': self.get_geocode, 'POST': self.post_geocode},
+            '/v1/reverse': {'GET': self.get_reverse},
+        }
+        handlers = routes.get(url.path)
+        if handlers is None:
+            raise HTTPError(404, f"no route for {url.path}")
+        handler = handlers.get(method)
+        if handler is None:
+            raise HTTPError(405, f"{method} not allowed on {url.path}")
+        if method == 'POST':
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise HTTPError(400, "request body must be JSON")
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "request body must be a JSON object")
+            return 200, await handler(payload)
+        return 200, await handler(query)
+
+    async def health(self, query) -> Dict:
+        return {'status': 'ok'}
+
+    async def get_forecast(self, query) -> Dict:
+        lat, lon = _float_param(query, 'lat'), _float_param(query, 'lon')
+        try:
+            start = date.fromisoformat(_param(query, 'start', date.today().isoformat()))
+            end = date.fromisoformat(_param(query, 'end', start.isoformat()))
+        except ValueError:
+            raise HTTPError(400, "dates must be YYYY-MM-DD")
+        days = (end - start).days + 1
+        if not 0 < days <= MAX_RANGE_DAYS:
+            raise HTTPError(400, f"date range must cover 1 to {MAX_RANGE_DAYS} days")
+        dates = [start + timedelta(days=i) for i in range(days)]
+        hourly = None
+        if 'start_time' in query or 'end_time' in query:
+            hourly = {
+                'start_time': _param(query, 'start_time', '00:00'),
+                'end_time': _param(query, 'end_time', '23:00'),
+                'step_minutes': _param(query, 'step_minutes', '60'),
+            }
+        response = await _forecast(lat, lon, dates, hourly)
+        response['dates'] = [d.isoformat() for d in dates]
+        return response
+
+    async def post_forecast(self, payload: Dict) -> Dict:
+        try:
+            lats, lons, dates = payload['lats'], payload['lons'], payload['dates']
+        except KeyError as e:
+            raise HTTPError(400, f"missing field: {e.args[0]}")
+        return await _forecast(lats, lons, dates, payload.get('hourly'))
+
+    async def get_geocode(self, query) -> Dict:
+        location = _param(query, 'q')
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(None, GeocodingService.geocode_location, location)
+        except GeocodingError as e:
+            raise HTTPError(502, str(e))
+        return {'query': location, 'result': _geocode_json(result)}
+
+    async def post_geocode(self, payload: Dict) -> Dict:
+        queries = payload.get('queries')
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            raise HTTPError(400, "queries must be a list of strings")
+        # Misses go to the rate-limited network geocoder, so keep batches short
+        if len(queries) > MAX_GEOCODE_QUERIES:
+            raise HTTPError(413, f"at most {MAX_GEOCODE_QUERIES} queries per request")
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, GeocodingService.geocode_locations, queries)
+        return {'results': [_geocode_json(result) for result in results]}
+
+    async def get_reverse(self, query) -> Dict:
+        lat, lon = _float_param(query, 'lat'), _float_param(query, 'lon')
+        _check_coords(lat, lon)
+        return {'lat': lat, 'lon': lon, 'display_name': GeocodingService.reverse_geocode(lat, lon)}
+
+
+async def _handle_connection(service: ForecastService, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = (headers.get('connection', '').lower() != 'close'
+                          and version == 'HTTP/1.1')
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            try:
+                if length < 0:
+                    # The body can't be skipped, so the connection can't be reused
+                    keep_alive = False
+                    raise HTTPError(400, "invalid Content-Length")
+                if length > MAX_BODY_BYTES:
+                    raise HTTPError(413, "request body too large")
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await service.handle(method, target, body)
+            except HTTPError as e:
+                status, payload = e.status, {'error': str(e)}
+                keep_alive = keep_alive and e.status != 413
+            except Exception as e:
+                status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+
+            data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                + data
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8600) -> None:
+    """Run the service until cancelled"""
+    service = ForecastService()
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(service, reader, writer), host, port
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PixelCast headless forecast service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    args = parser.parse_args()
+    print(f"PixelCast service listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
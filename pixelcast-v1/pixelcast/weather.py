@@ -0,0 +1,243 @@
+"""Deterministic mock weather generation.
+
+Every forecast is a pure function of (lat, lon, date), drawn from a
+counter-based random stream, so results are reproducible, thread-safe and
+cheap to compute for large batches in a single vectorized pass. Baselines
+come from the monthly normals in ``climatology``; the random draws are the
+day's departure from them.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from . import instrumentation as timing
+from .climatology import get_climatology
+
+# Counter-based random stream used by WeatherDataGenerator. Every draw is a
+# pure function of (seed, stream index), so forecasts never touch the global
+# NumPy RNG and whole batches can be generated in a single vectorized pass.
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+# Coordinates are quantized to 1e-4 degrees (about 11 m) before keying
+_COORD_SCALE = 10_000
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer applied elementwise to a uint64 array"""
+    with np.errstate(over='ignore'):
+        z = x + _GOLDEN_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * _MIX_1
+        z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+def _counter_uniform(keys: np.ndarray, stream: int) -> np.ndarray:
+    """Uniform draws in [0, 1) for each key at the given stream index"""
+    with np.errstate(over='ignore'):
+        bits = _splitmix64(_splitmix64(keys) + np.uint64(stream))
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _counter_normal(keys: np.ndarray, stream: int, loc: float, scale: float) -> np.ndarray:
+    """Box-Muller normal draws consuming streams ``stream`` and ``stream + 1``"""
+    u1 = _counter_uniform(keys, stream)
+    u2 = _counter_uniform(keys, stream + 1)
+    radius = np.sqrt(-2.0 * np.log1p(-u1))
+    return loc + scale * radius * np.cos(2.0 * np.pi * u2)
+
+
+def _counter_exponential(keys: np.ndarray, stream: int, scale: float) -> np.ndarray:
+    """Exponential draws with the given scale"""
+    return -scale * np.log1p(-_counter_uniform(keys, stream))
+
+
+def _point_keys(lats: np.ndarray, lons: np.ndarray, ordinals: np.ndarray) -> np.ndarray:
+    """RNG key per (lat, lon, day), mixing each component in separately.
+
+    Folding the quantized parts in one at a time through SplitMix64 keeps
+    swapped coordinates, points on a diagonal and neighbouring days apart.
+    """
+    q_lat = np.round(lats * _COORD_SCALE).astype(np.int64).view(np.uint64)
+    q_lon = np.round(lons * _COORD_SCALE).astype(np.int64).view(np.uint64)
+    days = ordinals.astype(np.int64).view(np.uint64)
+    return _splitmix64(_splitmix64(_splitmix64(q_lat) ^ q_lon) ^ days)
+
+
+def _date_ordinals(dates) -> np.ndarray:
+    """Convert dates, datetimes or datetime64 values to proleptic ordinals"""
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    return days + _EPOCH_ORDINAL
+
+
+def _parse_hhmm(value: str) -> int:
+    """Convert an ``HH:MM`` string to minutes after midnight"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class WeatherDataGenerator:
+    """Generate deterministic mock weather data"""
+
+    METRICS = ('temperature', 'precipitation', 'humidity',
+               'wind_speed', 'uv_index', 'cloud_cover')
+
+    # Streams used for the intraday harmonics, kept clear of the daily draws
+    _HOURLY_STREAM = 16
+
+    @staticmethod
+    def _daily_base(lats, lons, dates):
+        """Unrounded daily values plus the per-point RNG keys"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        ordinals = _date_ordinals(dates)
+        # Before broadcasting, so each location is interpolated once per month
+        normals = get_climatology().sample(lats, lons, ordinals - _EPOCH_ORDINAL)
+        lats, lons, ordinals = np.broadcast_arrays(lats, lons, ordinals)
+
+        # Deterministic key based on coordinates and date
+        keys = _point_keys(lats, lons, ordinals)
+
+        # Climate normals for the place and time of year, plus the day's weather
+        base_temp = normals['temperature'] + _counter_normal(keys, 0, 0, 3)
+        base_humidity = normals['humidity'] + _counter_normal(keys, 2, 0, 10)
+        base_wind = 5 + _counter_exponential(keys, 4, 3)
+        base_uv = np.clip(normals['uv_index'] + _counter_normal(keys, 5, 0, 1), 0, 11)
+
+        daily = {
+            'temperature': base_temp,
+            'precipitation': _counter_exponential(keys, 7, 1.0) * normals['precipitation'],
+            'humidity': np.clip(base_humidity, 0, 100),
+            'wind_speed': base_wind,
+            'uv_index': base_uv,
+            'cloud_cover': np.clip(normals['cloud_cover'] + (_counter_uniform(keys, 8) - 0.5) * 60, 0, 100)
+        }
+        return daily, keys
+
+    @staticmethod
+    @timing.timed('generator.generate_batch')
+    def generate_batch(lats, lons, dates) -> Dict[str, np.ndarray]:
+        """Generate mock weather data for many (lat, lon, date) points at once.
+
+        Inputs are broadcast against each other, so a single location can be
+        paired with a range of dates or vice versa. Returns a column per
+        metric in ``METRICS``, each a float64 array of the broadcast shape.
+        """
+        daily, _ = WeatherDataGenerator._daily_base(lats, lons, dates)
+        return {metric: np.round(values, 1) for metric, values in daily.items()}
+
+    @staticmethod
+    @timing.timed('generator.generate_weather_data')
+    def generate_weather_data(lat: float, lon: float, date: datetime, 
+                            start_time: str, end_time: str) -> Dict:
+        """Generate mock weather data based on location and time"""
+        batch = WeatherDataGenerator.generate_batch(lat, lon, date)
+        return {metric: float(values) for metric, values in batch.items()}
+
+    @staticmethod
+    def time_steps(start_time: str, end_time: str, step_minutes: int = 60) -> np.ndarray:
+        """Minutes after midnight of each step in the inclusive time window"""
+        if step_minutes <= 0:
+            raise ValueError("step_minutes must be positive")
+        start, end = _parse_hhmm(start_time), _parse_hhmm(end_time)
+        if start > end:
+            raise ValueError("start_time must not be after end_time")
+        return np.arange(start, end + 1, step_minutes, dtype=np.float64)
+
+    @staticmethod
+    @timing.timed('generator.generate_hourly_series')
+    def generate_hourly_series(lats, lons, dates, start_time: str, end_time: str,
+                               step_minutes: int = 60) -> np.ndarray:
+        """Generate an intraday series for each (lat, lon, date) point.
+
+        Returns a float32 array of shape ``broadcast_shape + (steps, metrics)``
+        where metrics follow ``METRICS`` order. Each day is the daily forecast
+        shaped by a diurnal cycle plus a few low-frequency harmonics, so the
+        series is smooth within a day and identical on every call.
+        Precipitation is the amount falling during each step.
+        """
+        minutes = WeatherDataGenerator.time_steps(start_time, end_time, step_minutes)
+        daily, keys = WeatherDataGenerator._daily_base(lats, lons, dates)
+
+        # Columns broadcast over steps: (..., 1) against (steps,)
+        day = {metric: values[..., None] for metric, values in daily.items()}
+        keys = keys[..., None]
+        angle = 2.0 * np.pi * minutes / 1440.0
+
+        def wobble(metric_index: int, amplitude: float) -> np.ndarray:
+            # Two random-phase harmonics (12 h and 8 h periods) per metric/day
+            stream = WeatherDataGenerator._HOURLY_STREAM + 2 * metric_index
+            phase_1 = 2.0 * np.pi * _counter_uniform(keys, stream)
+            phase_2 = 2.0 * np.pi * _counter_uniform(keys, stream + 1)
+            return amplitude * (0.6 * np.sin(2 * angle + phase_1) + 0.4 * np.sin(3 * angle + phase_2))
+
+        # Diurnal cycle peaking mid-afternoon, daylight bell between 06:00 and 18:00
+        diurnal = np.cos(angle - 2.0 * np.pi * 15 / 24)
+        daylight = np.clip(np.sin(angle - np.pi / 2), 0, None)
+
+        temperature = day['temperature'] + 4.0 * diurnal + wobble(0, 1.0)
+        precipitation = (day['precipitation'] * step_minutes / 1440.0
+                         * np.clip(1.0 + wobble(1, 0.8), 0, None))
+        humidity = np.clip(day['humidity'] - 10.0 * diurnal + wobble(2, 3.0), 0, 100)
+        wind_speed = np.clip(day['wind_speed'] * (1.0 + 0.2 * diurnal) + wobble(3, 1.0), 0, None)
+        # The daily value is the solar-noon UV, where daylight peaks at 1
+        uv_index = np.clip(day['uv_index'] * daylight ** 1.5, 0, 11)
+        cloud_cover = np.clip(day['cloud_cover'] + wobble(5, 15.0), 0, 100)
+
+        return np.stack(
+            [temperature, precipitation, humidity, wind_speed, uv_index, cloud_cover],
+            axis=-1,
+        ).astype(np.float32)
+
+    @staticmethod
+    def iter_hourly_series(lat: float, lon: float, start_date, end_date,
+                           start_time: str, end_time: str, step_minutes: int = 60,
+                           chunk_days: int = 7) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Lazily yield ``(dates, series)`` chunks covering an inclusive date range.
+
+        Only ``chunk_days`` days are materialized at a time, so arbitrarily
+        long ranges can be streamed with bounded memory.
+        """
+        if chunk_days <= 0:
+            raise ValueError("chunk_days must be positive")
+        first = np.datetime64(start_date, 'D')
+        last = np.datetime64(end_date, 'D')
+        while first <= last:
+            stop = min(first + np.timedelta64(chunk_days, 'D'), last + np.timedelta64(1, 'D'))
+            chunk = np.arange(first, stop, dtype='datetime64[D]')
+            yield chunk, WeatherDataGenerator.generate_hourly_series(
+                lat, lon, chunk, start_time, end_time, step_minutes
+            )
+            first = stop
+
+    @staticmethod
+    @timing.timed('generator.sample_field')
+    def sample_field(lats, lons, date, anchor_deg: float = 0.25) -> Dict[str, np.ndarray]:
+        """Sample a spatially smooth weather field at arbitrary points.
+
+        The per-point forecast is independent noise between neighbouring
+        coordinates, so the field evaluates the generator on a lattice of
+        ``anchor_deg`` spaced anchors and bilinearly interpolates between them.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        row = np.floor(lats / anchor_deg)
+        col = np.floor(lons / anchor_deg)
+        fy = lats / anchor_deg - row
+        fx = lons / anchor_deg - col
+
+        def corner(dy: int, dx: int) -> Dict[str, np.ndarray]:
+            daily, _ = WeatherDataGenerator._daily_base(
+                (row + dy) * anchor_deg, (col + dx) * anchor_deg, date
+            )
+            return daily
+
+        c00, c01, c10, c11 = corner(0, 0), corner(0, 1), corner(1, 0), corner(1, 1)
+        return {
+            metric: ((c00[metric] * (1 - fx) + c01[metric] * fx) * (1 - fy)
+                     + (c10[metric] * (1 - fx) + c11[metric] * fx) * fy)
+            for metric in WeatherDataGenerator.METRICS
+        }
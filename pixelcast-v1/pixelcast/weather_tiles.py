@@ -0,0 +1,254 @@
+"""XYZ heatmap tiles for the PixelCast weather map.
+
+Tiles are rendered from a vectorized weather field, encoded as PNG and kept in
+a bounded LRU keyed by ``(z, x, y, date, metric)``, so panning and zooming
+never recompute a tile that has already been drawn. A small background HTTP
+server exposes them to the folium map as a regular tile layer, alongside the
+cached basemap served by ``basemap.get_tile_proxy``.
+
+The server binds to ``PIXELCAST_TILE_HOST`` (default ``127.0.0.1``). Set
+``PIXELCAST_TILE_URL`` to the URL browsers reach it at when the app is not
+viewed from the same machine; without it the weather overlay is only offered
+to local browsers, and the basemap proxy is not used at all.
+"""
+
+import datetime
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+TILE_SIZE = 256
+TILE_HOST = os.environ.get('PIXELCAST_TILE_HOST', '127.0.0.1')
+TILE_PORT = int(os.environ.get('PIXELCAST_TILE_PORT', 8502))
+_LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# Colour stops per metric: (value, (r, g, b, a))
+COLORMAPS = {
+    'temperature': [
+        (-10, (49, 54, 149, 170)), (0, (116, 173, 209, 170)), (10, (224, 243, 248, 150)),
+        (20, (254, 224, 144, 160)), (30, (244, 109, 67, 180)), (40, (165, 0, 38, 200)),
+    ],
+    'precipitation': [
+        (0, (255, 255, 255, 0)), (1, (198, 219, 239, 90)), (4, (66, 146, 198, 160)),
+        (10, (8, 48, 107, 210)),
+    ],
+    'cloud_cover': [
+        (0, (255, 255, 255, 0)), (50, (200, 200, 210, 100)), (100, (110, 110, 125, 190)),
+    ],
+}
+
+TileKey = Tuple[int, int, int, str, str]
+FieldFn = Callable[[np.ndarray, np.ndarray, str], Dict[str, np.ndarray]]
+
+
+def apply_colormap(values: np.ndarray, metric: str) -> np.ndarray:
+    """Map metric values to an RGBA uint8 image"""
+    stops = COLORMAPS[metric]
+    positions = [value for value, _ in stops]
+    rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+    for channel in range(4):
+        rgba[..., channel] = np.interp(values, positions, [color[channel] for _, color in stops])
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an RGBA uint8 image as PNG"""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+class TileCache:
+    """Thread-safe bounded LRU of rendered tiles"""
+
+    def __init__(self, max_tiles: int = 2048):
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[TileKey, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: TileKey) -> Optional[bytes]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key: TileKey, tile: bytes) -> None:
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+class WeatherTileRenderer:
+    """Render and cache heatmap tiles from a vectorized weather field"""
+
+    def __init__(self, field: FieldFn, cache: Optional[TileCache] = None, cells_per_tile: int = 64):
+        self.field = field
+        self.cache = cache or TileCache()
+        self.cells_per_tile = cells_per_tile
+
+    def render(self, z: int, x: int, y: int, date: str, metric: str) -> bytes:
+        """Return the PNG tile for a metric on a date, rendering it at most once"""
+        if metric not in COLORMAPS:
+            raise KeyError(metric)
+        key = (z, x, y, date, metric)
+        tile = self.cache.get(key)
+        if tile is None:
+            tile = encode_png(self._draw(z, x, y, date, metric))
+            self.cache.put(key, tile)
+        return tile
+
+    def _draw(self, z: int, x: int, y: int, date: str, metric: str) -> np.ndarray:
+        # Sample cell centres evenly in Mercator space, then upscale cells to pixels
+        cells = self.cells_per_tile
+        n = 2 ** z
+        rows = y + (np.arange(cells) + 0.5) / cells
+        cols = x + (np.arange(cells) + 0.5) / cells
+        lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * rows / n))))
+        lons = cols / n * 360 - 180
+        grid_lats, grid_lons = np.meshgrid(lats, lons, indexing='ij')
+        values = self.field(grid_lats, grid_lons, date)[metric]
+        scale = TILE_SIZE // cells
+        rgba = apply_colormap(values, metric)
+        return np.repeat(np.repeat(rgba, scale, axis=0), scale, axis=1)
+
+
+class _TileRequestHandler(BaseHTTPRequestHandler):
+    renderer: Optional[WeatherTileRenderer] = None
+    # The basemap route proxies upstream tiles, so it is off until requested
+    serve_basemap = False
+    _PATH = re.compile(r'^/tiles/(\w+)/(\d{4}-\d{2}-\d{2})/(\d+)/(\d+)/(\d+)\.png$')
+    _BASEMAP_PATH = re.compile(r'^/basemap/(\d+)/(\d+)/(\d+)\.png$')
+
+    def do_GET(self):
+        match = self._BASEMAP_PATH.match(self.path)
+        if match and self.serve_basemap:
+            self._send_basemap(*(int(v) for v in match.groups()))
+            return
+        match = self._PATH.match(self.path)
+        if not match or match.group(1) not in COLORMAPS or self.renderer is None:
+            self.send_error(404)
+            return
+        metric, date = match.group(1), match.group(2)
+        try:
+            datetime.date.fromisoformat(date)
+        except ValueError:
+            self.send_error(400, "Invalid date")
+            return
+        z, x, y = (int(v) for v in match.group(3, 4, 5))
+        if z > 22 or x >= 2 ** z or y >= 2 ** z:
+            self.send_error(404)
+            return
+        self._send_png(self.renderer.render(z, x, y, date, metric), max_age=86400)
+
+    def _send_basemap(self, z: int, x: int, y: int):
+        from .basemap import MAX_ZOOM, get_tile_proxy
+        if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            self.send_error(404)
+            return
+        tile = get_tile_proxy().get(z, x, y)
+        if tile is None:
+            self.send_error(404)
+            return
+        self._send_png(tile, max_age=7 * 86400)
+
+    def _send_png(self, tile: bytes, max_age: int):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(tile)))
+        self.send_header('Cache-Control', f'public, max-age={max_age}')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(tile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def _start_server(field: Optional[FieldFn], host: str, port: int, basemap: bool = False) -> Optional[str]:
+    """Start the process-wide tile server once and return its public base URL"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            handler = type('TileRequestHandler', (_TileRequestHandler,), {})
+            try:
+                _server = ThreadingHTTPServer((host, port), handler)
+            except OSError:
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        if field is not None and _server.RequestHandlerClass.renderer is None:
+            _server.RequestHandlerClass.renderer = WeatherTileRenderer(field)
+        if basemap:
+            _server.RequestHandlerClass.serve_basemap = True
+        public_url = os.environ.get('PIXELCAST_TILE_URL', f'http://localhost:{_server.server_port}')
+    return public_url.rstrip('/')
+
+
+def tiles_reachable_from(app_url: Optional[str]) -> bool:
+    """Whether a browser viewing the app at ``app_url`` can load this server's tiles.
+
+    Without ``PIXELCAST_TILE_URL`` tiles are served from ``http://localhost``,
+    which only a browser on the same machine can reach. Script runs without
+    a browser (``app_url`` None, as in tests) count as local.
+    """
+    if os.environ.get('PIXELCAST_TILE_URL') or app_url is None:
+        return True
+    return urlparse(app_url).hostname in _LOCAL_HOSTS
+
+
+def start_tile_server(field: FieldFn, host: str = TILE_HOST, port: int = TILE_PORT,
+                      app_url: Optional[str] = None) -> Optional[str]:
+    """Start the process-wide tile server once and return its URL template.
+
+    Returns None when the port is unavailable, e.g. because another worker
+    process already serves tiles on it, or when a browser at ``app_url``
+    could not reach the tiles (see ``tiles_reachable_from``).
+    """
+    if not tiles_reachable_from(app_url):
+        return None
+    base_url = _start_server(field, host, port)
+    return base_url and base_url + '/tiles/{metric}/{date}/{z}/{x}/{y}.png'
+
+
+def start_basemap_server(host: str = TILE_HOST, port: int = TILE_PORT) -> Optional[str]:
+    """Like ``start_tile_server``, returning the cached basemap's URL template.
+
+    Also returns None unless ``PIXELCAST_TILE_URL`` is set: a localhost URL
+    is unreachable from remote browsers (or blocked as mixed content), so
+    they are better served by the upstream tile server directly.
+    """
+    if not os.environ.get('PIXELCAST_TILE_URL'):
+        return None
+    base_url = _start_server(None, host, port, basemap=True)
+    return base_url and base_url + '/basemap/{z}/{x}/{y}.png'
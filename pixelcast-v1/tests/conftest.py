@@ -0,0 +1,14 @@
+"""Shared pytest setup: keep every on-disk cache out of the working tree."""
+
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Read at import time by pixelcast, so they must be set before any test imports it
+_data_dir = tempfile.mkdtemp(prefix='pixelcast-tests-')
+os.environ.setdefault('PIXELCAST_CLIMATOLOGY', os.path.join(_data_dir, 'climatology'))
+os.environ.setdefault('PIXELCAST_GEOCODE_CACHE', os.path.join(_data_dir, 'geocode_cache.sqlite3'))
+os.environ.setdefault('PIXELCAST_BASEMAP_CACHE', os.path.join(_data_dir, 'basemap_cache.mbtiles'))
@@ -0,0 +1,21 @@
+import numpy as np
+
+from pixelcast import activities
+
+
+def test_window_end_adds_one_step():
+    assert activities.window_end('09:00', '17:00') == '10:00'
+    assert activities.window_end('09:30', '17:00', step_minutes=30) == '10:00'
+
+
+def test_window_end_clamped_to_end_time():
+    assert activities.window_end('17:00', '17:00') == '17:00'
+    assert activities.window_end('16:00', '16:30') == '16:30'
+    assert activities.window_end('23:00', '23:00') == '23:00'
+
+
+def test_top_windows_do_not_overlap():
+    scores = np.array([[0.1, 0.9, 0.9, 0.2, 0.8, 0.8, 0.1]])
+    starts, means = activities.top_windows(scores, 2, k=3)
+    assert starts.tolist() == [1, 4, -1]
+    assert np.allclose(means[:2], [0.9, 0.8])
@@ -0,0 +1,45 @@
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from pixelcast import instrumentation as timing
+
+from conftest import APP_DIR
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Rerun counting is part of the debug timing, which is off by default
+    monkeypatch.setattr(timing, 'ENABLED', True)
+    monkeypatch.setattr(timing, '_sessions', OrderedDict())
+    at = AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=60)
+    at.session_state['selected_coords'] = (40.7, -74.0)
+    at.session_state['selected_location'] = 'New York'
+    at.run()
+    next(button for button in at.button if 'Confirm' in button.label).click().run()
+    assert not at.exception
+    return at
+
+
+def click_map(at, lat, lng):
+    # AppTest cannot interact with custom components, so add the map's
+    # widget state to the next run by hand
+    tree = at._tree
+    states = tree.get_widget_states()
+    state = states.widgets.add()
+    state.id = at.get('component_instance')[0].proto.id
+    state.json_value = json.dumps({'last_object_clicked': {'lat': lat, 'lng': lng}})
+    tree._runner._run(states, timeout=60)
+
+
+def test_map_click_takes_one_rerun(app):
+    click_map(app, 48.85, 2.35)
+    assert not app.exception
+    assert app.session_state['selected_coords'] == (48.85, 2.35)
+    session_id = next(iter(timing._sessions))
+    clicks = timing.interaction_summary(session_id)['map_click']
+    assert clicks['count'] == 1
+    assert clicks['reruns'] == 1
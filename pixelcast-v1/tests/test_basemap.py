@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pixelcast import basemap
+from pixelcast.basemap import DiskTileCache, MBTiles, TileProxy, tiles_around
+from pixelcast.weather_tiles import start_basemap_server
+
+
+class CountingLimiter:
+    """Rate limiter stand-in that records every token taken"""
+
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1.0):
+        self.acquired += tokens
+        return 0.0
+
+
+@pytest.fixture(scope='module')
+def upstream():
+    """Local tile server answering every tile after a short delay"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            requests.append(self.path)
+            time.sleep(0.1)
+            body = self.path.encode('ascii')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/{{z}}/{{x}}/{{y}}.png', requests
+    server.shutdown()
+
+
+@pytest.fixture
+def proxy(upstream, tmp_path):
+    url, requests = upstream
+    requests.clear()
+    return TileProxy(url, cache=DiskTileCache(str(tmp_path / 'cache.mbtiles')),
+                     rate_limiter=CountingLimiter(), pool_size=4)
+
+
+def test_tiles_around_wraps_longitude():
+    tiles = list(tiles_around(0.0, 179.99, zooms=[2]))
+    assert len(tiles) == 9
+    assert {x for _, x, _ in tiles} == {2, 3, 0}
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskTileCache(str(tmp_path / 'cache.mbtiles'), max_bytes=1000)
+    for x in range(10):
+        cache.put(5, x, 0, bytes(200))
+    stats = cache.stats()
+    assert stats['bytes'] <= 1000 and stats['evictions'] > 0
+    assert cache.get(5, 0, 0) is None
+    assert cache.get(5, 9, 0) == bytes(200)
+
+
+def test_cached_tiles_skip_upstream_and_rate_limit(proxy, upstream):
+    _, requests = upstream
+    assert proxy.get(3, 1, 2) == b'/3/1/2.png'
+    assert proxy.get(3, 1, 2) == b'/3/1/2.png'
+    assert requests == ['/3/1/2.png']
+    assert proxy.rate_limiter.acquired == 1
+
+
+def test_concurrent_requests_share_one_fetch(proxy, upstream):
+    _, requests = upstream
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tiles = list(pool.map(lambda _: proxy.get(4, 3, 5), range(8)))
+    assert tiles == [b'/4/3/5.png'] * 8
+    assert requests == ['/4/3/5.png']
+
+
+def test_upstream_fetches_are_rate_limited(upstream, tmp_path):
+    url, _ = upstream
+    proxy = TileProxy(url, rate_limiter=basemap.TokenBucket(rate=20.0, capacity=1.0))
+    start = time.monotonic()
+    for x in range(4):
+        proxy.get(6, x, 0)
+    assert time.monotonic() - start >= 3 / 20.0
+
+
+def test_offline_serves_packs_and_cache_only(upstream, tmp_path):
+    _, requests = upstream
+    requests.clear()
+    pack = MBTiles(str(tmp_path / 'pack.mbtiles'))
+    pack.put(7, 10, 20, b'packed')
+    proxy = TileProxy('http://127.0.0.1:9/{z}/{x}/{y}.png', packs=[pack], offline=True,
+                      rate_limiter=CountingLimiter())
+    assert proxy.get(7, 10, 20) == b'packed'
+    assert proxy.get(7, 10, 21) is None
+    assert proxy.prefetch(40.7, -74.0) == 0
+    assert proxy.rate_limiter.acquired == 0
+
+
+def test_prefetch_once_per_spot(proxy):
+    assert proxy.prefetch(40.7, -74.0) == 9
+    assert proxy.prefetch(40.7, -74.0) == 0
+    proxy._prefetcher.shutdown(wait=True)
+    assert proxy.rate_limiter.acquired == 9
+
+
+def test_basemap_proxy_needs_public_url(monkeypatch):
+    monkeypatch.delenv('PIXELCAST_TILE_URL', raising=False)
+    assert start_basemap_server(host='127.0.0.1', port=0) is None
+    monkeypatch.setenv('PIXELCAST_TILE_URL', 'https://tiles.example.com/')
+    assert start_basemap_server(host='127.0.0.1', port=0) == 'https://tiles.example.com/basemap/{z}/{x}/{y}.png'
+
+
+def test_seed_pack(proxy, tmp_path):
+    tiles = list(basemap.tiles_in_bbox(40.70, -74.02, 40.72, -74.00, [12, 13]))
+    path = str(tmp_path / 'pack.mbtiles')
+    assert basemap.seed_pack(path, tiles, proxy) == (len(tiles), 0)
+    pack = MBTiles(path, readonly=True)
+    z, x, y = tiles[-1]
+    assert pack.get(z, x, y) == f'/{z}/{x}/{y}.png'.encode('ascii')
+
+
+def test_seed_pack_rejects_empty_tile_list(proxy, tmp_path):
+    path = tmp_path / 'pack.mbtiles'
+    # An inverted bounding box covers no tiles
+    tiles = list(basemap.tiles_in_bbox(41.0, -74.0, 40.0, -73.0, [12]))
+    with pytest.raises(ValueError, match='no tiles'):
+        basemap.seed_pack(str(path), tiles, proxy)
+    assert not path.exists()
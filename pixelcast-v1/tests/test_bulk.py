@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+import pytest
+
+from pixelcast import WeatherDataGenerator, bulk, geocoding
+from pixelcast.bulk import Venue
+
+
+class FakeClient:
+    """Network geocoder stand-in that records every name it is asked for"""
+
+    def __init__(self):
+        self.queried = []
+
+    def geocode_many(self, queries):
+        self.queried += queries
+        return [None if 'nowhere' in query.lower() else (1.0, 2.0, query) for query in queries]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(geocoding, 'get_geocoding_client', lambda: client)
+    monkeypatch.setattr(geocoding, 'get_gazetteer', lambda: None)
+    return client
+
+
+def test_parse_plain_rows():
+    venues = bulk.parse_venues('Stadium, 40.829, -73.926\n\nSpringfield, IL, USA\n12.5, 45\n')
+    assert venues == [
+        Venue('Stadium', 40.829, -73.926),
+        Venue('Springfield, IL, USA', None, None),
+        Venue('12.5000, 45.0000', 12.5, 45.0),
+    ]
+
+
+def test_parse_with_header():
+    venues = bulk.parse_venues('Longitude,Venue,Latitude\n-0.1,London,51.5\n,Paris,\n')
+    assert venues == [Venue('London', 51.5, -0.1), Venue('Paris', None, None)]
+
+
+@pytest.mark.parametrize('text, message', [
+    ('Stadium, 95, 10\n', 'line 1'),
+    ('name,lat\nA,1\n', 'both a latitude and a longitude'),
+    ('name,lat,lon\nA,1,2\nB,x,2\n', 'line 3'),
+])
+def test_parse_errors(text, message):
+    with pytest.raises(ValueError, match=message):
+        bulk.parse_venues(text)
+
+
+def test_resolve_venues(client):
+    venues = [Venue('A', 1.5, 2.5), Venue('Boston', None, None), Venue('Nowhere', None, None),
+              Venue('Boston', None, None)]
+    resolved, unresolved = bulk.resolve_venues(venues)
+    assert resolved == [Venue('A', 1.5, 2.5), Venue('Boston', 1.0, 2.0), Venue('Boston', 1.0, 2.0)]
+    assert unresolved == ['Nowhere']
+    # Repeated names are looked up once
+    assert client.queried == ['Boston', 'Nowhere']
+
+
+def test_resolve_venues_caps_network_lookups(client):
+    venues = [Venue(f'Town {i}', None, None) for i in range(10)]
+    resolved, unresolved = bulk.resolve_venues(venues, max_lookups=3)
+    assert len(client.queried) == 3
+    assert len(resolved) == 3
+    assert unresolved == [f'Town {i}' for i in range(3, 10)]
+
+
+def test_gazetteer_names_do_not_count_against_the_cap(client, monkeypatch):
+    class FakeGazetteer:
+        def geocode(self, query):
+            return (48.85, 2.35, 'Paris, FR') if query == 'Paris' else None
+
+    monkeypatch.setattr(geocoding, 'get_gazetteer', lambda: FakeGazetteer())
+    resolved, unresolved = bulk.resolve_venues([Venue('Paris', None, None), Venue('Lyon', None, None)],
+                                               max_lookups=1)
+    assert resolved == [Venue('Paris', 48.85, 2.35), Venue('Lyon', 1.0, 2.0)]
+    assert client.queried == ['Lyon']
+
+
+def test_forecast_venues_matches_single_points():
+    venues = [Venue('A', 40.7, -74.0), Venue('B', 51.5, -0.1)]
+    dates = [date(2026, 5, 1) + timedelta(days=i) for i in range(3)]
+    forecasts = bulk.forecast_venues(venues, dates)
+    assert forecasts['temperature'].shape == (2, 3)
+    for i, venue in enumerate(venues):
+        for j, day in enumerate(dates):
+            single = WeatherDataGenerator.generate_weather_data(venue.lat, venue.lon, day, '00:00', '23:00')
+            assert single == {metric: float(values[i, j]) for metric, values in forecasts.items()}
+
+
+def test_summarize_venues():
+    venues = [Venue('A', 40.7, -74.0)]
+    forecasts = bulk.forecast_venues(venues, [date(2026, 5, 1), date(2026, 5, 2)])
+    summary = bulk.summarize_venues(forecasts)
+    assert summary['temperature_max'][0] == forecasts['temperature'][0].max()
+    assert bulk.summarize_venues(forecasts, day=1)['humidity'][0] == forecasts['humidity'][0, 1]
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from pixelcast import climatology
+from pixelcast.climatology import Climatology, build_climatology, get_climatology
+
+# 1° global grid, nodes at -90..90 and -180..179
+ROWS, COLUMNS = 181, 360
+MID_JANUARY = np.datetime64('2026-01-16')  # weight 0 on February
+
+
+def planar_grid():
+    """Each variable linear in lat and lon, so bilinear sampling is exact"""
+    lat = np.arange(ROWS, dtype=np.float32)[None, :, None]
+    lon = np.arange(COLUMNS, dtype=np.float32)[None, None, :]
+    month = np.arange(12, dtype=np.float32)[:, None, None]
+    normals = np.stack([np.broadcast_to(f, (12, ROWS, COLUMNS)) for f in (lat, lon, month)], axis=-1)
+    return Climatology(normals, -90.0, -180.0, 1.0, ('lat', 'lon', 'month'))
+
+
+@pytest.fixture(scope='module')
+def grid():
+    return planar_grid()
+
+
+def test_nodes_and_midpoints(grid):
+    lats = np.array([-90.0, 0.0, 40.0, 40.5, 89.75])
+    lons = np.array([-180.0, 0.0, -74.0, -73.5, 10.25])
+    sample = grid.sample(lats, lons, MID_JANUARY)
+    np.testing.assert_allclose(sample['lat'], lats + 90, atol=1e-4)
+    np.testing.assert_allclose(sample['lon'], lons + 180, atol=1e-4)
+    assert sample['lat'].dtype == np.float32
+
+
+def test_latitude_clamps_at_the_poles(grid):
+    sample = grid.sample([-95.0, 95.0], [0.0, 0.0], MID_JANUARY)
+    np.testing.assert_allclose(sample['lat'], [0, ROWS - 1])
+
+
+def test_continuous_across_the_antimeridian():
+    # A field that only depends on the distance from lon 0 has no seam at ±180
+    lon = np.radians(np.arange(-180.0, 180.0))
+    field = np.broadcast_to(np.cos(lon), (12, ROWS, COLUMNS))[..., None].astype(np.float32)
+    grid = Climatology(field, -90.0, -180.0, 1.0, ('value',))
+    lons = np.array([179.0, 179.5, 179.999, 180.0, -180.0, -179.5, 540.0])
+    values = grid.sample(np.zeros_like(lons), lons, MID_JANUARY)['value']
+    np.testing.assert_allclose(values, -1.0, atol=2e-4)
+    # Halfway between the last column and the first, which are 1° apart
+    assert values[1] == pytest.approx((np.cos(np.radians(179.0)) + -1.0) / 2, abs=1e-6)
+
+
+def test_month_boundaries_blend_smoothly(grid):
+    days = np.arange('2026-01-01', '2026-04-01', dtype='datetime64[D]')
+    month = grid.sample(40.0, -74.0, days)['month']
+    # Mid-month days take the month's normal, days between blend linearly
+    assert month[15] == pytest.approx(0.0)
+    assert month[31 + 28 + 15] == pytest.approx(2.0)
+    between = month[15:31 + 28 + 16]
+    assert np.all(np.diff(between) > 0) and np.diff(between).max() < 1 / 28 + 1e-4
+    # Last of January and first of February sit either side of the halfway point
+    assert month[30] < 0.5 < month[31]
+    # December (11) blends into January (0) across the new year
+    dec_31, jan_1 = grid.sample(40.0, -74.0, ['2025-12-31', '2026-01-01'])['month']
+    assert dec_31 == pytest.approx(11 * (1 - 30.5 / 31 + 0.5))
+    assert jan_1 == pytest.approx(11 * (0.5 - 0.5 / 31))
+
+
+def test_single_location_matches_batches(grid):
+    days = np.arange('2026-01-25', '2026-03-10', dtype='datetime64[D]')
+    single = grid.sample(40.3, -74.6, days)
+    # Two locations take the per-month path, many distinct dates the per-point path
+    pair = grid.sample([40.3, 0.0], [-74.6, 0.0], days[:, None])
+    points = grid.sample(np.full(len(days), 40.3), np.full(len(days), -74.6), days)
+    for name in grid.variables:
+        np.testing.assert_allclose(single[name], pair[name][:, 0], atol=1e-4)
+        np.testing.assert_allclose(single[name], points[name], atol=1e-4)
+
+
+def test_build_and_load_round_trip(grid, tmp_path):
+    build_climatology(str(tmp_path), grid.normals, grid.south, grid.west, grid.resolution, grid.variables)
+    loaded = Climatology.load(str(tmp_path))
+    assert isinstance(loaded.normals, np.memmap)
+    assert loaded.variables == grid.variables and loaded.wraps
+    days = np.arange('2026-01-01', '2026-02-01', dtype='datetime64[D]')
+    np.testing.assert_array_equal(loaded.sample(12.3, 45.6, days)['lon'], grid.sample(12.3, 45.6, days)['lon'])
+
+
+def test_rejects_bad_shapes():
+    with pytest.raises(ValueError, match='shape'):
+        Climatology(np.zeros((12, 4, 4, 2), dtype=np.float32), 0.0, 0.0, 1.0)
+
+
+def test_unwritable_directory_keeps_synthetic_grid_in_memory(tmp_path, monkeypatch):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    monkeypatch.setattr(climatology, 'DEFAULT_CLIMATOLOGY_DIR', str(blocker / 'climatology'))
+    monkeypatch.setattr(climatology, '_default_climatology', None)
+    grid = get_climatology()
+    assert not isinstance(grid.normals, np.memmap)
+    assert grid.wraps and grid.variables == climatology.VARIABLES
+    assert get_climatology() is grid
+    assert np.isfinite(grid.sample(40.7, -74.0, '2026-05-01')['temperature'])
@@ -0,0 +1,84 @@
+import io
+from datetime import date
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.parquet
+import pytest
+
+from pixelcast import WeatherDataGenerator, export
+from pixelcast.providers import DayForecast, TimeWindow
+
+LATS, LONS = [40.7, 51.5, -33.9], [-74.0, -0.1, 151.2]
+DATES = ['2026-03-01', '2026-03-02']
+WINDOW = TimeWindow('06:00', '18:00', 60)
+
+
+def read_table(fmt, data):
+    if fmt == 'csv':
+        return pyarrow.csv.read_csv(io.BytesIO(data))
+    if fmt == 'parquet':
+        return pyarrow.parquet.read_table(io.BytesIO(data))
+    return pa.ipc.open_file(data).read_all()
+
+
+def test_batches_respect_chunk_rows():
+    batches = list(export.iter_forecast_batches(LATS, LONS, DATES, WINDOW, chunk_rows=30))
+    assert all(batch.num_rows <= 30 for batch in batches)
+    assert sum(batch.num_rows for batch in batches) == export.count_rows(LATS, DATES, WINDOW) == 78
+
+
+def test_daily_rows_match_single_forecasts():
+    table = pa.Table.from_batches(list(export.iter_forecast_batches(LATS, LONS, DATES, chunk_rows=4)))
+    assert table.num_rows == export.count_rows(LATS, DATES) == 6
+    for row in table.to_pylist():
+        single = WeatherDataGenerator.generate_weather_data(row['lat'], row['lon'], row['date'], '00:00', '23:00')
+        assert row['temperature'] == pytest.approx(single['temperature'])
+
+
+@pytest.mark.parametrize('fmt', sorted(export.FORMATS))
+def test_export_file_round_trip(fmt):
+    with export.export_file(fmt, LATS, LONS, DATES, WINDOW, names=['A', 'B', 'C']) as f:
+        table = read_table(fmt, f.read())
+    assert table.num_rows == 78
+    assert table.column('name').to_pylist()[::26] == ['A', 'B', 'C']
+    assert set(WeatherDataGenerator.METRICS) <= set(table.column_names)
+
+
+def test_export_file_enforces_row_limit():
+    with pytest.raises(ValueError, match='row download limit'):
+        export.export_file('csv', LATS, LONS, DATES, WINDOW, max_rows=77)
+    with export.export_file('csv', LATS, LONS, DATES, WINDOW, max_rows=78) as f:
+        assert f.read()
+
+
+def test_format_for_path():
+    assert export.format_for_path('out.PARQUET') == 'parquet'
+    assert export.format_for_path('out.feather') == 'arrow'
+    with pytest.raises(ValueError):
+        export.format_for_path('out.xlsx')
+
+
+@pytest.mark.parametrize('window', [None, WINDOW])
+def test_provider_source_matches_generator(window):
+    # The default stub provider wraps the generator, so both paths agree
+    via_generator = list(export.iter_forecast_batches(LATS, LONS, DATES, window, chunk_rows=10))
+    via_provider = list(export.iter_forecast_batches(LATS, LONS, DATES, window, chunk_rows=10,
+                                                     source=export.provider_source()))
+    assert pa.Table.from_batches(via_provider).equals(pa.Table.from_batches(via_generator))
+
+
+def test_fetch_source_reads_each_location_once():
+    calls = []
+
+    def fetch(location, dates, window):
+        calls.append((location, dates))
+        daily = dict.fromkeys(WeatherDataGenerator.METRICS, location[0])
+        return [DayForecast(daily, np.zeros((1, len(WeatherDataGenerator.METRICS)))) for _ in dates]
+
+    table = pa.Table.from_batches(list(export.iter_forecast_batches(
+        LATS, LONS, DATES, chunk_rows=100, source=export.fetch_source(fetch))))
+    assert [location for location, _ in calls] == list(zip(LATS, LONS))
+    assert calls[0][1] == [date(2026, 3, 1), date(2026, 3, 2)]
+    assert table.column('temperature').to_pylist() == [40.7, 40.7, 51.5, 51.5, -33.9, -33.9]
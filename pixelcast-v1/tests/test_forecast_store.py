@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from pixelcast import WeatherDataGenerator
+from pixelcast.forecast_store import ENTRY_OVERHEAD_BYTES, ForecastStore, store_coords
+
+DAILY = dict.fromkeys(WeatherDataGenerator.METRICS, 1.25)
+HOURLY = np.ones((24, len(WeatherDataGenerator.METRICS)))
+# float32 copies of the arrays above plus the fixed overhead
+ENTRY_BYTES = 4 * len(WeatherDataGenerator.METRICS) * 25 + ENTRY_OVERHEAD_BYTES
+
+
+def key(day):
+    return (*store_coords(40.71234, -74.00567), f'2026-05-{day:02d}', '00:00', '23:00')
+
+
+def test_entries_are_read_only_float32():
+    entry = ForecastStore(10 * ENTRY_BYTES).put(key(1), DAILY, HOURLY)
+    assert entry.nbytes == ENTRY_BYTES
+    assert entry.daily.dtype == entry.hourly.dtype == np.float32
+    assert entry.daily.flags.writeable is False
+    assert entry.hourly.flags.writeable is False
+    with pytest.raises(ValueError):
+        entry.hourly[0, 0] = 2.0
+    # The caller's array is copied, not frozen in place
+    assert HOURLY.flags.writeable
+    assert entry.daily_dict() == {metric: 1.2 for metric in WeatherDataGenerator.METRICS}
+
+
+def test_hits_and_misses():
+    store = ForecastStore(10 * ENTRY_BYTES)
+    assert store.get(key(1)) is None
+    entry = store.put(key(1), DAILY, HOURLY)
+    assert store.get(key(1)) is entry
+    assert store.get(key(1)) is entry
+    stats = store.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (2, 1, 1, ENTRY_BYTES)
+
+
+def test_evicts_least_recently_used_over_budget():
+    store = ForecastStore(3 * ENTRY_BYTES)
+    for day in (1, 2, 3):
+        store.put(key(day), DAILY, HOURLY)
+    store.get(key(1))
+    store.put(key(4), DAILY, HOURLY)
+    assert store.get(key(2)) is None
+    assert all(store.get(key(day)) is not None for day in (1, 3, 4))
+    stats = store.stats()
+    assert (stats['evictions'], stats['entries'], stats['bytes']) == (1, 3, 3 * ENTRY_BYTES)
+
+
+def test_replacing_an_entry_keeps_the_byte_count():
+    store = ForecastStore(3 * ENTRY_BYTES)
+    store.put(key(1), DAILY, HOURLY)
+    store.put(key(1), DAILY, HOURLY[:12])
+    assert len(store) == 1
+    assert store.stats()['bytes'] == ENTRY_BYTES - 4 * len(WeatherDataGenerator.METRICS) * 12
+
+
+def test_oversized_entry_is_returned_but_not_kept():
+    store = ForecastStore(2 * ENTRY_BYTES)
+    store.put(key(1), DAILY, HOURLY)
+    entry = store.put(key(2), DAILY, np.ones((200, len(WeatherDataGenerator.METRICS))))
+    assert entry.hourly.shape == (200, len(WeatherDataGenerator.METRICS))
+    assert store.get(key(2)) is None
+    # The entries already held are not evicted to make room
+    assert store.get(key(1)) is not None
+    stats = store.stats()
+    assert (stats['rejected'], stats['evictions'], stats['bytes']) == (1, 0, ENTRY_BYTES)
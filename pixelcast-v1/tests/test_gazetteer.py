@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+import pytest
+
+from pixelcast.gazetteer import Gazetteer, build_gazetteer
+
+PLACES = [
+    # name, ascii name, lat, lon, country, population
+    ('Paris', 'Paris', 48.8534, 2.3488, 'FR', 2_138_551),
+    ('Paris', 'Paris', 33.6609, -95.5555, 'US', 24_171),
+    ('Parma', 'Parma', 44.8015, 10.3279, 'IT', 146_299),
+    ('London', 'London', 51.5085, -0.1257, 'GB', 8_961_989),
+    ('São Paulo', 'Sao Paulo', -23.5475, -46.6361, 'BR', 10_021_295),
+    ('Longyearbyen', 'Longyearbyen', 78.2232, 15.6469, 'SJ', 2_368),
+    ('Alert', 'Alert', 82.5018, -62.3481, 'CA', 62),
+    ('Suva', 'Suva', -18.1416, 178.4415, 'FJ', 77_366),
+    ('Taveuni', 'Taveuni', -16.85, -179.95, 'FJ', 12_000),
+]
+
+
+def _row(place_id, name, ascii_name, lat, lon, country, population):
+    fields = [str(place_id), name, ascii_name, '', str(lat), str(lon), 'P', 'PPL', country,
+              '', '', '', '', '', str(population), '', '', 'UTC', '2024-01-01']
+    return '\t'.join(fields) + '\n'
+
+
+@pytest.fixture(scope='module')
+def gazetteer(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('gazetteer')
+    rng = np.random.default_rng(0)
+    rows = [_row(i, *place) for i, place in enumerate(PLACES)]
+    # Filler towns away from the poles, so lookups search a realistic index
+    for i in range(20_000):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        rows.append(_row(1000 + i, f'Town {i}', f'Town {i}', round(lat, 4), round(lon, 4), 'XX', 1000))
+    dump = directory / 'places.txt'
+    dump.write_text(''.join(rows), encoding='utf-8')
+    assert build_gazetteer(str(dump), str(directory)) == len(rows)
+    return Gazetteer(str(directory))
+
+
+def test_geocode_prefers_most_populous(gazetteer):
+    assert gazetteer.geocode('  PARIS ') == pytest.approx((48.8534, 2.3488, 'Paris, FR'))
+    assert gazetteer.geocode('sao paulo')[2] == 'São Paulo, BR'
+    assert gazetteer.geocode('Atlantis') is None
+
+
+def test_autocomplete(gazetteer):
+    assert [label for _, _, label in gazetteer.autocomplete('par', 3)] == ['Paris, FR', 'Parma, IT', 'Paris, US']
+    assert gazetteer.autocomplete('') == []
+
+
+def test_reverse_finds_nearest_place(gazetteer):
+    assert gazetteer.reverse(48.86, 2.35)[2] == 'Paris, FR'
+    assert gazetteer.reverse(-89.0, 0.0) is None
+
+
+def test_reverse_across_the_antimeridian(gazetteer):
+    assert gazetteer.reverse(-16.85, 179.95)[2] == 'Taveuni, FJ'
+
+
+@pytest.mark.parametrize('lat, lon, expected', [
+    (78.25, 15.5, 'Longyearbyen, SJ'),
+    (82.45, -62.0, 'Alert, CA'),
+    (84.0, 100.0, None),
+    (89.5, -30.0, None),
+])
+def test_reverse_near_the_poles(gazetteer, lat, lon, expected):
+    result = gazetteer.reverse(lat, lon)
+    assert (result[2] if result else None) == expected
+
+
+def test_polar_misses_stay_fast(gazetteer):
+    start = time.perf_counter()
+    for _ in range(20):
+        assert gazetteer.reverse(84.0, 100.0) is None
+    # A full sweep of the grid took hundreds of milliseconds per call
+    assert (time.perf_counter() - start) / 20 < 0.02
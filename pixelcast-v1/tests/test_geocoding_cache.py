@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+
+from pixelcast import geocoding_cache
+from pixelcast.geocoding_cache import GeocodeCache, normalize_query
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time, so LRU order never depends on timer resolution"""
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(geocoding_cache.time, 'time', lambda: float(next(ticks)))
+
+
+def _disk_keys(cache):
+    return {key for (key,) in cache._db.execute('SELECT key FROM geocode')}
+
+
+def test_normalize_query():
+    assert normalize_query('  New\tYork ') == normalize_query('new york')
+
+
+def test_store_and_lookup(tmp_path):
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite3'))
+    cache.store('Paris', (48.85, 2.35, 'Paris, France'))
+    cache.store('Nowhere', None)
+    assert cache.lookup('paris') == (True, (48.85, 2.35, 'Paris, France'))
+    assert cache.lookup('nowhere') == (True, None)
+    assert cache.lookup('London') == (False, None)
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    GeocodeCache(path).store('Paris', (48.85, 2.35, 'Paris, France'))
+    reopened = GeocodeCache(path)
+    assert reopened.lookup('Paris') == (True, (48.85, 2.35, 'Paris, France'))
+    assert reopened._disk_entries == 1
+
+
+def test_memory_eviction():
+    cache = GeocodeCache(None, max_memory_entries=3)
+    for i in range(5):
+        cache.store(f'place {i}', (i, i, f'Place {i}'))
+    assert cache.stats()['memory_entries'] == 3
+    assert cache.stats()['evictions'] == 2
+    assert cache.lookup('place 0') == (False, None)
+
+
+def test_disk_eviction_is_bounded(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite3'), max_disk_entries=10)
+    for i in range(25):
+        cache.store(f'place {i}', (i, i, f'Place {i}'))
+    assert len(_disk_keys(cache)) <= 10
+    assert 'place 24' in _disk_keys(cache)
+
+
+def test_memory_hits_keep_entries_on_disk(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite3'), max_disk_entries=10)
+    for i in range(10):
+        cache.store(f'place {i}', (i, i, f'Place {i}'))
+    # Served from memory; the access must still reach the disk LRU
+    assert cache.lookup('place 0')[0]
+    for i in range(10, 15):
+        cache.store(f'place {i}', (i, i, f'Place {i}'))
+    assert 'place 0' in _disk_keys(cache)
+    assert 'place 1' not in _disk_keys(cache)
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from pixelcast.geocoding_client import GeocodingClient, GeocodingError, TokenBucket
+
+
+@pytest.fixture(scope='module')
+def upstream():
+    """Local search endpoint whose behaviour depends on the query text"""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)['q'][0]
+            requests_seen.append(query)
+            if query == 'reset':
+                self.close_connection = True
+                self.connection.close()
+                return
+            if query == 'slow':
+                time.sleep(0.2)
+            if query == 'busy' or (query == 'busy once' and requests_seen.count(query) == 1):
+                self.send_response(429)
+                self.send_header('Retry-After', '3600')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if query == 'html':
+                body, content_type = b'<html>Bad gateway</html>', 'text/html'
+            elif query == 'nowhere':
+                body, content_type = b'[]', 'application/json'
+            else:
+                body = json.dumps([{'lat': '1.5', 'lon': '2.5', 'display_name': query.title()}]).encode()
+                content_type = 'application/json'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(upstream):
+    return GeocodingClient(upstream[0], rate_limiter=TokenBucket(rate=1e6), max_retries=0)
+
+
+def test_geocode(client):
+    assert client.geocode('paris') == (1.5, 2.5, 'Paris')
+    assert client.geocode('nowhere') is None
+
+
+def test_html_error_page_is_a_geocoding_error(client):
+    with pytest.raises(GeocodingError):
+        client.geocode('html')
+
+
+def test_connection_reset_is_a_geocoding_error(client):
+    with pytest.raises(GeocodingError):
+        client.geocode('reset')
+
+
+def test_geocode_many_survives_bad_rows(client):
+    results = client.geocode_many(['paris', 'html', 'reset', 'nowhere', 'london'])
+    assert results == [(1.5, 2.5, 'Paris'), None, None, None, (1.5, 2.5, 'London')]
+
+
+def test_concurrent_identical_queries_share_one_request(client, upstream):
+    results = client.geocode_many(['slow'] * 4, max_concurrency=4)
+    assert results == [(1.5, 2.5, 'Slow')] * 4
+    assert upstream[1].count('slow') == 1
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20.0)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 4 / 20.0 * 0.9
+
+
+def test_retry_after_is_capped(upstream):
+    client = GeocodingClient(upstream[0], rate_limiter=TokenBucket(rate=1e6), max_retries=2, backoff=0.05)
+    start = time.monotonic()
+    assert client.geocode('busy once') == (1.5, 2.5, 'Busy Once')
+    with pytest.raises(GeocodingError, match='HTTP 429'):
+        client.geocode('busy')
+    assert time.monotonic() - start < 2.0
+    assert upstream[1].count('busy once') == 2
+    assert upstream[1].count('busy') == 3
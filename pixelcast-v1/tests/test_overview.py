@@ -0,0 +1,118 @@
+import pytest
+
+from pixelcast.overview import (
+    ModelBackend, ModelEngine, OverviewEngine, OverviewRequest, OverviewService, RuleBasedEngine,
+    StubModelBackend, rule_based_lines,
+)
+
+REQUEST = OverviewRequest('Testville', {
+    '2026-03-01': {'temperature': 12.0, 'precipitation': 2.0, 'humidity': 60.0,
+                   'wind_speed': 10.0, 'uv_index': 4.0, 'cloud_cover': 40.0},
+})
+
+
+class FlakyEngine(OverviewEngine):
+    """Fails the first ``failures`` requests, then streams the rule-based text"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def stream(self, request):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("backend down")
+        async for chunk in RuleBasedEngine().stream(request):
+            yield chunk
+
+
+@pytest.fixture
+def service():
+    service = OverviewService(FlakyEngine(failures=1), max_entries=2)
+    yield service
+    service.loop.call_soon_threadsafe(service.loop.stop)
+
+
+def test_jobs_are_memoized(service):
+    service.engine.failures = 0
+    job = service.request('a', REQUEST)
+    assert job.wait(5) and job.error is None
+    assert service.request('a', REQUEST) is job
+    assert job.lines[0].startswith('Outlook for Testville')
+
+
+def test_failed_jobs_are_evicted_and_retried(service):
+    failed = service.request('a', REQUEST)
+    assert failed.wait(5)
+    assert failed.error == 'RuntimeError: backend down'
+    retried = service.request('a', REQUEST)
+    assert retried is not failed
+    assert retried.wait(5) and retried.error is None and retried.lines
+    assert service.engine.calls == 2
+
+
+def test_lru_eviction(service):
+    service.engine.failures = 0
+    first = service.request('a', REQUEST)
+    service.request('b', REQUEST)
+    service.request('c', REQUEST)
+    assert first.wait(5)
+    assert service.request('a', REQUEST) is not first
+
+
+def test_engines_and_backends_must_implement_stream():
+    class Incomplete(OverviewEngine):
+        pass
+
+    class IncompleteBackend(ModelBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+class BrokenBackend(ModelBackend):
+    """Streams ``words`` words of the stub text, then fails"""
+
+    def __init__(self, words=0):
+        self.words = words
+
+    async def stream(self, prompt, request):
+        for word in rule_based_lines(request)[0].split(' ')[:self.words]:
+            yield word + ' '
+        raise ConnectionError("model unavailable")
+
+
+def _model_service(backend, timeout=5.0):
+    return OverviewService(ModelEngine(backend, timeout=timeout))
+
+
+@pytest.mark.parametrize('backend, timeout', [
+    (StubModelBackend(latency=0.001), 5.0),
+    (StubModelBackend(latency=1.0), 0.05),  # too slow: times out before the first word
+    (BrokenBackend(), 5.0),
+])
+def test_model_engine_falls_back_to_rules(backend, timeout):
+    service = _model_service(backend, timeout)
+    try:
+        job = service.request('a', REQUEST)
+        assert job.wait(5)
+        assert job.error is None
+        assert job.lines == rule_based_lines(REQUEST)
+        # A fallback is a success, so the job stays cached
+        assert service.request('a', REQUEST) is job
+    finally:
+        service.loop.call_soon_threadsafe(service.loop.stop)
+
+
+def test_model_engine_keeps_partial_text():
+    service = _model_service(BrokenBackend(words=3))
+    try:
+        job = service.request('a', REQUEST)
+        assert job.wait(5) and job.error is None
+        # The partial line is kept and closed rather than replaced by the rules
+        assert job.lines == [''.join(word + ' ' for word in rule_based_lines(REQUEST)[0].split(' ')[:3])]
+    finally:
+        service.loop.call_soon_threadsafe(service.loop.stop)
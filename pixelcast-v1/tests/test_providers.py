@@ -0,0 +1,121 @@
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from pixelcast import WeatherDataGenerator
+from pixelcast.providers import (
+    CoalescingProvider, ForecastProvider, LocalStubProvider, ProviderError, ProviderRunner, TimeWindow,
+)
+
+LOCATION = (40.7, -74.0)
+WINDOW = TimeWindow('09:00', '17:00')
+DATES = [date(2026, 5, 1) + timedelta(days=i) for i in range(3)]
+
+
+class RecordingProvider(LocalStubProvider):
+    """Stub provider that records the dates of every upstream call"""
+
+    def __init__(self, latency=0.05):
+        super().__init__(latency)
+        self.calls = []
+
+    async def fetch_range(self, location, dates, window):
+        self.calls.append(list(dates))
+        return await super().fetch_range(location, dates, window)
+
+
+class FailingProvider(RecordingProvider):
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+    async def fetch_range(self, location, dates, window):
+        self.calls.append(list(dates))
+        await asyncio.sleep(self.latency)
+        raise self.error
+
+
+class ShortProvider(RecordingProvider):
+    """Returns one forecast fewer than asked for"""
+
+    async def fetch_range(self, location, dates, window):
+        return (await super().fetch_range(location, dates, window))[:-1]
+
+
+def _gather(provider, *ranges):
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            *(provider.fetch_range(LOCATION, dates, WINDOW) for dates in ranges),
+            return_exceptions=True
+        ), timeout=5)
+    return asyncio.run(run())
+
+
+def test_stub_matches_generator():
+    [forecasts] = _gather(LocalStubProvider(), DATES)
+    batch = WeatherDataGenerator.generate_batch(*LOCATION, DATES)
+    assert [forecast.daily['temperature'] for forecast in forecasts] == batch['temperature'].tolist()
+    assert forecasts[0].hourly.shape == (9, len(WeatherDataGenerator.METRICS))
+
+
+def test_concurrent_callers_share_one_fetch():
+    upstream = RecordingProvider()
+    provider = CoalescingProvider(upstream)
+    first, second = _gather(provider, DATES, DATES[1:] + [DATES[-1] + timedelta(days=1)])
+    # The second caller only asks upstream for the day nobody was fetching
+    assert upstream.calls == [DATES, [DATES[-1] + timedelta(days=1)]]
+    assert provider.coalesced_days == 2
+    np.testing.assert_array_equal(first[1].hourly, second[0].hourly)
+    assert not provider._in_flight
+
+
+def test_errors_fan_out_to_every_waiter():
+    provider = CoalescingProvider(FailingProvider(RuntimeError("backend down")))
+    results = _gather(provider, DATES, DATES, DATES[:1])
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert provider.provider.calls == [DATES]
+    assert not provider._in_flight
+
+
+def test_cancelled_fetch_releases_waiters():
+    provider = CoalescingProvider(FailingProvider(asyncio.CancelledError()))
+    results = _gather(provider, DATES, DATES)
+    assert all(isinstance(result, ProviderError) for result in results)
+    assert not provider._in_flight
+
+
+def test_short_results_are_an_error():
+    provider = CoalescingProvider(ShortProvider())
+    results = _gather(provider, DATES, DATES[2:])
+    assert all(isinstance(result, ProviderError) for result in results)
+    assert 'returned 2 forecasts for 3 days' in str(results[0])
+
+
+def test_runner_timeout():
+    runner = ProviderRunner(LocalStubProvider(latency=0.5))
+    try:
+        with pytest.raises(ProviderError, match='timed out'):
+            runner.fetch_range(LOCATION, DATES, WINDOW, timeout=0.05)
+        # The upstream call keeps running for later callers
+        assert len(runner.fetch_range(LOCATION, DATES, WINDOW, timeout=5)) == 3
+    finally:
+        runner.loop.call_soon_threadsafe(runner.loop.stop)
+
+
+def test_runner_wraps_provider_errors():
+    runner = ProviderRunner(FailingProvider(RuntimeError("backend down")))
+    try:
+        with pytest.raises(ProviderError, match='backend down'):
+            runner.fetch_range(LOCATION, DATES, WINDOW, timeout=5)
+    finally:
+        runner.loop.call_soon_threadsafe(runner.loop.stop)
+
+
+def test_provider_without_fetch_day_cannot_be_created():
+    class Incomplete(ForecastProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
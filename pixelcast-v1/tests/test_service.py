@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+from datetime import date
+
+import numpy as np
+import pytest
+
+from pixelcast import WeatherDataGenerator, service
+from pixelcast.service import ForecastService, HTTPError, _handle_connection
+
+
+def _handle(method, target, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    return asyncio.run(ForecastService().handle(method, target, body))
+
+
+def _error_status(method, target, payload=None):
+    with pytest.raises(HTTPError) as excinfo:
+        _handle(method, target, payload)
+    return excinfo.value.status
+
+
+def _raw_request(raw: bytes):
+    """Send raw bytes to a live connection handler; returns (status, JSON body)"""
+    async def run():
+        server = await asyncio.start_server(
+            lambda reader, writer: _handle_connection(ForecastService(), reader, writer), '127.0.0.1', 0
+        )
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(raw)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(body)
+    return asyncio.run(run())
+
+
+def test_get_forecast():
+    status, response = _handle('GET', '/v1/forecast?lat=40.7&lon=-74&start=2026-05-01&end=2026-05-03')
+    assert status == 200
+    assert response['shape'] == [3]
+    assert response['dates'] == ['2026-05-01', '2026-05-02', '2026-05-03']
+
+
+def test_batch_matches_single_points():
+    lats, lons = [40.7, 51.5, -33.9], [-74.0, -0.1, 151.2]
+    _, response = _handle('POST', '/v1/forecast', {'lats': lats, 'lons': lons, 'dates': ['2026-05-01']})
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        single = WeatherDataGenerator.generate_weather_data(lat, lon, date(2026, 5, 1), '00:00', '23:00')
+        assert {metric: values[i] for metric, values in response['daily'].items()} == single
+
+
+def test_hourly_series():
+    _, response = _handle('POST', '/v1/forecast', {
+        'lats': [40.7], 'lons': [-74.0], 'dates': ['2026-05-01'],
+        'hourly': {'start_time': '09:00', 'end_time': '12:00', 'step_minutes': 30},
+    })
+    assert response['hourly']['times'] == ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00']
+    assert np.shape(response['hourly']['values']) == (1, 7, len(WeatherDataGenerator.METRICS))
+
+
+@pytest.mark.parametrize('target', [
+    '/v1/forecast?lat=40.7',
+    '/v1/forecast?lat=abc&lon=0',
+    '/v1/forecast?lat=nan&lon=0',
+    '/v1/forecast?lat=91&lon=0',
+    '/v1/forecast?lat=0&lon=-inf',
+    '/v1/forecast?lat=0&lon=0&start=2026-05-03&end=2026-05-01',
+    '/v1/forecast?lat=0&lon=0&start=05/01/2026',
+    '/v1/forecast?lat=0&lon=0&start_time=09:00&step_minutes=abc',
+    '/v1/forecast?lat=0&lon=0&start_time=18:00&end_time=09:00',
+    '/v1/reverse?lat=nan&lon=0',
+])
+def test_get_bad_requests(target):
+    assert _error_status('GET', target) == 400
+
+
+@pytest.mark.parametrize('payload', [
+    {'lats': [0.0], 'lons': [0.0]},
+    {'lats': [0.0], 'lons': [200.0], 'dates': ['2026-05-01']},
+    {'lats': [0.0, 1.0], 'lons': [0.0, 1.0, 2.0], 'dates': ['2026-05-01']},
+    {'lats': [0.0], 'lons': [0.0], 'dates': ['not a date']},
+    {'lats': [0.0], 'lons': [0.0], 'dates': ['2026-05-01'], 'hourly': True},
+    {'lats': [0.0], 'lons': [0.0], 'dates': ['2026-05-01'], 'hourly': {'step_minutes': 'abc'}},
+    {'lats': [0.0], 'lons': [0.0], 'dates': ['2026-05-01'], 'hourly': {'start_time': 9}},
+])
+def test_post_bad_requests(payload):
+    assert _error_status('POST', '/v1/forecast', payload) == 400
+
+
+def test_too_many_points(monkeypatch):
+    monkeypatch.setattr(service, 'MAX_POINTS', 10)
+    payload = {'lats': [[0.0]] * 4, 'lons': [0.0, 1.0, 2.0], 'dates': ['2026-05-01']}
+    assert _error_status('POST', '/v1/forecast', payload) == 413
+
+
+@pytest.fixture
+def batch_threads(monkeypatch):
+    """Threads forecast_batch ran on, with a 50-value inline limit"""
+    threads = []
+    original = service.forecast_batch
+
+    def recording_batch(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    monkeypatch.setattr(service, 'INLINE_VALUES', 50)
+    monkeypatch.setattr(service, 'forecast_batch', recording_batch)
+    return threads
+
+
+def test_broadcast_batches_leave_the_event_loop(batch_threads):
+    # Neither array alone exceeds the limit, their broadcast does
+    payload = {'lats': [[float(i)] for i in range(10)], 'lons': list(range(10)), 'dates': ['2026-05-01']}
+    _, response = _handle('POST', '/v1/forecast', payload)
+    assert response['shape'] == [10, 10]
+    assert batch_threads and batch_threads[0] is not threading.main_thread()
+
+
+def test_small_batches_stay_inline(batch_threads):
+    _handle('GET', '/v1/forecast?lat=0&lon=0&start=2026-05-01&end=2026-05-07')
+    assert batch_threads == [threading.main_thread()]
+
+
+@pytest.mark.parametrize('request_args', [
+    ('GET', '/v1/forecast?lat=0&lon=0&start=2026-05-01&end=2026-05-02&start_time=00:00&step_minutes=15'),
+    ('POST', '/v1/forecast', {'lats': [0.0], 'lons': [0.0], 'dates': ['2026-05-01'],
+                              'hourly': {'step_minutes': 5}}),
+])
+def test_hourly_steps_count_towards_the_inline_limit(batch_threads, request_args):
+    # 2 days x 96 steps and 1 day x 277 steps both exceed 50 values
+    _handle(*request_args)
+    assert batch_threads and batch_threads[0] is not threading.main_thread()
+
+
+def test_too_many_geocode_queries(monkeypatch):
+    monkeypatch.setattr(service, 'MAX_GEOCODE_QUERIES', 3)
+    assert _error_status('POST', '/v1/geocode', {'queries': ['a', 'b', 'c', 'd']}) == 413
+
+
+def test_unknown_route_and_method():
+    assert _error_status('GET', '/v2/forecast') == 404
+    assert _error_status('DELETE', '/v1/forecast') == 405
+
+
+def test_bad_query_param_is_not_reported_as_content_length():
+    status, body = _raw_request(b'GET /v1/forecast?lat=0&lon=0&start_time=09:00&step_minutes=abc HTTP/1.1\r\n'
+                                b'Connection: close\r\n\r\n')
+    assert status == 400
+    assert 'step_minutes' in body['error']
+
+
+def test_invalid_content_length():
+    status, body = _raw_request(b'POST /v1/forecast HTTP/1.1\r\nContent-Length: abc\r\n\r\n')
+    assert (status, body['error']) == (400, 'invalid Content-Length')
+
+
+def test_non_object_body():
+    status, _ = _raw_request(b'POST /v1/forecast HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\n[]')
+    assert status == 400
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from pixelcast import WeatherDataGenerator
+from pixelcast.weather import _point_keys
+
+DAY = date(2026, 5, 1)
+
+
+def _series(lats, lons, dates):
+    return WeatherDataGenerator.generate_hourly_series(lats, lons, dates, '09:00', '17:00')
+
+
+def test_forecasts_are_deterministic():
+    first = WeatherDataGenerator.generate_batch([40.7, 51.5], [-74.0, -0.1], DAY)
+    second = WeatherDataGenerator.generate_batch([40.7, 51.5], [-74.0, -0.1], DAY)
+    for metric in WeatherDataGenerator.METRICS:
+        np.testing.assert_array_equal(first[metric], second[metric])
+
+
+def test_swapped_coordinates_differ():
+    keys = _point_keys(np.array([10.0, 20.0]), np.array([20.0, 10.0]), np.array([DAY.toordinal()] * 2))
+    assert keys[0] != keys[1]
+    series = _series([10.0, 20.0], [20.0, 10.0], DAY)
+    assert not np.array_equal(series[0], series[1])
+
+
+def test_diagonal_points_get_distinct_wind():
+    lats = np.linspace(0.0, 30.0, 31)
+    daily, _ = WeatherDataGenerator._daily_base(lats, 30.0 - lats, DAY)
+    assert len(np.unique(daily['wind_speed'])) == len(lats)
+
+
+def test_neighbouring_point_and_day_differ():
+    series = _series([40.700, 40.701], [-74.0, -74.0], [DAY + timedelta(days=1), DAY])
+    assert not np.array_equal(series[0], series[1])
+
+
+@pytest.mark.parametrize('lat, lon', [(40.7, -74.0), (-33.87, 151.21), (0.0, 0.0)])
+def test_batch_matches_single_point(lat, lon):
+    dates = [DAY + timedelta(days=i) for i in range(3)]
+    batch = WeatherDataGenerator.generate_batch(lat, lon, np.array(dates, dtype='datetime64[D]'))
+    for i, day in enumerate(dates):
+        single = WeatherDataGenerator.generate_weather_data(lat, lon, day, '09:00', '17:00')
+        assert single == {metric: float(values[i]) for metric, values in batch.items()}
+
+
+def test_hourly_series_matches_per_day_calls():
+    dates = np.array([DAY, DAY + timedelta(days=1)], dtype='datetime64[D]')
+    together = _series(40.7, -74.0, dates)
+    assert together.shape == (2, 9, len(WeatherDataGenerator.METRICS))
+    for i, day in enumerate(dates):
+        np.testing.assert_array_equal(together[i], _series(40.7, -74.0, day))
+
+
+@pytest.mark.parametrize('lat, lon', [(40.7, -74.0), (-33.87, 151.21), (0.0, 0.0)])
+def test_hourly_uv_peaks_at_daily_value(lat, lon):
+    daily = WeatherDataGenerator.generate_batch(lat, lon, DAY)
+    series = _series(lat, lon, DAY)
+    uv = series[:, WeatherDataGenerator.METRICS.index('uv_index')]
+    # Daily values are rounded to one decimal place
+    assert uv.max() == pytest.approx(float(daily['uv_index']), abs=0.05)
+    assert uv[3] == uv.max()  # 12:00
@@ -0,0 +1,93 @@
+import struct
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from pixelcast import WeatherDataGenerator
+from pixelcast.weather_tiles import (
+    TILE_SIZE, TileCache, WeatherTileRenderer, start_tile_server, tiles_reachable_from,
+)
+
+
+def _png_size(tile: bytes):
+    assert tile.startswith(b'\x89PNG\r\n\x1a\n')
+    return struct.unpack('>II', tile[16:24])
+
+
+def test_tile_cache_evicts_least_recently_used():
+    cache = TileCache(max_tiles=2)
+    cache.put((1, 0, 0, '2026-05-01', 'temperature'), b'a')
+    cache.put((1, 0, 1, '2026-05-01', 'temperature'), b'b')
+    assert cache.get((1, 0, 0, '2026-05-01', 'temperature')) == b'a'
+    cache.put((1, 1, 1, '2026-05-01', 'temperature'), b'c')
+    assert len(cache) == 2
+    assert cache.get((1, 0, 1, '2026-05-01', 'temperature')) is None
+
+
+def test_renderer_draws_each_tile_once():
+    calls = []
+
+    def field(lats, lons, date):
+        calls.append(date)
+        return WeatherDataGenerator.sample_field(lats, lons, date)
+
+    renderer = WeatherTileRenderer(field)
+    tile = renderer.render(6, 18, 24, '2026-05-01', 'temperature')
+    assert _png_size(tile) == (TILE_SIZE, TILE_SIZE)
+    assert renderer.render(6, 18, 24, '2026-05-01', 'temperature') == tile
+    assert len(calls) == 1
+    with pytest.raises(KeyError):
+        renderer.render(6, 18, 24, '2026-05-01', 'humidity')
+
+
+def test_field_has_no_diagonal_stripes():
+    # Points on lat + lon = const used to share one forecast
+    lats = np.arange(0.0, 10.0, 0.25)
+    field = WeatherDataGenerator.sample_field(lats, 10.0 - lats, '2026-05-01')
+    assert len(np.unique(np.round(field['wind_speed'], 3))) > len(lats) // 2
+
+
+@pytest.fixture(scope='module')
+def tile_url():
+    url = start_tile_server(WeatherDataGenerator.sample_field, host='127.0.0.1', port=0)
+    assert url is not None
+    return url
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_server_serves_tiles(tile_url):
+    assert _status(tile_url.format(metric='precipitation', date='2026-05-01', z=3, x=4, y=2)) == 200
+
+
+@pytest.mark.parametrize('metric, date, z, x, y, status', [
+    ('temperature', '2026-13-45', 3, 4, 2, 400),
+    ('humidity', '2026-05-01', 3, 4, 2, 404),
+    ('temperature', '2026-05-01', 3, 8, 2, 404),
+])
+def test_server_rejects_bad_requests(tile_url, metric, date, z, x, y, status):
+    assert _status(tile_url.format(metric=metric, date=date, z=z, x=x, y=y)) == status
+
+
+@pytest.mark.parametrize('app_url, reachable', [
+    (None, True),
+    ('http://localhost:8501/', True),
+    ('http://127.0.0.1:8501/', True),
+    ('https://pixelcast.example.com/', False),
+    ('http://192.168.1.20:8501/', False),
+])
+def test_overlay_needs_a_local_browser_or_public_url(monkeypatch, app_url, reachable):
+    monkeypatch.delenv('PIXELCAST_TILE_URL', raising=False)
+    assert tiles_reachable_from(app_url) is reachable
+    assert (start_tile_server(WeatherDataGenerator.sample_field, host='127.0.0.1', port=0,
+                              app_url=app_url) is not None) is reachable
+    monkeypatch.setenv('PIXELCAST_TILE_URL', 'https://tiles.example.com')
+    assert tiles_reachable_from(app_url)